@@ -1,6 +1,5 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from azure.storage.blob import BlobServiceClient
 import os
 
 
@@ -33,6 +32,8 @@ def init_azure_storage():
         if not settings.container_name:
             raise ValueError("Azure Storage container name is not configured")
 
+        # SDK Azure importé seulement si le container Azure est utilisé
+        from azure.storage.blob import BlobServiceClient
         blob_service_client = BlobServiceClient.from_connection_string(
             settings.connection_string
         )
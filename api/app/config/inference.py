@@ -0,0 +1,171 @@
+from functools import lru_cache
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class InferenceSettings(BaseSettings):
+    # Prédiction par lots
+    batch_max_items: int = Field(default=256, alias="PREDICT_BATCH_MAX_ITEMS")
+    emotion_batch_size: int = Field(default=32, alias="EMOTION_BATCH_SIZE")
+
+    # Flux NDJSON (/predict/stream) : taille et attente maximale des lots
+    # internes, lignes en attente et lots en cours avant de cesser la lecture
+    stream_batch_size: int = Field(default=32, alias="STREAM_BATCH_SIZE")
+    stream_batch_max_wait_ms: float = Field(default=20.0, alias="STREAM_BATCH_MAX_WAIT_MS")
+    stream_queue_size: int = Field(default=128, alias="STREAM_QUEUE_SIZE")
+    stream_max_in_flight_batches: int = Field(default=2, alias="STREAM_MAX_IN_FLIGHT_BATCHES")
+    stream_max_line_bytes: int = Field(default=1_048_576, alias="STREAM_MAX_LINE_BYTES")
+
+    # Messages bruts (/predict/email) : taille maximale, caractères décodés
+    # par partie, puis budget du texte retenu avant les étapes NLP
+    email_max_bytes: int = Field(default=10_485_760, alias="EMAIL_MAX_BYTES")
+    email_max_part_chars: int = Field(default=200_000, alias="EMAIL_MAX_PART_CHARS")
+    email_max_chars: int = Field(default=5000, alias="EMAIL_MAX_CHARS")
+    email_max_tokens: int = Field(default=512, alias="EMAIL_MAX_TOKENS")
+    email_strip_quotes: bool = Field(default=True, alias="EMAIL_STRIP_QUOTES")
+    email_include_subject: bool = Field(default=False, alias="EMAIL_INCLUDE_SUBJECT")
+
+    # Micro-lots dynamiques devant le modèle d'émotions
+    emotion_batching_enabled: bool = Field(
+        default=True, alias="EMOTION_BATCHING_ENABLED")
+    emotion_batching_max_size: int = Field(
+        default=16, alias="EMOTION_BATCHING_MAX_SIZE")
+    emotion_batching_max_wait_ms: float = Field(
+        default=5.0, alias="EMOTION_BATCHING_MAX_WAIT_MS")
+
+    # Pools d'exécution des étapes du pipeline
+    executor_io_workers: int = Field(default=16, alias="EXECUTOR_IO_WORKERS")
+    executor_cpu_mode: str = Field(default="process", alias="EXECUTOR_CPU_MODE")
+    executor_cpu_workers: int | None = Field(
+        default=None, alias="EXECUTOR_CPU_WORKERS")
+    executor_inference_workers: int = Field(
+        default=2, alias="EXECUTOR_INFERENCE_WORKERS")
+
+    # Dictionnaires de mots-clés du spam (fichier JSON versionné)
+    spam_keywords_path: str | None = Field(
+        default=None, alias="SPAM_KEYWORDS_PATH")
+
+    # Scoreur compilé du spam (sans DataFrame), vérifié au chargement
+    spam_compiled_scorer: bool = Field(default=True, alias="SPAM_COMPILED_SCORER")
+
+    # Nettoyage BERT : true reproduit l'ancienne suppression des caractères
+    # hors [\w\s.,!?'] (emojis compris), absente du nettoyage d'entraînement
+    bert_strip_symbols: bool = Field(default=False, alias="BERT_STRIP_SYMBOLS")
+
+    # Pipeline spaCy du préprocesseur spam
+    spacy_excluded_components: list[str] = Field(
+        default=["parser"], alias="SPACY_EXCLUDED_COMPONENTS")
+    spacy_batch_size: int = Field(default=64, alias="SPACY_BATCH_SIZE")
+    spacy_n_process: int = Field(default=1, alias="SPACY_N_PROCESS")
+
+    # Cache des traductions (mémoire LRU + SQLite optionnel)
+    translation_cache_enabled: bool = Field(
+        default=True, alias="TRANSLATION_CACHE_ENABLED")
+    translation_cache_max_entries: int = Field(
+        default=10000, alias="TRANSLATION_CACHE_MAX_ENTRIES")
+    translation_cache_ttl_seconds: float = Field(
+        default=7 * 24 * 3600, alias="TRANSLATION_CACHE_TTL_SECONDS")
+    translation_cache_disk_path: str | None = Field(
+        default=None, alias="TRANSLATION_CACHE_DISK_PATH")
+
+    # Moteur de traduction (google | local) et garde-fous
+    translator_backend: str = Field(default="google", alias="TRANSLATOR_BACKEND")
+    translator_deadline_seconds: float = Field(
+        default=3.0, alias="TRANSLATOR_DEADLINE_SECONDS")
+    translator_max_concurrency: int = Field(
+        default=8, alias="TRANSLATOR_MAX_CONCURRENCY")
+    translator_retries: int = Field(default=1, alias="TRANSLATOR_RETRIES")
+    # Attente maximale d'un thread libre du pool (défaut : le délai par appel)
+    translator_queue_timeout_seconds: float | None = Field(
+        default=None, alias="TRANSLATOR_QUEUE_TIMEOUT_SECONDS")
+    translator_circuit_failure_threshold: int = Field(
+        default=5, alias="TRANSLATOR_CIRCUIT_FAILURE_THRESHOLD")
+    translator_circuit_reset_seconds: float = Field(
+        default=30.0, alias="TRANSLATOR_CIRCUIT_RESET_SECONDS")
+    translator_degraded_fallback: bool = Field(
+        default=True, alias="TRANSLATOR_DEGRADED_FALLBACK")
+    local_translator_latency_ms: float = Field(
+        default=50.0, alias="LOCAL_TRANSLATOR_LATENCY_MS")
+    local_translator_failure_rate: float = Field(
+        default=0.0, alias="LOCAL_TRANSLATOR_FAILURE_RATE")
+
+    # Détection de langue
+    language_detection_max_chars: int = Field(
+        default=1000, alias="LANGUAGE_DETECTION_MAX_CHARS")
+    language_detection_seed: int = Field(
+        default=0, alias="LANGUAGE_DETECTION_SEED")
+    # Sous ce seuil de confiance, le texte n'est pas traduit (0 : toujours traduit)
+    language_detection_min_confidence: float = Field(
+        default=0.0, alias="LANGUAGE_DETECTION_MIN_CONFIDENCE")
+
+    # Cache des résultats de /predict (clé = texte normalisé + versions des modèles)
+    prediction_cache_enabled: bool = Field(
+        default=True, alias="PREDICTION_CACHE_ENABLED")
+    prediction_cache_max_entries: int = Field(
+        default=10000, alias="PREDICTION_CACHE_MAX_ENTRIES")
+    prediction_cache_ttl_seconds: int = Field(
+        default=3600, alias="PREDICTION_CACHE_TTL_SECONDS")
+
+    # Synchronisation incrémentale des modèles au démarrage
+    model_sync_max_concurrency: int = Field(
+        default=4, alias="MODEL_SYNC_MAX_CONCURRENCY")
+    model_sync_manifest_path: str = Field(
+        default="models/.manifest.json", alias="MODEL_SYNC_MANIFEST_PATH")
+    # Répertoire local utilisé à la place du container Azure (hors ligne)
+    model_source_dir: str | None = Field(
+        default=None, alias="MODEL_SOURCE_DIR")
+
+    # Chargement des modèles en parallèle au démarrage
+    startup_parallel_loading: bool = Field(
+        default=True, alias="STARTUP_PARALLEL_LOADING")
+    startup_loading_workers: int = Field(
+        default=5, alias="STARTUP_LOADING_WORKERS")
+
+    # Moteur d'inférence des émotions : tensorflow (saved model) ou onnx
+    emotion_backend: str = Field(default="tensorflow", alias="EMOTION_BACKEND")
+    emotion_onnx_path: str = Field(
+        default="models/emotions.int8.onnx", alias="EMOTION_ONNX_PATH")
+    emotion_onnx_threads: int | None = Field(
+        default=None, alias="EMOTION_ONNX_THREADS")
+    # Paliers de padding des entrées du modèle d'émotions (le dernier = longueur max)
+    emotion_padding_buckets: list[int] = Field(
+        default=[32, 64, 128, 256, 512], alias="EMOTION_PADDING_BUCKETS")
+
+    # Cascade des émotions : LSTM d'abord, RoBERTa si la probabilité
+    # maximale du LSTM est sous le seuil
+    emotion_cascade_enabled: bool = Field(default=False, alias="EMOTION_CASCADE_ENABLED")
+    emotion_cascade_threshold: float = Field(default=0.8, alias="EMOTION_CASCADE_THRESHOLD")
+    emotion_lstm_model_path: str = Field(
+        default="models/emotions_lstm.keras", alias="EMOTION_LSTM_MODEL_PATH")
+    emotion_lstm_tokenizer_path: str = Field(
+        default="models/emotions_lstm_tokenizer.json", alias="EMOTION_LSTM_TOKENIZER_PATH")
+    emotion_lstm_max_len: int = Field(default=50, alias="EMOTION_LSTM_MAX_LEN")
+
+    # Quasi-doublons des campagnes de spam : verdict repris d'un message
+    # récent de similarité (Jaccard estimée) >= SPAM_DEDUP_SIMILARITY, si
+    # son score était net (>= SPAM_DEDUP_CONFIDENCE ou <= 1 - ce seuil)
+    spam_dedup_enabled: bool = Field(default=False, alias="SPAM_DEDUP_ENABLED")
+    spam_dedup_similarity: float = Field(default=0.8, alias="SPAM_DEDUP_SIMILARITY")
+    spam_dedup_confidence: float = Field(default=0.9, alias="SPAM_DEDUP_CONFIDENCE")
+    spam_dedup_min_tokens: int = Field(default=8, alias="SPAM_DEDUP_MIN_TOKENS")
+    spam_dedup_max_entries: int = Field(default=10000, alias="SPAM_DEDUP_MAX_ENTRIES")
+    spam_dedup_ttl_seconds: int = Field(default=3600, alias="SPAM_DEDUP_TTL_SECONDS")
+
+    # Préchauffage avant l'état prêt (/ready)
+    warmup_enabled: bool = Field(default=True, alias="WARMUP_ENABLED")
+    warmup_text_lengths: list[int] = Field(
+        default=[64, 256, 512, 1024, 4096], alias="WARMUP_TEXT_LENGTHS")
+    warmup_rounds: int = Field(default=2, alias="WARMUP_ROUNDS")
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        env_prefix="",
+        extra='allow'  # Permet les variables supplémentaires dans le .env
+    )
+
+
+@lru_cache
+def get_inference_settings() -> InferenceSettings:
+    """Retourne les paramètres d'inférence (chargés une seule fois)"""
+    return InferenceSettings()
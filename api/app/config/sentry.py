@@ -1,3 +1,6 @@
+import queue
+import threading
+from contextlib import contextmanager
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from pydantic import Field
@@ -10,6 +13,17 @@ class Settings(BaseSettings):
     sentry_dsn: str | None = Field(default=None, alias="SENTRY_DSN")
     environment: str = Field(default="development", alias="ENVIRONMENT")
 
+    # Échantillonnage des transactions et des profils
+    traces_sample_rate: float = Field(
+        default=0.05, alias="SENTRY_TRACES_SAMPLE_RATE")
+    profiles_sample_rate: float = Field(
+        default=0.0, alias="SENTRY_PROFILES_SAMPLE_RATE")
+    # False : les jalons des étapes annotent le span courant au lieu de
+    # créer un événement Sentry par étape et par requête
+    stage_events: bool = Field(default=False, alias="SENTRY_STAGE_EVENTS")
+    # Messages en attente d'envoi au-delà desquels les nouveaux sont abandonnés
+    buffer_size: int = Field(default=1000, alias="SENTRY_BUFFER_SIZE")
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
@@ -18,13 +32,52 @@ class Settings(BaseSettings):
     )
 
 
+class BufferedExporter:
+    """
+    File bornée de messages Sentry vidée par un thread dédié : l'appelant ne
+    fait qu'un put_nowait, la construction de l'événement (push_scope,
+    sérialisation) a lieu hors du chemin de la requête. File pleine : le
+    message est abandonné et compté.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name="sentry-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, message: str, level: str, context: dict | None):
+        try:
+            self._queue.put_nowait((message, level, context))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            message, level, context = self._queue.get()
+            try:
+                _send_message(message, level, context)
+            except Exception as e:
+                print(f"Failed to send message to Sentry: {str(e)}")
+
+    def stats(self) -> dict:
+        return {"pending": self._queue.qsize(), "dropped": self.dropped}
+
+
+_exporter: BufferedExporter | None = None
+_stage_events = False
+
+
 def init_sentry():
     """
     Initialise Sentry si un DSN est configuré,
     sinon continue sans monitoring Sentry
     """
+    global _exporter, _stage_events
     try:
         settings = Settings()
+        _stage_events = settings.stage_events
 
         if not settings.sentry_dsn:
             print(
@@ -34,14 +87,15 @@ def init_sentry():
         sentry_sdk.init(
             dsn=settings.sentry_dsn,
             environment=settings.environment,
-            traces_sample_rate=1.0,
-            profiles_sample_rate=1.0,
+            traces_sample_rate=settings.traces_sample_rate,
+            profiles_sample_rate=settings.profiles_sample_rate,
             integrations=[
                 FastApiIntegration(
                     transaction_style="endpoint"
                 )
             ]
         )
+        _exporter = BufferedExporter(max_size=settings.buffer_size)
         print(f"Sentry initialized in {settings.environment} mode")
     except Exception as e:
         print(f"Failed to initialize Sentry: {str(e)}")
@@ -49,7 +103,10 @@ def init_sentry():
 
 
 def capture_exception(error: Exception, context: dict = None):
-    """Capture une exception si Sentry est initialisé"""
+    """
+    Capture une exception si Sentry est initialisé (envoi immédiat : les
+    erreurs sont rares et doivent garder le contexte de la requête)
+    """
     if not sentry_sdk.Hub.current.client:
         print(f"Error (not sent to Sentry): {str(error)}")
         if context:
@@ -65,18 +122,64 @@ def capture_exception(error: Exception, context: dict = None):
         sentry_sdk.capture_exception(error)
 
 
+def _send_message(message: str, level: str, context: dict | None):
+    if context:
+        with sentry_sdk.push_scope() as scope:
+            for key, value in context.items():
+                scope.set_extra(key, value)
+            sentry_sdk.capture_message(message, level=level)
+    else:
+        sentry_sdk.capture_message(message, level=level)
+
+
 def capture_message(message: str, level: str = "info", context: dict = None):
-    """Capture un message si Sentry est initialisé"""
+    """Capture un message si Sentry est initialisé (envoi différé par le BufferedExporter)"""
     if not sentry_sdk.Hub.current.client:
         print(f"{level.upper()}: {message}")
         if context:
             print(f"Context: {context}")
         return
 
-    if context:
-        with sentry_sdk.push_scope() as scope:
-            for key, value in context.items():
-                scope.set_extra(key, value)
-            sentry_sdk.capture_message(message, level=level)
+    if _exporter is not None:
+        _exporter.submit(message, level, context)
     else:
-        sentry_sdk.capture_message(message, level=level)
+        _send_message(message, level, context)
+
+
+def _current_span():
+    """Span courant s'il appartient à une transaction échantillonnée"""
+    span = sentry_sdk.Hub.current.scope.span
+    if span is None or not span.sampled:
+        return None
+    return span
+
+
+@contextmanager
+def stage_span(name: str):
+    """
+    Span enfant pour une étape du pipeline. Hors transaction échantillonnée
+    (ou sans Sentry), aucun objet n'est créé côté Sentry.
+    """
+    parent = _current_span()
+    if parent is None:
+        yield None
+        return
+    with parent.start_child(op="pipeline.stage", description=name) as span:
+        yield span
+
+
+def stage_event(message: str, context: dict = None):
+    """
+    Jalon d'une étape du pipeline : annotation du span courant par défaut,
+    message Sentry (différé) si SENTRY_STAGE_EVENTS est activé
+    """
+    if _stage_events:
+        capture_message(message, context=context)
+        return
+    span = _current_span()
+    if span is not None:
+        span.set_data(message, context or True)
+
+
+def exporter_stats() -> dict | None:
+    return _exporter.stats() if _exporter is not None else None
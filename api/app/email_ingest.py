@@ -0,0 +1,287 @@
+import binascii
+import quopri
+import re
+from dataclasses import dataclass
+from email import policy
+from email.feedparser import BytesFeedParser
+from email.message import Message
+from app.text_cleaning import SKIPPED_TEXT_TAGS, HtmlTextExtractor
+
+# Contenu jamais affiché
+HIDDEN_TAGS = SKIPPED_TEXT_TAGS | {"head", "title"}
+# Conteneurs de l'historique cité (Gmail, Outlook, Thunderbird, Yahoo, Apple Mail)
+QUOTE_CLASSES = ("gmail_quote", "moz-cite-prefix", "yahoo_quoted", "OutlookMessageHeader")
+QUOTE_IDS = ("divRplyFwdMsg", "appendonsend", "mail-editor-reference-message-container")
+
+# En-têtes de réponse / transfert : tout ce qui suit est l'historique cité
+_REPLY_HEADERS = [
+    re.compile(r"^\s*On\b.{0,300}\bwrote:\s*$", re.IGNORECASE),
+    re.compile(r"^\s*Le\b.{0,300}\ba écrit\s*:\s*$", re.IGNORECASE),
+    re.compile(r"^\s*-{2,}\s*(original message|message d'origine|forwarded message|"
+               r"message transféré)\s*-{2,}", re.IGNORECASE),
+]
+# Bloc d'en-têtes Outlook : "From:" suivi de "Sent:" / "Date:" / "To:"
+_OUTLOOK_FROM = re.compile(r"^\s*\*?(from|de)\s*:\*?\s*\S", re.IGNORECASE)
+_OUTLOOK_NEXT = re.compile(r"^\s*\*?(sent|date|to|envoyé|à|objet|subject)\s*:", re.IGNORECASE)
+# Délimiteur de signature (RFC 3676) et signatures des clients mobiles
+_SIGNATURE = re.compile(r"^(--|-- |__)\s*$")
+_MOBILE_SIGNATURE = re.compile(
+    r"^\s*(sent from my|envoyé de mon|envoyé depuis mon|get outlook for|"
+    r"télécharger outlook pour)\b", re.IGNORECASE)
+_SEPARATOR = re.compile(r"^[\s_=\-*]*$")
+_TOKENS = re.compile(r"\S+")
+
+
+class EmailTooLarge(ValueError):
+    """Message brut au-delà de EMAIL_MAX_BYTES"""
+
+
+class HtmlBodyExtractor(HtmlTextExtractor):
+    """
+    Texte visible d'un corps HTML, une ligne par bloc, sans les balises
+    cachées (script, style, head) ni les conteneurs de l'historique cité
+    (blockquote, gmail_quote, divRplyFwdMsg...)
+    """
+
+    def __init__(self):
+        super().__init__(hidden_tags=HIDDEN_TAGS, block_newlines=True)
+        self.quoted = False
+
+    def extract(self, markup: str) -> str:
+        self.quoted = False
+        return super().extract(markup)
+
+    def hidden(self, tag, attrs) -> bool:
+        if super().hidden(tag, attrs):
+            return True
+        if tag != "blockquote":
+            attributes = dict(attrs)
+            classes = (attributes.get("class") or "").split()
+            if not any(name in classes for name in QUOTE_CLASSES) \
+                    and attributes.get("id") not in QUOTE_IDS:
+                return False
+        # Historique cité, hors d'une zone déjà ignorée
+        self.quoted = self.quoted or not self._skipping
+        return True
+
+
+@dataclass
+class ExtractedEmail:
+    text: str
+    subject: str | None
+    body_type: str | None
+    quoted_removed: bool
+    signature_removed: bool
+    truncated: bool
+
+
+class EmailTextExtractor:
+    """
+    Texte à analyser d'un message RFC 822 / MIME brut, borné avant toute
+    étape NLP :
+    - le message est analysé au fil de l'eau (BytesFeedParser), dans la
+      limite de max_bytes
+    - la première partie text/plain hors pièces jointes est retenue, sinon
+      (absente ou vide) la première partie text/html ; seul le début de
+      son contenu encodé (base64, quoted-printable) est décodé, de quoi
+      produire max_part_chars caractères
+    - l'historique cité (en-têtes de réponse, lignes '>', blockquote) et la
+      signature sont retirés
+    - le texte est ramené à max_tokens mots puis à max_chars caractères
+    """
+
+    def __init__(self, max_bytes: int = 10_485_760, max_part_chars: int = 200_000,
+                 max_chars: int = 5000, max_tokens: int = 512, strip_quotes: bool = True,
+                 include_subject: bool = False):
+        self.max_bytes = max_bytes
+        self.max_part_chars = max_part_chars
+        self.max_chars = max_chars
+        self.max_tokens = max_tokens
+        self.strip_quotes = strip_quotes
+        self.include_subject = include_subject
+
+    def parser(self) -> "EmailFeed":
+        """Analyseur incrémental d'un message, à alimenter morceau par morceau"""
+        return EmailFeed(self)
+
+    def extract(self, raw: bytes) -> ExtractedEmail:
+        feed = self.parser()
+        feed.feed(raw)
+        return feed.close()
+
+    def extract_message(self, message: Message) -> ExtractedEmail:
+        subject = self.subject(message)
+        body_type, text = None, ""
+        for part in self.select_parts(message):
+            body_type, text = part.get_content_type(), self.decode(part)
+            if text.strip():
+                break
+        quoted = False
+        if body_type == "text/html":
+            html = HtmlBodyExtractor()
+            text = html.extract(text)
+            quoted = html.quoted
+
+        signature = False
+        if self.strip_quotes:
+            stripped, quoted_text, signature = self.strip_history(text)
+            # Transfert sans texte propre : le contenu transféré est analysé
+            if stripped.strip():
+                text, quoted = stripped, quoted or quoted_text
+            else:
+                signature = False
+        if self.include_subject and subject:
+            text = f"{subject}\n{text}"
+
+        text, truncated = self.apply_budget(text)
+        return ExtractedEmail(text, subject, body_type, quoted, signature, truncated)
+
+    @staticmethod
+    def subject(message: Message) -> str | None:
+        try:
+            subject = message.get("subject")
+        except Exception:
+            # En-tête mal formé
+            return None
+        return " ".join(str(subject).split()) if subject is not None else None
+
+    @staticmethod
+    def _text_parts(part: Message):
+        """Parties feuilles, sans descendre dans les messages joints (message/rfc822)"""
+        if part.get_content_maintype() == "multipart":
+            for subpart in part.get_payload():
+                yield from EmailTextExtractor._text_parts(subpart)
+        elif part.get_content_maintype() == "text" \
+                and part.get_content_disposition() != "attachment":
+            yield part
+
+    def select_parts(self, message: Message) -> list[Message]:
+        """Première partie text/plain puis première partie text/html, si présentes"""
+        plain = html = None
+        for part in self._text_parts(message):
+            if plain is None and part.get_content_type() == "text/plain":
+                plain = part
+            elif html is None and part.get_content_type() == "text/html":
+                html = part
+            if plain is not None and html is not None:
+                break
+        return [part for part in (plain, html) if part is not None]
+
+    @staticmethod
+    def payload_prefix(part: Message, size: int) -> bytes:
+        """
+        Les size premiers octets du contenu décodé, en ne décodant que le
+        début du contenu encodé (même résultat que get_payload(decode=True)[:size])
+        """
+        raw = part.get_payload()
+        if not isinstance(raw, str):
+            return (part.get_payload(decode=True) or b"")[:size]
+        encoding = str(part.get("content-transfer-encoding", "")).strip().lower()
+
+        if encoding == "base64":
+            # 4 caractères pour 3 octets, hors blancs (fins de ligne)
+            needed = (size // 3 + 1) * 4
+            window = raw[:needed * 2 + 1024]
+            encoded = "".join(window.split())
+            if len(encoded) < needed and len(window) < len(raw):
+                encoded = "".join(raw.split())
+            encoded = encoded[:needed]
+            encoded = encoded[:len(encoded) - len(encoded) % 4]
+            try:
+                return binascii.a2b_base64(encoded.encode("ascii", "ignore"))[:size]
+            except binascii.Error:
+                return (part.get_payload(decode=True) or b"")[:size]
+
+        if encoding == "quoted-printable":
+            # Au plus 3 caractères par octet (=XX), plus les sauts de ligne doux
+            window = raw[:size * 3 + 1024]
+            if len(window) < len(raw):
+                # Coupe sur une fin de ligne : pas de séquence =XX tronquée
+                window = window[:window.rfind("\n") + 1] or window
+            return quopri.decodestring(window.encode("ascii", "surrogateescape"))[:size]
+
+        # get_payload() a déjà décodé selon le charset les octets 8 bits
+        # (surrogateescape) : conversion du début du contenu brut, comme le
+        # fait get_payload(decode=True) pour le contenu entier (attribut
+        # interne de Message, couvert par tests/test_email_ingest.py)
+        stored = getattr(part, "_payload", None)
+        if encoding in ("", "7bit", "8bit", "binary") and isinstance(stored, str):
+            window = stored[:size]
+            try:
+                return window.encode("ascii", "surrogateescape")
+            except UnicodeError:
+                return window.encode("raw-unicode-escape")
+        return (part.get_payload(decode=True) or b"")[:size]
+
+    def decode(self, part: Message) -> str:
+        # Au plus 4 octets par caractère : le décodage reste borné
+        payload = self.payload_prefix(part, self.max_part_chars * 4)
+        charset = part.get_content_charset() or "utf-8"
+        try:
+            text = payload.decode(charset, errors="replace")
+        except LookupError:
+            text = payload.decode("utf-8", errors="replace")
+        return text[:self.max_part_chars]
+
+    @staticmethod
+    def strip_history(text: str) -> tuple[str, bool, bool]:
+        """
+        Texte sans historique cité ni signature
+        Returns:
+            tuple: (texte, historique retiré, signature retirée)
+        """
+        lines = text.splitlines()
+        kept: list[str] = []
+        quoted = signature = False
+        for i, line in enumerate(lines):
+            following = " ".join(lines[i:i + 2])
+            if any(header.match(line) or header.match(following) for header in _REPLY_HEADERS) \
+                    or (_OUTLOOK_FROM.match(line)
+                        and any(_OUTLOOK_NEXT.match(next_line) for next_line in lines[i + 1:i + 4])):
+                quoted = True
+                break
+            if _SIGNATURE.match(line) or _MOBILE_SIGNATURE.match(line):
+                signature = True
+                break
+            if line.lstrip().startswith(">"):
+                quoted = True
+                continue
+            kept.append(line)
+        # Séparateurs laissés avant l'historique (lignes de '_' d'Outlook)
+        while kept and _SEPARATOR.match(kept[-1]):
+            kept.pop()
+        return "\n".join(kept), quoted, signature
+
+    def apply_budget(self, text: str) -> tuple[str, bool]:
+        """Texte limité à max_tokens mots puis à max_chars caractères (coupe sur un blanc)"""
+        truncated = False
+        if self.max_tokens:
+            for count, token in enumerate(_TOKENS.finditer(text), start=1):
+                if count == self.max_tokens:
+                    truncated = bool(text[token.end():].strip())
+                    text = text[:token.end()]
+                    break
+        if self.max_chars and len(text) > self.max_chars:
+            cut = text.rfind(" ", 0, self.max_chars + 1)
+            text = text[:cut if cut > 0 else self.max_chars]
+            truncated = True
+        return text.strip(), truncated
+
+
+class EmailFeed:
+    """Analyse incrémentale d'un message brut reçu par morceaux"""
+
+    def __init__(self, extractor: EmailTextExtractor):
+        self.extractor = extractor
+        self.size = 0
+        self._parser = BytesFeedParser(policy=policy.default)
+
+    def feed(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.extractor.max_bytes and self.size > self.extractor.max_bytes:
+            raise EmailTooLarge(
+                f"Message trop volumineux (max {self.extractor.max_bytes} octets)")
+        self._parser.feed(chunk)
+
+    def close(self) -> ExtractedEmail:
+        return self.extractor.extract_message(self._parser.close())
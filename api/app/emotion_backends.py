@@ -0,0 +1,97 @@
+import os
+import numpy as np
+from app.model_fingerprint import model_fingerprint
+
+
+class EmotionBackend:
+    """
+    Moteur d'inférence du modèle d'émotions : reçoit les tenseurs du
+    tokenizer (numpy, int64) et retourne les logits (numpy, batch x classes)
+    """
+    name = "base"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version: str | None = None
+
+    def load(self):
+        raise NotImplementedError
+
+    def predict_logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TensorFlowEmotionBackend(EmotionBackend):
+    """Saved model TensorFlow d'origine (models/emotions)"""
+    name = "tensorflow"
+
+    def __init__(self, path: str = "models/emotions"):
+        super().__init__(path)
+        self.model = None
+
+    def load(self):
+        import tensorflow as tf
+        tf.get_logger().setLevel('ERROR')  # Supprime les avertissements TF additionnels
+        self.model = tf.saved_model.load(self.path)
+        self.version = model_fingerprint(self.path)
+
+    def predict_logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import tensorflow as tf
+        inputs = {
+            'input_ids': tf.constant(input_ids),
+            'attention_mask': tf.constant(attention_mask),
+            'token_type_ids': tf.zeros_like(input_ids)
+        }
+        predictions = self.model(inputs, training=False)
+        return predictions['logits'].numpy()
+
+
+class OnnxEmotionBackend(EmotionBackend):
+    """
+    Modèle exporté en ONNX (éventuellement quantifié int8) exécuté par
+    ONNX Runtime sur CPU, voir tools/export_emotion_onnx.py
+    """
+    name = "onnx"
+
+    def __init__(self, path: str = "models/emotions.onnx", intra_op_threads: int | None = None):
+        super().__init__(path)
+        self.intra_op_threads = intra_op_threads
+        self.session = None
+        self._input_names: set[str] = set()
+        self._output_name: str | None = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f"Modèle ONNX introuvable: {self.path} (voir tools/export_emotion_onnx.py)")
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        self.session = ort.InferenceSession(
+            self.path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        output_names = [output.name for output in self.session.get_outputs()]
+        self._output_name = "logits" if "logits" in output_names else output_names[0]
+        self.version = model_fingerprint(self.path)
+
+    def predict_logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        feeds = {
+            'input_ids': input_ids.astype(np.int64, copy=False),
+            'attention_mask': attention_mask.astype(np.int64, copy=False),
+            'token_type_ids': np.zeros_like(input_ids, dtype=np.int64),
+        }
+        # Seules les entrées déclarées par le graphe exporté sont fournies
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+        return self.session.run([self._output_name], feeds)[0]
+
+
+def create_emotion_backend(settings) -> EmotionBackend:
+    """Construit le moteur configuré (EMOTION_BACKEND=tensorflow|onnx), sans le charger"""
+    if settings.emotion_backend == "tensorflow":
+        return TensorFlowEmotionBackend()
+    if settings.emotion_backend == "onnx":
+        return OnnxEmotionBackend(
+            settings.emotion_onnx_path, intra_op_threads=settings.emotion_onnx_threads)
+    raise ValueError(f"Moteur d'inférence des émotions inconnu: {settings.emotion_backend}")
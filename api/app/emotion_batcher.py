@@ -0,0 +1,118 @@
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor
+from app.config.sentry import capture_exception
+from app.metrics import EMOTION_MICROBATCH_SIZE
+from app.sentiment_model import SentimentModel
+
+
+class EmotionBatcher:
+    """
+    Regroupe les appels concurrents à SentimentModel en micro-lots :
+    les textes en attente sont collectés pendant au plus max_wait_ms
+    ou jusqu'à max_batch_size éléments, puis passent dans une seule
+    inférence paddée dont les résultats sont redistribués aux appelants.
+    """
+
+    def __init__(self, sentiment_model: SentimentModel, max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, executor: Executor | None = None):
+        self.sentiment_model = sentiment_model
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+        # Statistiques
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes: Counter = Counter()
+
+    async def start(self):
+        """Démarre la boucle de regroupement sur la boucle d'événements courante"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la boucle de regroupement (les appels en attente sont annulés)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+
+    async def analyze(self, text: str) -> tuple[str, dict[str, float]]:
+        """Même contrat que SentimentModel.analyze_emotions, mais regroupé"""
+        if self._worker is None:
+            raise RuntimeError("EmotionBatcher n'est pas démarré")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Attend un premier texte puis complète le lot jusqu'à la limite ou l'échéance"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Les appelants partis (timeout, déconnexion) ne coûtent pas d'inférence
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            EMOTION_MICROBATCH_SIZE.observe(len(batch))
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.sentiment_model.analyze_emotions_batch,
+                    texts, self.max_batch_size)
+            except Exception as e:
+                capture_exception(e, context={"batch_size": len(batch)})
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        """Profondeur de file et distribution des tailles de lots"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+        }
@@ -0,0 +1,108 @@
+import threading
+import time
+import numpy as np
+from app.config.sentry import capture_exception
+from app.metrics import (EMOTION_CASCADE_ESCALATIONS, EMOTION_CASCADE_ITEMS,
+                         EMOTION_LSTM_DURATION)
+from app.model_fingerprint import model_fingerprint
+from app.sentiment_model import SentimentModel
+
+# Ordre des sorties du modèle LSTM (emotions/lstm/lstm.ipynb)
+LSTM_LABELS = ["anger", "fear", "joy", "sadness", "surprise", "neutral"]
+
+
+class LstmEmotionModel:
+    """
+    Classifieur LSTM entraîné dans emotions/lstm : entrée = texte nettoyé par
+    spaCy (même nettoyage que SpamPreprocessor.clean_text), tokenizer Keras
+    sauvegardé en JSON, séquences de max_len tokens. Les probabilités sont
+    réordonnées selon les émotions de SentimentModel.
+    """
+
+    def __init__(self, emotions: list[str], model_path: str = "models/emotions_lstm.keras",
+                 tokenizer_path: str = "models/emotions_lstm_tokenizer.json", max_len: int = 50):
+        self.model_path = model_path
+        self.tokenizer_path = tokenizer_path
+        self.max_len = max_len
+        self.model = None
+        self.tokenizer = None
+        self.version: str | None = None
+        # Colonne LSTM correspondant à chaque émotion de SentimentModel
+        self._columns = [LSTM_LABELS.index(emotion) for emotion in emotions]
+
+    def load(self):
+        import tensorflow as tf
+        from tensorflow.keras.preprocessing.text import tokenizer_from_json
+        self.model = tf.keras.models.load_model(self.model_path, compile=False)
+        with open(self.tokenizer_path, encoding="utf-8") as f:
+            self.tokenizer = tokenizer_from_json(f.read())
+        self.version = model_fingerprint(self.model_path)
+
+    def encode(self, cleaned_texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Séquences paddées (comme à l'entraînement) et nombre de tokens connus"""
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+        sequences = self.tokenizer.texts_to_sequences(cleaned_texts)
+        lengths = np.array([len(sequence) for sequence in sequences])
+        return pad_sequences(sequences, maxlen=self.max_len), lengths
+
+    def predict_probs(self, cleaned_texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        inputs, lengths = self.encode(cleaned_texts)
+        probs = self.model(inputs, training=False).numpy()
+        return probs[:, self._columns], lengths
+
+
+class EmotionCascade:
+    """
+    Moteur d'émotions en cascade : le LSTM répond seul quand sa probabilité
+    maximale atteint le seuil, les autres textes (et ceux sans aucun token
+    connu du LSTM) sont escaladés vers RoBERTa par l'appelant.
+    """
+
+    def __init__(self, fast_model: LstmEmotionModel, sentiment_model: SentimentModel,
+                 threshold: float = 0.8):
+        self.fast_model = fast_model
+        self.sentiment_model = sentiment_model
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        # Statistiques
+        self.items = 0
+        self.escalated = 0
+
+    @property
+    def version(self) -> str:
+        return f"lstm-{self.fast_model.version}@{self.threshold}"
+
+    def triage(self, cleaned_texts: list[str]) -> list[tuple[str, dict[str, float]] | None]:
+        """
+        Résultat du LSTM pour les textes tranchés, None pour ceux à escalader
+        """
+        start = time.perf_counter()
+        try:
+            probs, lengths = self.fast_model.predict_probs(cleaned_texts)
+        except Exception as e:
+            # Le LSTM n'est qu'un raccourci : en cas d'erreur tout part vers RoBERTa
+            capture_exception(e, context={"batch_size": len(cleaned_texts)})
+            probs = np.zeros((len(cleaned_texts), len(self.sentiment_model.emotions)))
+            lengths = np.zeros(len(cleaned_texts), dtype=int)
+        EMOTION_LSTM_DURATION.observe(time.perf_counter() - start)
+
+        confident = (probs.max(axis=1) >= self.threshold) & (lengths > 0)
+        results = [self.sentiment_model._to_result(row) if keep else None
+                   for row, keep in zip(probs, confident)]
+
+        escalated = len(cleaned_texts) - int(confident.sum())
+        with self._lock:
+            self.items += len(cleaned_texts)
+            self.escalated += escalated
+        EMOTION_CASCADE_ITEMS.inc(len(cleaned_texts))
+        EMOTION_CASCADE_ESCALATIONS.inc(escalated)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "items": self.items,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.items if self.items else 0.0,
+        }
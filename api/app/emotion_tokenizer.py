@@ -0,0 +1,63 @@
+from typing import Iterator
+import numpy as np
+
+DEFAULT_BUCKETS = (32, 64, 128, 256, 512)
+
+
+class BucketedTokenizer:
+    """
+    Tokenisation par lots sur le tokenizer rapide (Rust) avec padding par
+    paliers : les textes sont triés par nombre de tokens, regroupés par
+    palier de longueur (32/64/.../512) et paddés au palier, de sorte que le
+    modèle ne voit qu'un petit ensemble de formes et que le calcul suive le
+    nombre réel de tokens plutôt que le texte le plus long du lot.
+    """
+
+    def __init__(self, tokenizer, buckets: tuple[int, ...] | list[int] = DEFAULT_BUCKETS):
+        self.tokenizer = tokenizer
+        self.buckets = tuple(sorted(buckets))
+        self.max_length = self.buckets[-1]
+        self.pad_id = tokenizer.pad_token_id
+
+    def bucket_for(self, length: int) -> int:
+        for bucket in self.buckets:
+            if length <= bucket:
+                return bucket
+        return self.max_length
+
+    def encode(self, texts: list[str]) -> list[list[int]]:
+        """Identifiants de tokens sans padding (un seul appel au tokenizer)"""
+        return self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            padding=False,
+            return_attention_mask=False
+        )["input_ids"]
+
+    def batches(self, texts: list[str], batch_size: int
+                ) -> Iterator[tuple[list[int], np.ndarray, np.ndarray]]:
+        """
+        Lots (indices d'origine, input_ids, attention_mask) : un lot ne
+        mélange jamais deux paliers et contient au plus batch_size textes
+        """
+        encoded = self.encode(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+
+        start = 0
+        while start < len(order):
+            bucket = self.bucket_for(len(encoded[order[start]]))
+            end = start + 1
+            while (end < len(order) and end - start < batch_size
+                   and self.bucket_for(len(encoded[order[end]])) == bucket):
+                end += 1
+
+            indexes = order[start:end]
+            input_ids = np.full((len(indexes), bucket), self.pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(indexes), bucket), dtype=np.int64)
+            for row, index in enumerate(indexes):
+                ids = encoded[index]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+            yield indexes, input_ids, attention_mask
+            start = end
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException
+from app.spam_duplicates import minhash
+
+# Préprocesseurs utilisés par les étapes CPU : chargés dans chaque worker
+# en mode process, partagés avec le ServicesContainer en mode thread
+_sentiment_preprocessor = None
+_spam_preprocessor = None
+
+
+def _init_cpu_worker():
+    """Initialiseur des workers du pool de processus : charge les préprocesseurs une fois"""
+    global _sentiment_preprocessor, _spam_preprocessor
+    from app.sentiment_preprocess import SentimentPreprocessor
+    from app.spam_preprocess import SpamPreprocessor
+    _sentiment_preprocessor = SentimentPreprocessor()
+    _spam_preprocessor = SpamPreprocessor()
+
+
+def clean_for_bert(texts: list[str]) -> list[str]:
+    """Étape CPU : nettoyage des textes pour BERT"""
+    try:
+        return _sentiment_preprocessor.clean_texts_for_bert(texts)
+    except HTTPException as e:
+        # HTTPException ne se sérialise pas entre processus
+        raise RuntimeError(e.detail) from None
+
+
+def prepare_spam(texts: list[str]) -> tuple[dict, list[str], dict[str, float]]:
+    """
+    Étape CPU : features additionnelles + texte nettoyé par spaCy, avec le
+    temps passé dans chaque composant spaCy (cumulé côté processus principal)
+    """
+    try:
+        timings: dict[str, float] = {}
+        features = _spam_preprocessor.get_other_features_batch(texts)
+        messages = _spam_preprocessor.clean_texts(texts, timings=timings)
+        return features, messages, timings
+    except HTTPException as e:
+        raise RuntimeError(e.detail) from None
+
+
+def spam_signatures(texts: list[str], min_tokens: int) -> list:
+    """Étape CPU : signatures MinHash des textes après les étapes regex du nettoyage spam"""
+    return [minhash(_spam_preprocessor.pre_clean(text), min_tokens) for text in texts]
+
+
+class InferenceExecutors:
+    """
+    Pools d'exécution des étapes du pipeline, pour ne jamais bloquer la boucle
+    d'événements :
+    - io : pool de threads pour les étapes réseau (détection de langue + traduction)
+    - cpu : pool de processus (ou de threads) pour le nettoyage BeautifulSoup / spaCy
+    - inference : pool de threads pour TensorFlow et scikit-learn, qui libèrent
+      le GIL et dont les modèles ne sont chargés qu'une fois dans le processus principal
+    """
+
+    def __init__(self, io_workers: int = 16, cpu_workers: int | None = None,
+                 cpu_mode: str = "process", inference_workers: int = 2,
+                 sentiment_preprocessor=None, spam_preprocessor=None):
+        if cpu_mode not in ("process", "thread"):
+            raise ValueError(f"Mode d'exécution CPU inconnu: {cpu_mode}")
+        cpu_workers = cpu_workers or os.cpu_count() or 1
+
+        self.cpu_mode = cpu_mode
+        self.cpu_workers = cpu_workers
+        self.io_pool = ThreadPoolExecutor(
+            max_workers=io_workers, thread_name_prefix="io")
+        self.inference_pool = ThreadPoolExecutor(
+            max_workers=inference_workers, thread_name_prefix="inference")
+
+        if cpu_mode == "process":
+            # spawn : TensorFlow n'est pas compatible avec fork
+            self.cpu_pool: Executor = ProcessPoolExecutor(
+                max_workers=cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_cpu_worker
+            )
+        else:
+            global _sentiment_preprocessor, _spam_preprocessor
+            _sentiment_preprocessor = sentiment_preprocessor
+            _spam_preprocessor = spam_preprocessor
+            self.cpu_pool = ThreadPoolExecutor(
+                max_workers=cpu_workers, thread_name_prefix="cpu")
+
+    @staticmethod
+    async def _run(pool: Executor, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    async def run_io(self, fn, *args, **kwargs):
+        """Exécute une étape réseau dans le pool de threads I/O"""
+        return await self._run(self.io_pool, fn, *args, **kwargs)
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """Exécute une étape CPU (fonction de module picklable) dans le pool CPU"""
+        return await self._run(self.cpu_pool, fn, *args, **kwargs)
+
+    async def run_inference(self, fn, *args, **kwargs):
+        """Exécute une inférence de modèle dans le pool dédié"""
+        return await self._run(self.inference_pool, fn, *args, **kwargs)
+
+    def shutdown(self):
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+        self.inference_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,92 @@
+import json
+import os
+from collections import deque
+
+DEFAULT_KEYWORDS_PATH = os.path.join(
+    os.path.dirname(__file__), "resources", "spam_keywords.v1.json")
+
+
+class KeywordMatcher:
+    """
+    Automate d'Aho-Corasick compilé une seule fois pour compter, en un seul
+    passage sur le texte, les mots-clés de plusieurs dictionnaires.
+
+    Reproduit exactement `sum(1 for word in mots if word in text.lower())` :
+    chaque entrée du dictionnaire compte une fois si elle apparaît au moins
+    une fois (les doublons de la liste comptent autant de fois qu'ils sont listés).
+    """
+
+    def __init__(self, dictionaries: dict[str, list[str]], version=None):
+        self.version = version
+        self.names = list(dictionaries)
+
+        # Poids de chaque motif distinct par dictionnaire (doublons compris)
+        patterns: dict[str, list[int]] = {}
+        for position, name in enumerate(self.names):
+            for word in dictionaries[name]:
+                weights = patterns.setdefault(word, [0] * len(self.names))
+                weights[position] += 1
+        self._weights = list(patterns.values())
+
+        # Trie
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[set[int]] = [set()]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    outputs.append(set())
+                node = next_node
+            outputs[node].add(pattern_id)
+
+        # Liens d'échec (parcours en largeur), fusion des sorties puis
+        # transitions complètes : le parcours du texte n'a plus à remonter
+        # les liens d'échec caractère par caractère
+        fail = [0] * len(goto)
+        self._delta: list[dict[str, int]] = [goto[0]] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            self._delta[node] = {**self._delta[fail[node]], **goto[node]}
+            for char, child in goto[node].items():
+                queue.append(child)
+                if node:
+                    fail[child] = self._delta[fail[node]].get(char, 0)
+                outputs[child] |= outputs[fail[child]]
+        self._outputs = [tuple(output) for output in outputs]
+
+    @classmethod
+    def from_file(cls, path: str | None = None) -> "KeywordMatcher":
+        """
+        Charge les dictionnaires depuis un fichier JSON versionné :
+        {"version": 1, "<dictionnaire>": {"<catégorie>": ["mot", ...]} | ["mot", ...]}
+        """
+        with open(path or DEFAULT_KEYWORDS_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        version = data.pop("version", None)
+        dictionaries = {
+            name: [word for words in entries.values() for word in words]
+            if isinstance(entries, dict) else list(entries)
+            for name, entries in data.items()
+        }
+        return cls(dictionaries, version=version)
+
+    def count(self, text: str) -> dict[str, int]:
+        """Nombre d'entrées de chaque dictionnaire présentes dans le texte (en minuscules)"""
+        delta, outputs = self._delta, self._outputs
+        found: set[int] = set()
+        node = 0
+        for char in text.lower():
+            node = delta[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+
+        counts = [0] * len(self.names)
+        for pattern_id in found:
+            for position, weight in enumerate(self._weights[pattern_id]):
+                counts[position] += weight
+        return dict(zip(self.names, counts))
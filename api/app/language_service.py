@@ -1,40 +1,153 @@
-from deep_translator import GoogleTranslator
-from langdetect import detect
+import time
+from typing import NamedTuple
 from fastapi import HTTPException
-from app.config.sentry import capture_exception, capture_message
+from app.config.sentry import capture_exception, capture_message, stage_event
+from app.language_detection import LanguageDetector
+from app.metrics import LANGUAGE_DETECTION_DURATION, TRANSLATION_DURATION
+from app.translation_cache import TranslationCache
+from app.translators import (GoogleTranslatorBackend, ResilientTranslator,
+                             TranslationError)
+
+
+class LanguageResult(NamedTuple):
+    """Langue détectée d'un texte et texte transmis aux modèles"""
+    language: str
+    confidence: float
+    # Traduction anglaise, ou texte d'origine s'il n'a pas été traduit
+    text: str
+    translated: bool
 
 
 class LanguageService:
-    @staticmethod
-    def detect_language(text: str) -> str:
+    def __init__(self, translation_cache: TranslationCache | None = None,
+                 translator: ResilientTranslator | None = None,
+                 degraded_fallback: bool = True,
+                 detector: LanguageDetector | None = None,
+                 min_confidence: float = 0.0):
+        self.detector = detector or LanguageDetector()
+        # En dessous de ce seuil de confiance, le texte n'est pas traduit
+        # (0 : tout texte détecté non anglais est traduit)
+        self.min_confidence = min_confidence
+        self.translation_cache = translation_cache
+        self.translator = translator or ResilientTranslator(
+            GoogleTranslatorBackend())
+        # En mode dégradé, un texte non traduit est analysé tel quel
+        self.degraded_fallback = degraded_fallback
+        self.degraded = 0
+
+    def detect_language(self, text: str) -> str:
+        return self.detect_language_with_confidence(text)[0]
+
+    def detect_language_with_confidence(self, text: str) -> tuple[str, float]:
         try:
-            detected_lang = detect(text)
-            capture_message("Language detected", level="info",
-                            context={"lang": detected_lang})
-            return detected_lang
-        except:
+            return self.detector.detect(text)
+        except Exception:
             capture_message(
                 "Language detection failed, defaulting to English", level="warning")
-            return 'en'
+            return 'en', 0.0
 
-    @staticmethod
-    def translate_to_english(text: str, source_lang: str) -> str:
+    def translate_to_english(self, text: str, source_lang: str) -> str | None:
+        """Traduction anglaise ; None en mode dégradé si la traduction a échoué"""
         if source_lang == 'en':
             return text
 
+        if self.translation_cache is not None:
+            cached = self.translation_cache.get(source_lang, text)
+            if cached is not None:
+                return cached
+
         try:
-            translator = GoogleTranslator(source=source_lang, target='en')
-            translated_text = translator.translate(text)
-            capture_message("Translations successful"+" : " +
-                            translated_text, level="info")
+            translated_text = self.translator.translate(text, source_lang)
+            stage_event("Translation done", context={"source_lang": source_lang})
+            if self.translation_cache is not None:
+                self.translation_cache.set(source_lang, text, translated_text)
             return translated_text
-        except Exception as e:
+        except TranslationError as e:
             capture_exception(e, context={"source_lang": source_lang})
+            if self.degraded_fallback:
+                self.degraded += 1
+                return None
             raise HTTPException(
                 status_code=500, detail="Erreur lors de la traduction")
 
-    def process_text(self, text: str) -> tuple[str, str]:
-        detected_lang = self.detect_language(text)
-        translated_text = self.translate_to_english(
-            text, detected_lang) if detected_lang != 'en' else text
-        return detected_lang, translated_text
+    def translate_batch_to_english(self, texts: list[str], source_lang: str) -> list[str | None]:
+        """Version par lots de translate_to_english (None pour les textes non traduits)"""
+        if source_lang == 'en':
+            return list(texts)
+
+        # Seuls les textes absents du cache partent au traducteur
+        translated_texts = [
+            self.translation_cache.get(source_lang, text)
+            if self.translation_cache is not None else None
+            for text in texts
+        ]
+        missing = [i for i, translation in enumerate(translated_texts)
+                   if translation is None]
+        if not missing:
+            return translated_texts
+
+        translations = self.translator.translate_batch(
+            [texts[i] for i in missing], source_lang)
+        stage_event("Batch translation done",
+                    context={"source_lang": source_lang, "count": len(missing)})
+        for i, translation in zip(missing, translations):
+            if translation is None:
+                if not self.degraded_fallback:
+                    raise HTTPException(
+                        status_code=500, detail="Erreur lors de la traduction")
+                self.degraded += 1
+            elif self.translation_cache is not None:
+                self.translation_cache.set(source_lang, texts[i], translation)
+            translated_texts[i] = translation
+        return translated_texts
+
+    def _needs_translation(self, lang: str, confidence: float) -> bool:
+        return lang != 'en' and confidence >= self.min_confidence
+
+    def process_text(self, text: str) -> LanguageResult:
+        start = time.perf_counter()
+        detected_lang, confidence = self.detect_language_with_confidence(text)
+        LANGUAGE_DETECTION_DURATION.observe(time.perf_counter() - start)
+
+        if not self._needs_translation(detected_lang, confidence):
+            return LanguageResult(detected_lang, confidence, text, False)
+        start = time.perf_counter()
+        translated_text = self.translate_to_english(text, detected_lang)
+        TRANSLATION_DURATION.observe(time.perf_counter() - start)
+        if translated_text is None:
+            return LanguageResult(detected_lang, confidence, text, False)
+        return LanguageResult(detected_lang, confidence, translated_text, True)
+
+    def process_texts(self, texts: list[str]) -> list[LanguageResult]:
+        """
+        Version par lots de process_text : les textes sont traduits par langue source
+        Returns:
+            list: LanguageResult dans l'ordre des entrées
+        """
+        start = time.perf_counter()
+        detections = [self.detect_language_with_confidence(text) for text in texts]
+        LANGUAGE_DETECTION_DURATION.observe(time.perf_counter() - start)
+        translated_texts: list[str | None] = [None] * len(texts)
+
+        # Regrouper les textes à traduire par langue source
+        by_lang: dict[str, list[int]] = {}
+        for index, (lang, confidence) in enumerate(detections):
+            if self._needs_translation(lang, confidence):
+                by_lang.setdefault(lang, []).append(index)
+
+        for lang, indexes in by_lang.items():
+            start = time.perf_counter()
+            translations = self.translate_batch_to_english(
+                [texts[i] for i in indexes], lang)
+            TRANSLATION_DURATION.observe(time.perf_counter() - start)
+            for i, translation in zip(indexes, translations):
+                translated_texts[i] = translation
+
+        return [
+            LanguageResult(lang, confidence, text, False) if translation is None
+            else LanguageResult(lang, confidence, translation, True)
+            for (lang, confidence), text, translation in zip(detections, texts, translated_texts)
+        ]
+
+    def stats(self) -> dict:
+        return {**self.translator.stats(), "degraded": self.degraded}
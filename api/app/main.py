@@ -1,51 +1,52 @@
-from azure.storage.blob import BlobServiceClient
-from fastapi import FastAPI, HTTPException, Depends
+from app.startup import PROCESS_START, STARTUP_PROFILE
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
-from app.language_service import LanguageService
-from app.sentiment_preprocess import SentimentPreprocessor
-from app.spam_preprocess import SpamPreprocessor
-from app.sentiment_model import SentimentModel
-from app.spam_model import SpamModel
+from typing import Dict, List, Optional
+from app.executors import prepare_spam
+from app.email_ingest import EmailTextExtractor, EmailTooLarge
+from app.ndjson_stream import NdjsonScoringStream, NdjsonStreamingResponse
+from app.services import EMOTION_TARGETS, SPAM_TARGETS, ServicesContainer
+from app.warmup import WARMUP_SENTENCE, Warmup
 from app.models.feedback import Message
 from app.models.schemas import FeedbackCreate
 from app.config.database import get_db, engine, Base
 from sqlalchemy.orm import Session, sessionmaker
-import pandas as pd
-from app.config.sentry import init_sentry, capture_exception, capture_message
+from app.config.sentry import (init_sentry, capture_exception, capture_message,
+                               exporter_stats)
 from app.config.azure import init_azure_storage
+from app.model_sync import LocalContainerClient, ModelSync
+from app.config.inference import get_inference_settings
+from app.metrics import (CONTENT_TYPE, PREDICT_BATCH_SIZE, REGISTRY, WARMUP_DURATION,
+                         MetricsMiddleware, record_startup, register_cache)
 from fastapi import FastAPI, HTTPException, Depends, status
+import asyncio
 import os
 import signal
+import time
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
 
+# Les modules lourds (TensorFlow, transformers, spaCy, SDK Azure, pandas) ne
+# sont importés qu'au chargement des modèles, en parallèle
+STARTUP_PROFILE.record("imports", PROCESS_START, time.perf_counter())
 
-init_sentry()
-
-
-class ServicesContainer:
-    language_service: LanguageService | None = None
-    sentiment_preprocessor: SentimentPreprocessor | None = None
-    spam_preprocessor: SpamPreprocessor | None = None
-    sentiment_model: SentimentModel | None = None
-    spam_model: SpamModel | None = None
 
-    def initialize(self):
-        self.language_service = LanguageService()
-        self.sentiment_preprocessor = SentimentPreprocessor()
-        self.spam_preprocessor = SpamPreprocessor()
-        self.sentiment_model = SentimentModel()
-        self.spam_model = SpamModel()
+init_sentry()
 
 
 class TextInput(BaseModel):
     text: str
 
 
+class BatchTextInput(BaseModel):
+    texts: List[str]
+
+
 class PredictionResponse(BaseModel):
     text: str
     detected_language: str
+    language_confidence: float
     translated_text: Optional[str]
     emotion: str
     emotion_scores: Dict[str, float]
@@ -53,24 +54,125 @@ class PredictionResponse(BaseModel):
     is_spam: bool
 
 
+class SpamPredictionResponse(BaseModel):
+    text: str
+    detected_language: str
+    language_confidence: float
+    translated_text: Optional[str]
+    spam_score: float
+    is_spam: bool
+
+
+class EmotionPredictionResponse(BaseModel):
+    text: str
+    detected_language: str
+    language_confidence: float
+    translated_text: Optional[str]
+    emotion: str
+    emotion_scores: Dict[str, float]
+
+
+class EmailPredictionResponse(PredictionResponse):
+    subject: Optional[str]
+    body_type: Optional[str]
+    quoted_removed: bool
+    signature_removed: bool
+    truncated: bool
+
+
+class BatchPredictionResponse(BaseModel):
+    results: List[PredictionResponse]
+
+
 app = FastAPI(
     title="Mailsmart API",
     description="API pour detecter emotions et spam",
     version="1.0.12"
 )
 
+app.add_middleware(MetricsMiddleware)
+
 services = ServicesContainer()
 
 
 @app.on_event("startup")
 async def startup_event():
-    # S'assure que les modèles sont téléchargés avant tout
-    models_ready = await download_models()
-    if not models_ready:
-        raise Exception("Échec du téléchargement des modèles")
+    # Le chargement se fait en tâche de fond : /health répond immédiatement,
+    # /ready et les prédictions attendent la fin du préchauffage
+    services.startup_task = asyncio.create_task(prepare_services())
+
 
-    # Initialisation des services seulement après le téléchargement des modèles
-    init_services()
+async def prepare_services():
+    try:
+        # S'assure que les modèles sont téléchargés avant tout
+        start = time.perf_counter()
+        models_ready = await download_models()
+        STARTUP_PROFILE.record("model_sync", start, time.perf_counter())
+        if not models_ready:
+            raise Exception("Échec du téléchargement des modèles")
+
+        # Initialisation des services seulement après le téléchargement des modèles
+        # (hors de la boucle d'événements, qui continue de servir /health)
+        await asyncio.get_running_loop().run_in_executor(None, init_services)
+        if services.emotion_batcher is not None:
+            await services.emotion_batcher.start()
+
+        settings = get_inference_settings()
+        if settings.warmup_enabled:
+            start = time.perf_counter()
+            if services.emotion_cascade is not None:
+                # Le LSTM peut trancher tous les textes de préchauffage :
+                # RoBERTa est chauffé directement
+                await services.executors.run_inference(
+                    services.sentiment_model.analyze_emotions_batch, [WARMUP_SENTENCE])
+            services.warmup_report = await Warmup(
+                run_prediction,
+                run_batch_prediction,
+                warm_cpu_workers=warm_cpu_workers,
+                text_lengths=settings.warmup_text_lengths,
+                rounds=settings.warmup_rounds
+            ).run()
+            STARTUP_PROFILE.record("warmup", start, time.perf_counter())
+            WARMUP_DURATION.set(services.warmup_report["duration_seconds"])
+
+        services.ready = True
+        time_to_ready = STARTUP_PROFILE.mark_ready()
+        record_startup(STARTUP_PROFILE.snapshot())
+        print(f"Service prêt en {time_to_ready:.2f}s")
+        capture_message("Service ready", context=STARTUP_PROFILE.snapshot())
+
+    except Exception as e:
+        services.startup_error = str(e)
+        capture_exception(e, context={"phase": "startup"})
+        # Arrêt du processus : l'orchestrateur redémarre le conteneur
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+async def warm_cpu_workers(text: str):
+    """Une tâche par worker CPU : chaque processus charge spaCy avant la première requête"""
+    await asyncio.gather(*(
+        services.executors.run_cpu(prepare_spam, [text])
+        for _ in range(services.executors.cpu_workers)
+    ))
+
+
+def require_ready():
+    """Dépendance des routes de prédiction : 503 tant que le service n'est pas prêt"""
+    if not services.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service en cours de démarrage",
+            headers={"Retry-After": "5"}
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if services.startup_task is not None and not services.startup_task.done():
+        services.startup_task.cancel()
+    if services.emotion_batcher is not None:
+        await services.emotion_batcher.stop()
+    services.close()
 
 
 def init_services():
@@ -79,52 +181,188 @@ def init_services():
     # Initialisation des services
     services.initialize()
 
+    # Taux de succès des caches exposés sur /metrics
+    if services.prediction_cache is not None:
+        register_cache("prediction", services.prediction_cache.stats,
+                       hit_keys=("hits", "shared"), miss_keys=("misses",))
+    if services.spam_duplicates is not None:
+        register_cache("spam_duplicates", services.spam_duplicates.stats,
+                       hit_keys=("hits",), miss_keys=("misses",))
+    translation_cache = services.language_service.translation_cache
+    if translation_cache is not None:
+        register_cache("translation", translation_cache.stats,
+                       hit_keys=("memory_hits", "disk_hits"), miss_keys=("misses",))
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(input_data: TextInput):
-    """Analyse un texte pour détecter les émotions et le spam"""
+
+async def run_prediction(text: str) -> PredictionResponse:
+    """Exécute le pipeline complet sur un texte (branches en parallèle)"""
+    row, = await services.run_pipeline([text], single=True)
+    return PredictionResponse(**row)
+
+
+async def run_batch_prediction(texts: List[str]) -> List[PredictionResponse]:
+    """Exécute le pipeline sur un lot de textes, un passage par étape"""
+    return [PredictionResponse(**row) for row in await services.run_pipeline(texts)]
+
+
+async def cached_prediction(text: str, scope: str, compute, response: Response):
+    """Résultat de compute() via le cache de prédictions s'il est activé"""
     try:
-        # 1. Détection de langue et traductions
-        detected_lang, translated_text = services.language_service.process_text(
-            input_data.text)
-        capture_message("Language processed", context={"lang": detected_lang})
-
-        # 2. Prétraitement pour les émotions (BERT)
-        text_for_emotion = services.sentiment_preprocessor.clean_text_for_bert(
-            translated_text)
-        capture_message("Text preprocessed for emotions")
-
-        # 3. Prétraitement pour le spam
-        df = pd.DataFrame(
-            services.spam_preprocessor.get_other_features(translated_text))
-        df['message'] = services.spam_preprocessor.clean_text(translated_text)
-        capture_message("Text preprocessed for spam")
-
-        # 4. Analyse des émotions
-        emotion, emotion_scores = services.sentiment_model.analyze_emotions(
-            text_for_emotion)
-        capture_message("Emotions analyzed", context={"emotion": emotion})
-
-        # 5. Analyse du spam
-
-        spam_score, is_spam = services.spam_model.analyze_spam(df)
-        capture_message("Spam analyzed", context={"is_spam": is_spam})
-
-        return PredictionResponse(
-            text=input_data.text,
-            detected_language=detected_lang,
-            translated_text=translated_text if detected_lang != 'en' else None,
-            emotion=emotion,
-            emotion_scores=emotion_scores,
-            spam_score=spam_score,
-            is_spam=is_spam
+        cache = services.prediction_cache
+        if cache is None:
+            return await compute()
+
+        result, cache_status = await cache.get_or_compute(
+            cache.key(text, scope), compute)
+        response.headers["X-Cache"] = cache_status
+        # Le texte renvoyé reste celui de la requête (la clé est normalisée)
+        return result.model_copy(update={"text": text})
+
+    except Exception as e:
+        capture_exception(e, context={"input_text": text[:200], "scope": scope})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict", response_model=PredictionResponse,
+          dependencies=[Depends(require_ready)])
+async def predict(input_data: TextInput, response: Response):
+    """Analyse un texte pour détecter les émotions et le spam"""
+    return await cached_prediction(
+        input_data.text, "full", lambda: run_prediction(input_data.text), response)
+
+
+@app.post("/predict/spam", response_model=SpamPredictionResponse,
+          dependencies=[Depends(require_ready)])
+async def predict_spam(input_data: TextInput, response: Response):
+    """Détection du spam seule (sans le modèle d'émotions)"""
+    async def compute():
+        row, = await services.run_pipeline([input_data.text], SPAM_TARGETS, single=True)
+        return SpamPredictionResponse(**row)
+    return await cached_prediction(input_data.text, "spam", compute, response)
+
+
+@app.post("/predict/emotion", response_model=EmotionPredictionResponse,
+          dependencies=[Depends(require_ready)])
+async def predict_emotion(input_data: TextInput, response: Response):
+    """Analyse des émotions seule (sans le modèle de spam)"""
+    async def compute():
+        row, = await services.run_pipeline([input_data.text], EMOTION_TARGETS, single=True)
+        return EmotionPredictionResponse(**row)
+    return await cached_prediction(input_data.text, "emotion", compute, response)
+
+
+async def cached_batch_prediction(texts: List[str], response: Response | None = None
+                                  ) -> List[PredictionResponse]:
+    """Pipeline par lots sur les seuls textes absents du cache de prédictions"""
+    cache = services.prediction_cache
+    if cache is None:
+        return await run_batch_prediction(texts)
+
+    keys = [cache.key(text, "full") for text in texts]
+    results = [cache.lookup(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = await run_batch_prediction([texts[i] for i in missing])
+        for i, result in zip(missing, computed):
+            cache.set(keys[i], result)
+            results[i] = result
+    if response is not None:
+        response.headers["X-Cache-Hits"] = str(len(texts) - len(missing))
+
+    return [result.model_copy(update={"text": text})
+            for text, result in zip(texts, results)]
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse,
+          dependencies=[Depends(require_ready)])
+async def predict_batch(input_data: BatchTextInput, response: Response):
+    """Analyse une liste de textes en un seul passage par étape du pipeline"""
+    settings = get_inference_settings()
+    texts = input_data.texts
+    if not texts:
+        return BatchPredictionResponse(results=[])
+    if len(texts) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Lot trop grand: {len(texts)} textes (max {settings.batch_max_items})"
         )
+    PREDICT_BATCH_SIZE.observe(len(texts))
+
+    try:
+        return BatchPredictionResponse(results=await cached_batch_prediction(texts, response))
 
+    except HTTPException:
+        raise
     except Exception as e:
-        capture_exception(e, context={"input_text": input_data.text[:200]})
+        capture_exception(e, context={"batch_size": len(texts)})
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict/stream", response_class=NdjsonStreamingResponse,
+          dependencies=[Depends(require_ready)])
+async def predict_stream(request: Request):
+    """
+    Analyse un flux NDJSON (une ligne {"text": ..., "id": ...} par message)
+    et renvoie un résultat NDJSON par ligne, dans l'ordre, au fil de l'eau
+    """
+    settings = get_inference_settings()
+
+    async def score(texts: List[str]) -> List[dict]:
+        return [result.model_dump() for result in await cached_batch_prediction(texts)]
+
+    return NdjsonStreamingResponse(NdjsonScoringStream(
+        request,
+        score,
+        batch_size=settings.stream_batch_size,
+        max_wait_ms=settings.stream_batch_max_wait_ms,
+        queue_size=settings.stream_queue_size,
+        max_in_flight_batches=settings.stream_max_in_flight_batches,
+        max_line_bytes=settings.stream_max_line_bytes
+    ))
+
+
+@app.post("/predict/email", response_model=EmailPredictionResponse,
+          dependencies=[Depends(require_ready)])
+async def predict_email(request: Request, response: Response):
+    """
+    Analyse un message brut (RFC 822 / MIME) : partie texte (ou HTML) sans
+    historique cité ni signature, bornée avant les étapes NLP
+    """
+    settings = get_inference_settings()
+    feed = EmailTextExtractor(
+        max_bytes=settings.email_max_bytes,
+        max_part_chars=settings.email_max_part_chars,
+        max_chars=settings.email_max_chars,
+        max_tokens=settings.email_max_tokens,
+        strip_quotes=settings.email_strip_quotes,
+        include_subject=settings.email_include_subject
+    ).parser()
+
+    try:
+        # Découpage MIME au fil de la réception ; décodage et HTML hors de la boucle
+        async for chunk in request.stream():
+            feed.feed(chunk)
+        email = await services.executors.run_io(feed.close)
+    except EmailTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except Exception as e:
+        capture_exception(e, context={"email_bytes": feed.size})
+        raise HTTPException(status_code=400, detail="Message illisible")
+    if not email.text:
+        raise HTTPException(status_code=422, detail="Aucun texte exploitable dans le message")
+
+    prediction = await cached_prediction(
+        email.text, "full", lambda: run_prediction(email.text), response)
+    return EmailPredictionResponse(
+        **prediction.model_dump(),
+        subject=email.subject,
+        body_type=email.body_type,
+        quoted_removed=email.quoted_removed,
+        signature_removed=email.signature_removed,
+        truncated=email.truncated
+    )
+
+
 @app.post("/feedback")
 async def create_or_update_feedback(feedback: FeedbackCreate, db: Session = Depends(get_db)):
     """
@@ -198,59 +436,83 @@ async def create_or_update_feedback(feedback: FeedbackCreate, db: Session = Depe
 
 @app.get("/health")
 async def health_check():
+    """Vivacité : le processus répond, qu'il soit prêt ou non"""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Disponibilité : modèles chargés et préchauffage terminé"""
+    if services.ready:
+        return {"status": "ready", "warmup": services.warmup_report}
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "failed" if services.startup_error else "starting",
+                 "error": services.startup_error}
+    )
+
+
+@app.get("/stats")
+async def stats():
+    """Statistiques internes du pipeline d'inférence"""
+    return {
+        "emotion_batcher": services.emotion_batcher.stats()
+        if services.emotion_batcher is not None else None,
+        "spacy_components": services.spacy_timings.snapshot()
+        if services.spacy_timings is not None else None,
+        "translator": services.language_service.stats()
+        if services.language_service is not None else None,
+        "translation_cache": services.language_service.translation_cache.stats()
+        if services.language_service is not None
+        and services.language_service.translation_cache is not None else None,
+        "prediction_cache": services.prediction_cache.stats()
+        if services.prediction_cache is not None else None,
+        "emotion_cascade": services.emotion_cascade.stats()
+        if services.emotion_cascade is not None else None,
+        "spam_duplicates": services.spam_duplicates.report()
+        if services.spam_duplicates is not None else None,
+        "spam_scorer": services.spam_model.scorer_status
+        if services.spam_model is not None else None,
+        "sentry_exporter": exporter_stats(),
+        "startup": STARTUP_PROFILE.snapshot()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Métriques au format texte Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 async def download_models():
+    """
+    Synchronise models/ avec le container : seuls les fichiers nouveaux ou
+    modifiés depuis le dernier démarrage sont téléchargés
+    """
     try:
-        # Supprimer le répertoire models s'il existe
-        import shutil
-        if os.path.exists('models'):
-            print("Suppression du répertoire models existant...")
-            shutil.rmtree('models')
-            print("✓ Répertoire models supprimé")
-
-        _, container_client = init_azure_storage()
-        downloaded_files = []
-
-        # Lister tous les blobs dans le container
-        blobs = container_client.list_blobs()
-
-        for blob in blobs:
-            try:
-                # Vérifier si c'est un "dossier" (se termine par /)
-                if blob.name.endswith('/') or '.' not in blob.name.split('/')[-1]:
-                    # C'est un dossier, on le crée simplement
-                    os.makedirs(blob.name, exist_ok=True)
-                    print(f"✓ Dossier créé: {blob.name}")
-                    continue
-
-                # C'est un fichier, on le télécharge
-                local_path = blob.name
-                print(f"Téléchargement de {blob.name} vers {local_path}")
-
-                # Créer le dossier parent si nécessaire
-                os.makedirs(os.path.dirname(local_path), exist_ok=True)
-
-                # Télécharger le fichier par morceaux
-                blob_client = container_client.get_blob_client(blob.name)
-                with open(local_path, "wb") as f:
-                    stream = blob_client.download_blob()
-                    CHUNK_SIZE = 1024 * 1024  # 1MB par chunk
-                    for chunk in stream.chunks():
-                        f.write(chunk)
-
-                downloaded_files.append(local_path)
-                print(f"✓ Fichier téléchargé: {local_path}")
-
-            except Exception as e:
-                error_msg = f"Erreur lors du téléchargement de {blob.name}: {str(e)}"
-                print(error_msg)
-                capture_message(error_msg, level="error")
-                continue
-
-        if downloaded_files:
-            success_msg = f"\nTéléchargement terminé. {len(downloaded_files)} fichiers téléchargés."
+        settings = get_inference_settings()
+        if settings.model_source_dir:
+            container_client = LocalContainerClient(settings.model_source_dir)
+            print(f"Modèles synchronisés depuis {settings.model_source_dir}")
+        else:
+            _, container_client = init_azure_storage()
+
+        model_sync = ModelSync(
+            container_client,
+            manifest_path=settings.model_sync_manifest_path,
+            max_concurrency=settings.model_sync_max_concurrency
+        )
+        result = await asyncio.get_running_loop().run_in_executor(None, model_sync.sync)
+
+        for name, error in result.failed.items():
+            error_msg = f"Erreur lors du téléchargement de {name}: {error}"
+            print(error_msg)
+            capture_message(error_msg, level="error")
+
+        if result.available:
+            success_msg = (f"Synchronisation des modèles terminée en {result.duration:.1f}s : "
+                           f"{len(result.downloaded)} téléchargés, {len(result.skipped)} inchangés, "
+                           f"{len(result.removed)} supprimés, {len(result.failed)} en échec")
             print(success_msg)
             capture_message(success_msg)
             return True
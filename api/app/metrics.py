@@ -0,0 +1,334 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Bornes par défaut des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ValueChild:
+    """Valeur d'une série (compteur ou jauge), éventuellement lue par callback"""
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """La valeur est lue au moment de l'export (statistiques déjà tenues ailleurs)"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+
+class _HistogramChild:
+    """
+    Histogramme à bornes fixes : les compteurs sont préalloués, un
+    enregistrement se résume à une recherche dichotomique et deux additions
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # dernière case : +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 registry: "MetricsRegistry | None" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        Série correspondant aux valeurs d'étiquettes. À appeler une fois et à
+        conserver sur les chemins chauds : l'enregistrement n'alloue alors rien.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name}: {len(self.labelnames)} étiquette(s) attendue(s), {len(values)} reçue(s)")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}",
+                 f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _ValueMetric(_Metric):
+    def _new_child(self):
+        return _ValueChild()
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(zip(self.labelnames, values))} "
+                f"{_format_value(child.get())}"
+                for values, child in list(self._children.items())]
+
+
+class Counter(_ValueMetric):
+    """Compteur monotone"""
+    type = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_ValueMetric):
+    """Valeur instantanée (requêtes en cours, profondeur de file...)"""
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    """Distribution cumulée par bornes (latences, tailles de lots)"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 registry: "MetricsRegistry | None" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            labels = list(zip(self.labelnames, values))
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(labels + [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Export au format texte Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Requêtes HTTP
+HTTP_REQUESTS = Counter(
+    "mailsmart_http_requests_total", "Requêtes HTTP traitées",
+    ("method", "path", "status"))
+HTTP_REQUEST_DURATION = Histogram(
+    "mailsmart_http_request_duration_seconds", "Durée des requêtes HTTP",
+    ("method", "path"))
+HTTP_IN_FLIGHT = Gauge(
+    "mailsmart_http_requests_in_flight", "Requêtes HTTP en cours de traitement")
+
+# Étapes du pipeline
+STAGE_DURATION = Histogram(
+    "mailsmart_stage_duration_seconds",
+    "Durée des étapes du pipeline vue par la requête (attente des pools comprise)",
+    ("stage",))
+LANGUAGE_DETECTION_DURATION = STAGE_DURATION.labels("language_detection")
+TRANSLATION_DURATION = STAGE_DURATION.labels("translation")
+BERT_CLEANING_DURATION = STAGE_DURATION.labels("bert_cleaning")
+SPAM_CLEANING_DURATION = STAGE_DURATION.labels("spam_cleaning")
+EMOTION_INFERENCE_DURATION = STAGE_DURATION.labels("emotion_inference")
+SPAM_INFERENCE_DURATION = STAGE_DURATION.labels("spam_inference")
+# Cascade des émotions : latence par niveau (LSTM, puis RoBERTa si escalade)
+EMOTION_LSTM_DURATION = STAGE_DURATION.labels("emotion_lstm")
+EMOTION_ROBERTA_DURATION = STAGE_DURATION.labels("emotion_roberta")
+EMOTION_CASCADE_ITEMS = Counter(
+    "mailsmart_emotion_cascade_items_total", "Textes passés par la cascade des émotions")
+EMOTION_CASCADE_ESCALATIONS = Counter(
+    "mailsmart_emotion_cascade_escalations_total",
+    "Textes escaladés du LSTM vers RoBERTa (confiance sous le seuil)")
+
+# Tailles de lots
+BATCH_SIZE = Histogram(
+    "mailsmart_batch_size", "Nombre de textes par lot", ("kind",),
+    buckets=BATCH_SIZE_BUCKETS)
+PREDICT_BATCH_SIZE = BATCH_SIZE.labels("predict_batch")
+EMOTION_MICROBATCH_SIZE = BATCH_SIZE.labels("emotion_microbatch")
+
+# Caches : valeurs lues à l'export dans les statistiques de chaque cache
+CACHE_HITS = Counter(
+    "mailsmart_cache_hits_total", "Accès aux caches servis sans calcul", ("cache",))
+CACHE_LOOKUPS = Counter(
+    "mailsmart_cache_lookups_total", "Accès aux caches", ("cache",))
+CACHE_HIT_RATIO = Gauge(
+    "mailsmart_cache_hit_ratio", "Taux de succès des caches", ("cache",))
+
+
+# Démarrage
+STARTUP_TIME_TO_READY = Gauge(
+    "mailsmart_startup_time_to_ready_seconds",
+    "Temps entre l'import de l'application et l'état prêt")
+STARTUP_PHASE_DURATION = Gauge(
+    "mailsmart_startup_phase_duration_seconds", "Durée des phases du démarrage",
+    ("phase",))
+
+WARMUP_DURATION = Gauge(
+    "mailsmart_warmup_duration_seconds", "Durée de la passe de préchauffage")
+FIRST_PREDICTION_DURATION = Gauge(
+    "mailsmart_first_prediction_duration_seconds",
+    "Durée de la première requête de prédiction servie après le démarrage")
+
+
+def record_startup(profile: dict):
+    """Expose le profil de démarrage (StartupProfile.snapshot())"""
+    STARTUP_TIME_TO_READY.set(profile["time_to_ready_seconds"])
+    for name, phase in profile["phases"].items():
+        STARTUP_PHASE_DURATION.labels(name).set(phase["duration_seconds"])
+
+
+def register_cache(name: str, stats: Callable[[], dict], hit_keys: tuple[str, ...],
+                   miss_keys: tuple[str, ...]):
+    """Expose les compteurs d'un cache à partir de sa méthode stats()"""
+    def hits() -> float:
+        snapshot = stats()
+        return sum(snapshot[key] for key in hit_keys)
+
+    def lookups() -> float:
+        snapshot = stats()
+        return sum(snapshot[key] for key in hit_keys + miss_keys)
+
+    CACHE_HITS.labels(name).set_function(hits)
+    CACHE_LOOKUPS.labels(name).set_function(lookups)
+    CACHE_HIT_RATIO.labels(name).set_function(lambda: stats()["hit_rate"])
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : compte les requêtes par route (gabarit de chemin, pour
+    borner la cardinalité), mesure leur durée et le nombre de requêtes en cours,
+    ainsi que la durée de la première prédiction réussie
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._first_prediction_recorded = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # Le routeur FastAPI renseigne la route trouvée dans le scope
+            route = scope.get("route")
+            path = getattr(route, "path", "other")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, path).observe(duration)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+            if (not self._first_prediction_recorded and status_code == 200
+                    and path.startswith("/predict")):
+                self._first_prediction_recorded = True
+                FIRST_PREDICTION_DURATION.set(duration)
@@ -0,0 +1,22 @@
+import hashlib
+import os
+
+
+def model_fingerprint(path: str) -> str:
+    """
+    Empreinte d'un modèle sur disque : contenu pour un fichier, chemins,
+    tailles et dates de modification pour un répertoire (saved model TF)
+    """
+    digest = hashlib.sha256()
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    else:
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                stat = os.stat(full_path)
+                digest.update(
+                    f"{os.path.relpath(full_path, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+CHUNK_SIZE = 1024 * 1024  # 1MB par chunk
+
+
+def blob_fingerprint(blob) -> str:
+    """MD5 du contenu si Azure le fournit, sinon ETag"""
+    content_settings = getattr(blob, "content_settings", None)
+    content_md5 = getattr(content_settings, "content_md5", None)
+    if content_md5:
+        return "md5:" + bytes(content_md5).hex()
+    return "etag:" + str(blob.etag).strip('"')
+
+
+def is_directory_blob(name: str) -> bool:
+    """Même règle que l'ancien téléchargement : pas d'extension = dossier"""
+    return name.endswith('/') or '.' not in name.split('/')[-1]
+
+
+@dataclass
+class SyncResult:
+    downloaded: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def available(self) -> int:
+        return len(self.downloaded) + len(self.skipped)
+
+
+class ModelSync:
+    """
+    Synchronisation incrémentale des modèles depuis un container de blobs :
+    - un manifeste local mémorise l'empreinte (MD5/ETag) de chaque fichier
+    - seuls les blobs nouveaux ou modifiés sont téléchargés, en parallèle
+    - chaque téléchargement passe par un fichier temporaire renommé à la fin
+      (un fichier interrompu ne remplace jamais la version précédente)
+    - les fichiers du manifeste disparus du container sont supprimés
+    """
+
+    def __init__(self, container_client, root: str = ".",
+                 manifest_path: str = "models/.manifest.json", max_concurrency: int = 4):
+        self.container_client = container_client
+        self.root = os.path.abspath(root)
+        self.manifest_path = os.path.join(self.root, manifest_path)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def _local_path(self, blob_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, blob_name))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Nom de blob hors du répertoire local: {blob_name}")
+        return path
+
+    def load_manifest(self) -> dict[str, dict]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest: dict[str, dict]):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.manifest_path), prefix=".manifest-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _is_current(self, blob, entry: dict | None) -> bool:
+        if entry is None or entry.get("fingerprint") != blob_fingerprint(blob):
+            return False
+        try:
+            return os.path.getsize(self._local_path(blob.name)) == entry.get("size")
+        except OSError:
+            return False
+
+    def _download(self, blob) -> dict:
+        """Télécharge un blob de façon atomique et retourne son entrée de manifeste"""
+        local_path = self._local_path(blob.name)
+        directory = os.path.dirname(local_path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(local_path)}.")
+        try:
+            md5 = hashlib.md5()
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                stream = self.container_client.get_blob_client(blob.name).download_blob()
+                for chunk in stream.chunks():
+                    f.write(chunk)
+                    md5.update(chunk)
+                    size += len(chunk)
+
+            fingerprint = blob_fingerprint(blob)
+            if fingerprint.startswith("md5:") and fingerprint != "md5:" + md5.hexdigest():
+                raise ValueError(f"MD5 invalide pour {blob.name}")
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {"fingerprint": fingerprint, "size": size}
+
+    def sync(self) -> SyncResult:
+        start = time.perf_counter()
+        result = SyncResult()
+        manifest = self.load_manifest()
+        remote = {}
+
+        for blob in self.container_client.list_blobs():
+            if is_directory_blob(blob.name):
+                os.makedirs(self._local_path(blob.name), exist_ok=True)
+                continue
+            remote[blob.name] = blob
+
+        to_download = []
+        for name, blob in remote.items():
+            if self._is_current(blob, manifest.get(name)):
+                result.skipped.append(name)
+            else:
+                to_download.append(blob)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix="model-sync") as pool:
+            futures = {blob.name: pool.submit(self._download, blob) for blob in to_download}
+            for name, future in futures.items():
+                try:
+                    manifest[name] = future.result()
+                    result.downloaded.append(name)
+                except Exception as e:
+                    # L'ancienne version éventuelle reste en place, nouvel essai au prochain démarrage
+                    manifest.pop(name, None)
+                    result.failed[name] = str(e)
+
+        for name in [name for name in manifest if name not in remote]:
+            try:
+                os.remove(self._local_path(name))
+            except FileNotFoundError:
+                pass
+            del manifest[name]
+            result.removed.append(name)
+
+        self._save_manifest(manifest)
+        result.duration = time.perf_counter() - start
+        return result
+
+
+class _LocalDownload:
+    def __init__(self, path: str):
+        self.path = path
+
+    def chunks(self):
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield chunk
+
+    def readall(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class _LocalBlobClient:
+    def __init__(self, path: str):
+        self.path = path
+
+    def download_blob(self, **kwargs) -> _LocalDownload:
+        return _LocalDownload(self.path)
+
+
+class LocalContainerClient:
+    """
+    Équivalent hors ligne d'un ContainerClient Azure adossé à un répertoire :
+    list_blobs() expose nom, taille, ETag (taille + date de modification) et
+    MD5 du contenu, get_blob_client() permet le téléchargement par chunks
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def list_blobs(self):
+        for directory, _, files in sorted(os.walk(self.root)):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                md5 = hashlib.md5()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        md5.update(chunk)
+                yield SimpleNamespace(
+                    name=os.path.relpath(path, self.root).replace(os.sep, "/"),
+                    size=stat.st_size,
+                    etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+                    content_settings=SimpleNamespace(content_md5=bytearray(md5.digest()))
+                )
+
+    def get_blob_client(self, blob_name: str) -> _LocalBlobClient:
+        return _LocalBlobClient(os.path.join(self.root, blob_name))
@@ -0,0 +1,196 @@
+import asyncio
+import contextlib
+import json
+from functools import partial
+from typing import Awaitable, Callable, List
+import anyio
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import StreamingResponse
+from app.config.sentry import capture_exception
+
+# Fin de l'entrée (file des lignes) ou de la sortie (file des lots)
+_END = object()
+
+
+class NdjsonScoringStream:
+    """
+    Score d'un flux NDJSON : une ligne par message ({"text": ..., "id": ...}
+    ou une simple chaîne JSON), lu au fil de l'eau et passé dans le pipeline
+    par lots d'au plus batch_size lignes (ou après max_wait_ms d'attente).
+
+    Les résultats sont renvoyés dans l'ordre de l'entrée, lot par lot, dès
+    qu'ils sont prêts. Les files sont bornées : quand l'inférence prend du
+    retard, les lots en cours puis les lignes en attente atteignent leur
+    limite et la lecture du corps s'arrête (contrôle de flux TCP). La mémoire
+    ne dépend que de ces limites et de max_line_bytes, pas de la longueur du flux.
+    """
+
+    def __init__(self, request: Request, score: Callable[[List[str]], Awaitable[List[dict]]],
+                 batch_size: int = 32, max_wait_ms: float = 20.0, queue_size: int = 128,
+                 max_in_flight_batches: int = 2, max_line_bytes: int = 1_048_576):
+        self.request = request
+        self.score = score
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_line_bytes = max_line_bytes
+        self.disconnected = asyncio.Event()
+        self._lines = asyncio.Queue(maxsize=max(1, queue_size))
+        self._batches = asyncio.Queue(maxsize=max(1, max_in_flight_batches))
+        self._tasks: list[asyncio.Task] = []
+
+    async def _read(self):
+        """Découpe le corps en lignes ; bloque quand la file des lignes est pleine"""
+        index = 0
+        buffer = bytearray()
+        # Ligne trop longue : ignorée jusqu'au prochain saut de ligne
+        overflow = False
+        ended = False
+        try:
+            async for chunk in self.request.stream():
+                buffer += chunk
+                while (end := buffer.find(b"\n")) >= 0:
+                    line = bytes(buffer[:end])
+                    del buffer[:end + 1]
+                    if overflow:
+                        overflow = False
+                        await self._lines.put((index, None, None, "Ligne trop longue"))
+                        index += 1
+                    elif line.strip():
+                        await self._lines.put(self.parse(index, line))
+                        index += 1
+                if len(buffer) > self.max_line_bytes:
+                    overflow = True
+                    buffer.clear()
+            if overflow:
+                await self._lines.put((index, None, None, "Ligne trop longue"))
+            elif buffer.strip():
+                await self._lines.put(self.parse(index, bytes(buffer)))
+            await self._lines.put(_END)
+            ended = True
+
+            # Corps entièrement lu : le prochain message est la déconnexion
+            while (await self.request.receive())["type"] != "http.disconnect":
+                pass
+        except ClientDisconnect:
+            pass
+        except Exception as e:
+            capture_exception(e, context={"lines_read": index})
+        finally:
+            # Quelle que soit l'issue : fin de l'entrée (sans attendre, la
+            # tâche peut être annulée) et fin de la réponse
+            if not ended:
+                with contextlib.suppress(asyncio.QueueFull):
+                    self._lines.put_nowait(_END)
+            self.disconnected.set()
+
+    def parse(self, index: int, line: bytes) -> tuple:
+        """(position, identifiant, texte, erreur) d'une ligne de l'entrée"""
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return index, None, None, "JSON invalide"
+        if isinstance(message, str):
+            return index, None, message, None
+        if isinstance(message, dict) and isinstance(message.get("text"), str):
+            return index, message.get("id"), message["text"], None
+        return index, message.get("id") if isinstance(message, dict) else None, None, \
+            "Champ 'text' manquant ou invalide"
+
+    async def _collect(self) -> list | None:
+        """Attend une première ligne puis complète le lot jusqu'à la limite ou l'échéance"""
+        loop = asyncio.get_running_loop()
+        first = await self._lines.get()
+        if first is _END:
+            return None
+        batch = [first]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            if not self._lines.empty():
+                line = self._lines.get_nowait()
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    line = await asyncio.wait_for(self._lines.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if line is _END:
+                # Remis en file pour terminer après ce lot
+                self._lines.put_nowait(_END)
+                break
+            batch.append(line)
+        return batch
+
+    async def _dispatch(self):
+        """Lance un lot dès qu'il est formé ; bloque quand max_in_flight_batches sont en cours"""
+        while (batch := await self._collect()) is not None:
+            await self._batches.put(asyncio.ensure_future(self._score_batch(batch)))
+        await self._batches.put(_END)
+
+    async def _score_batch(self, batch: list) -> str:
+        valid = [(index, text) for index, _, text, error in batch if error is None]
+        try:
+            rows = await self.score([text for _, text in valid]) if valid else []
+            results = {index: row for (index, _), row in zip(valid, rows)}
+        except Exception as e:
+            capture_exception(e, context={"batch_size": len(valid)})
+            results = {index: {"error": "Erreur lors de l'analyse"} for index, _ in valid}
+
+        lines = []
+        for index, message_id, _, error in batch:
+            record = {"index": index}
+            if message_id is not None:
+                record["id"] = message_id
+            record.update(results[index] if error is None else {"error": error})
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        return "".join(lines)
+
+    async def results(self):
+        """Lignes NDJSON de sortie, un bloc par lot, dans l'ordre de l'entrée"""
+        self._tasks = [asyncio.ensure_future(self._read()),
+                       asyncio.ensure_future(self._dispatch())]
+        while (task := await self._batches.get()) is not _END:
+            yield await task
+
+    async def close(self):
+        """Annule la lecture, le regroupement et les lots encore en cours"""
+        pending = list(self._tasks)
+        while not self._batches.empty():
+            task = self._batches.get_nowait()
+            if task is not _END:
+                pending.append(task)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class NdjsonStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse qui lit le corps de la requête pendant l'envoi : la
+    déconnexion du client est signalée par le lecteur du flux, au lieu de la
+    tâche d'écoute de Starlette qui consommerait les messages http.request
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, stream: NdjsonScoringStream, **kwargs):
+        super().__init__(stream.results(), **kwargs)
+        self.stream = stream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            async with anyio.create_task_group() as task_group:
+
+                async def wrap(func):
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(wrap, partial(self.stream_response, send))
+                await wrap(self.stream.disconnected.wait)
+        finally:
+            await self.stream.close()
+
+        # Comme StreamingResponse : tâches d'arrière-plan après l'envoi
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable
+from app.config.sentry import stage_span
+
+
+@contextmanager
+def pipeline_stage(name: str, duration=None):
+    """Span Sentry de l'étape + durée dans l'histogramme de /metrics"""
+    start = time.perf_counter()
+    try:
+        with stage_span(name):
+            yield
+    finally:
+        if duration is not None:
+            duration.observe(time.perf_counter() - start)
+
+
+class Stage:
+    """
+    Étape du pipeline : fn reçoit en arguments nommés les résultats des
+    étapes (ou entrées) dont elle dépend
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Awaitable[Any]],
+                 requires: Iterable[str] = (), duration=None):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+        self.duration = duration
+
+
+class StageGraph:
+    """
+    Graphe d'étapes (DAG) : seules les étapes nécessaires aux cibles sont
+    exécutées, chacune dès que ses dépendances sont prêtes, de sorte que les
+    branches indépendantes (émotions, spam) tournent en parallèle
+    """
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+
+    def required(self, targets: Iterable[str], inputs: Iterable[str] = ()) -> list[str]:
+        """Étapes nécessaires aux cibles, dépendances d'abord"""
+        inputs = set(inputs)
+        order: list[str] = []
+
+        def visit(name: str, path: tuple[str, ...]):
+            if name in inputs or name in order:
+                return
+            if name in path:
+                raise ValueError(f"Cycle dans le pipeline: {' -> '.join(path + (name,))}")
+            if name not in self.stages:
+                raise KeyError(f"Étape inconnue: {name}")
+            for dependency in self.stages[name].requires:
+                visit(dependency, path + (name,))
+            order.append(name)
+
+        for target in targets:
+            visit(target, ())
+        return order
+
+    async def run(self, inputs: dict[str, Any], targets: Iterable[str]) -> dict[str, Any]:
+        """Résultats des étapes exécutées (et des entrées), par nom"""
+        results: dict[str, asyncio.Future] = {}
+        for name, value in inputs.items():
+            results[name] = asyncio.get_running_loop().create_future()
+            results[name].set_result(value)
+
+        async def execute(stage: Stage):
+            arguments = {name: await results[name] for name in stage.requires}
+            with pipeline_stage(stage.name, stage.duration):
+                return await stage.fn(**arguments)
+
+        tasks = []
+        for name in self.required(targets, inputs):
+            task = asyncio.ensure_future(execute(self.stages[name]))
+            results[name] = task
+            tasks.append(task)
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Une étape en échec (ou une annulation) arrête les autres branches
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return {name: future.result() for name, future in results.items()}
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_SHARED = "SHARED"
+
+
+class PredictionCache:
+    """
+    Cache des résultats de prédiction adressé par contenu :
+    - clé = hash du texte normalisé + versions des modèles chargés
+    - LRU bornée avec expiration (TTL)
+    - single-flight : les requêtes identiques simultanées partagent un seul calcul
+    """
+
+    def __init__(self, model_versions: str, max_entries: int = 10000,
+                 ttl_seconds: float = 3600):
+        self.model_versions = model_versions
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalisation Unicode (NFC) et suppression des espaces de bord"""
+        return unicodedata.normalize("NFC", text).strip()
+
+    def key(self, text: str, scope: str = "") -> str:
+        """scope distingue les réponses partielles (/predict/spam, /predict/emotion)"""
+        payload = f"{self.model_versions}\0{scope}\0{self.normalize(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str,
+                             compute: Callable[[], Awaitable[Any]]) -> tuple[Any, str]:
+        """
+        Retourne (valeur, statut) où statut vaut HIT, MISS (calculé ici) ou
+        SHARED (calcul identique déjà en cours, résultat partagé)
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, CACHE_HIT
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.shared += 1
+            # shield : l'annulation d'un appelant n'annule pas le calcul partagé
+            return await asyncio.shield(inflight), CACHE_SHARED
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Marque l'exception comme consommée même si personne n'attend
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value, CACHE_MISS
+        finally:
+            del self._inflight[key]
+
+    def lookup(self, key: str) -> Any | None:
+        """get() comptabilisé dans les statistiques (chemins sans single-flight)"""
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.shared
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.shared) / lookups if lookups else 0.0,
+            "model_versions": self.model_versions,
+        }
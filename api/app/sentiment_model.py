@@ -1,59 +1,103 @@
+from app.config.inference import get_inference_settings
 from app.config.sentry import capture_exception, capture_message
+from app.emotion_backends import EmotionBackend, create_emotion_backend
+from app.emotion_tokenizer import BucketedTokenizer
 from fastapi import HTTPException
 import numpy as np
-from transformers import RobertaTokenizer
-import tensorflow as tf
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Supprime les avertissements TF
-os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"  # Désactive les opérations oneDNN
-tf.get_logger().setLevel('ERROR')  # Supprime les avertissements TF additionnels
+# oneDNN reste désactivé par défaut mais peut être réactivé par l'environnement
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
 
 
 class SentimentModel:
-    def __init__(self):
-        self.tokenizer = None
-        self.emotion_model = None
+    """
+    Tokenizer RoBERTa + moteur d'inférence interchangeable (TensorFlow ou
+    ONNX Runtime, EMOTION_BACKEND). Les bibliothèques lourdes ne sont
+    importées qu'au chargement : importer ce module reste léger, et
+    tokenizer et modèle peuvent se charger en parallèle.
+    """
+
+    def __init__(self, load: bool = True, backend: EmotionBackend | None = None):
+        settings = get_inference_settings()
+        self.tokenizer: BucketedTokenizer | None = None
+        self.padding_buckets = settings.emotion_padding_buckets
+        self.backend = backend or create_emotion_backend(settings)
+        self.version = None
         self.emotions = ['anger', 'fear', 'joy',
                          'neutral', 'sadness', 'surprise']
-        self.load_models()
+        if load:
+            self.load_models()
 
     def load_models(self):
+        self.load_tokenizer()
+        self.load_emotion_model()
+
+    def load_tokenizer(self):
         try:
-            self.tokenizer = RobertaTokenizer.from_pretrained('roberta-base')
-            self.emotion_model = tf.saved_model.load('models/emotions')
-            # capture_message("Modèle d'émotions chargé avec succès", level="info")
+            # Tokenizer rapide (Rust), enveloppé pour le padding par paliers
+            from transformers import RobertaTokenizerFast
+            self.tokenizer = BucketedTokenizer(
+                RobertaTokenizerFast.from_pretrained('roberta-base'), buckets=self.padding_buckets)
         except Exception as e:
             capture_exception(e)
             raise HTTPException(
                 status_code=500, detail="Erreur lors du chargement des modèles")
 
+    def load_emotion_model(self):
+        try:
+            self.backend.load()
+            # Le moteur fait partie de la version : résultats mis en cache distincts
+            self.version = f"{self.backend.name}-{self.backend.version}"
+            # capture_message("Modèle d'émotions chargé avec succès", level="info")
+        except Exception as e:
+            capture_exception(e, context={"backend": self.backend.name})
+            raise HTTPException(
+                status_code=500, detail="Erreur lors du chargement des modèles")
+
+    def _predict_probs(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Probabilités dans l'ordre des entrées : les textes sont triés par
+        longueur et inférés par lots paddés au palier de longueur
+        """
+        probs = np.empty((len(texts), len(self.emotions)), dtype=np.float32)
+        for indexes, input_ids, attention_mask in self.tokenizer.batches(texts, batch_size):
+            logits = self.backend.predict_logits(input_ids, attention_mask)
+            probs[indexes] = softmax(logits)
+        return probs
+
+    def _to_result(self, probs: np.ndarray) -> tuple[str, dict[str, float]]:
+        emotion_scores = {emotion: float(
+            prob) for emotion, prob in zip(self.emotions, probs)}
+        predicted_emotion = self.emotions[np.argmax(probs)]
+        return predicted_emotion, emotion_scores
+
     def analyze_emotions(self, text: str):
         try:
-            # Tokenisation pour RoBERTa
-            encodings = self.tokenizer(
-                text,
-                truncation=True,
-                padding=True,
-                max_length=512,
-                return_tensors="tf"
-            )
-            inputs = {
-                'input_ids': encodings['input_ids'],
-                'attention_mask': encodings['attention_mask'],
-                'token_type_ids': encodings.get('token_type_ids', tf.zeros_like(encodings['input_ids']))
-            }
-
-            # Prédiction des émotions
-            predictions = self.emotion_model(inputs, training=False)
-            probs = tf.nn.softmax(predictions['logits'], axis=1)[0].numpy()
-
-            emotion_scores = {emotion: float(
-                prob) for emotion, prob in zip(self.emotions, probs)}
-            predicted_emotion = self.emotions[np.argmax(probs)]
-
-            return predicted_emotion, emotion_scores
+            probs = self._predict_probs([text])[0]
+            return self._to_result(probs)
 
         except Exception as e:
             capture_exception(e, context={"text_length": len(text)})
             raise HTTPException(
                 status_code=500, detail="Erreur lors de l'analyse des émotions")
+
+    def analyze_emotions_batch(self, texts: list[str], batch_size: int = 32):
+        """
+        Analyse les émotions d'une liste de textes par lots triés et paddés par paliers
+        Returns:
+            list: (émotion prédite, scores) dans l'ordre des entrées
+        """
+        try:
+            probs = self._predict_probs(texts, batch_size)
+            return [self._to_result(row) for row in probs]
+
+        except Exception as e:
+            capture_exception(e, context={"batch_size": len(texts)})
+            raise HTTPException(
+                status_code=500, detail="Erreur lors de l'analyse des émotions")
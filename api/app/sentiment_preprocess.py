@@ -1,11 +1,15 @@
-from bs4 import BeautifulSoup
-import re
-import emoji
 from fastapi import HTTPException
-from app.config.sentry import capture_exception, capture_message
+from app.config.inference import get_inference_settings
+from app.config.sentry import capture_exception, stage_event
+from app.text_cleaning import BertTextCleaner
 
 
 class SentimentPreprocessor:
+    def __init__(self):
+        """Initialise le nettoyeur de texte (identique au nettoyage d'entraînement)"""
+        settings = get_inference_settings()
+        self.cleaner = BertTextCleaner(strip_symbols=settings.bert_strip_symbols)
+
     def clean_text_for_bert(self, text: str) -> str:
         """
         Fonction de nettoyage pour préparer le texte pour BERT
@@ -18,32 +22,12 @@ class SentimentPreprocessor:
             if not isinstance(text, str):
                 text = str(text)
 
-            # Convertir en UTF-8
-            text = text.encode('utf-8', 'ignore').decode('utf-8')
-
-            # Supprimer les balises HTML
-            text = BeautifulSoup(text, "html.parser").get_text()
-
-            # Remplacer les retours à la ligne et tabulations
-            text = re.sub(r"[\n\t\r]", " ", text)
-
-            # Supprimer les caractères non pertinents
-            text = re.sub(r"[^\w\s.,!?']", "", text)
-
-            # Gérer les emojis
-            text = emoji.demojize(text)
-
-            # Limiter les caractères répétitifs
-            text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+            # HTML, emojis, caractères répétés et espaces (voir BertTextCleaner)
+            text = self.cleaner.clean(text)
 
-            # Normaliser les espaces
-            text = " ".join(text.split())
-
-            capture_message(
+            stage_event(
                 "Text cleaned for BERT",
-                level="info",
-                context={"original_length": len(
-                    text), "cleaned_length": len(text)}
+                context={"cleaned_length": len(text)}
             )
 
             return text
@@ -60,3 +44,13 @@ class SentimentPreprocessor:
                 status_code=500,
                 detail="Erreur lors du nettoyage du texte pour BERT"
             )
+
+    def clean_texts_for_bert(self, texts: list[str]) -> list[str]:
+        """
+        Version par lots de clean_text_for_bert
+        Args:
+            texts: Textes à nettoyer
+        Returns:
+            list: Textes nettoyés, dans le même ordre
+        """
+        return [self.clean_text_for_bert(text) for text in texts]
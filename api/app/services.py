@@ -0,0 +1,308 @@
+from typing import Dict, List
+from app.startup import STARTUP_PROFILE
+from app.language_service import LanguageService
+from app.language_detection import LanguageDetector
+from app.translation_cache import TranslationCache
+from app.translators import create_translator
+from app.sentiment_preprocess import SentimentPreprocessor
+from app.spam_preprocess import ComponentTimings, SpamPreprocessor
+from app.sentiment_model import SentimentModel
+from app.emotion_batcher import EmotionBatcher
+from app.emotion_cascade import EmotionCascade, LstmEmotionModel
+from app.executors import InferenceExecutors, clean_for_bert, prepare_spam, spam_signatures
+from app.spam_model import SpamModel
+from app.spam_duplicates import SpamDuplicateIndex
+from app.result_cache import PredictionCache
+from app.pipeline import Stage, StageGraph
+from app.config.sentry import stage_event
+from app.config.inference import get_inference_settings
+from app.metrics import (BERT_CLEANING_DURATION, EMOTION_INFERENCE_DURATION,
+                         EMOTION_ROBERTA_DURATION, SPAM_CLEANING_DURATION,
+                         SPAM_INFERENCE_DURATION)
+import asyncio
+import time
+
+# Branches demandées par chaque endpoint
+PREDICTION_TARGETS = ("emotion_inference", "spam_inference")
+SPAM_TARGETS = ("spam_inference",)
+EMOTION_TARGETS = ("emotion_inference",)
+
+
+class ServicesContainer:
+    language_service: LanguageService | None = None
+    sentiment_preprocessor: SentimentPreprocessor | None = None
+    spam_preprocessor: SpamPreprocessor | None = None
+    sentiment_model: SentimentModel | None = None
+    spam_model: SpamModel | None = None
+    emotion_batcher: EmotionBatcher | None = None
+    emotion_cascade: EmotionCascade | None = None
+    spam_duplicates: SpamDuplicateIndex | None = None
+    executors: InferenceExecutors | None = None
+    spacy_timings: ComponentTimings | None = None
+    prediction_cache: PredictionCache | None = None
+    pipeline: StageGraph | None = None
+    batch_pipeline: StageGraph | None = None
+    startup_task: asyncio.Task | None = None
+    ready: bool = False
+    startup_error: str | None = None
+    warmup_report: dict | None = None
+
+    def initialize(self):
+        settings = get_inference_settings()
+
+        # Chargements indépendants : spaCy, tokenizer, saved model TF, pipeline
+        # joblib et profils langdetect, en parallèle si STARTUP_PARALLEL_LOADING
+        self.sentiment_model = SentimentModel(load=False)
+        loaders = {
+            "language_detector": lambda: LanguageDetector(
+                max_chars=settings.language_detection_max_chars,
+                seed=settings.language_detection_seed
+            ),
+            "spacy": SpamPreprocessor,
+            "roberta_tokenizer": self.sentiment_model.load_tokenizer,
+            "emotion_model": self.sentiment_model.load_emotion_model,
+            "spam_model": lambda: SpamModel(compiled=settings.spam_compiled_scorer),
+        }
+        if settings.emotion_cascade_enabled:
+            lstm_model = LstmEmotionModel(
+                self.sentiment_model.emotions,
+                model_path=settings.emotion_lstm_model_path,
+                tokenizer_path=settings.emotion_lstm_tokenizer_path,
+                max_len=settings.emotion_lstm_max_len
+            )
+            loaders["emotion_lstm"] = lstm_model.load
+        if settings.startup_parallel_loading:
+            loaded = STARTUP_PROFILE.load_parallel(
+                loaders, max_workers=settings.startup_loading_workers)
+        else:
+            loaded = {name: STARTUP_PROFILE.phase(name, loader)
+                      for name, loader in loaders.items()}
+
+        translation_cache = TranslationCache(
+            max_entries=settings.translation_cache_max_entries,
+            ttl_seconds=settings.translation_cache_ttl_seconds,
+            disk_path=settings.translation_cache_disk_path
+        ) if settings.translation_cache_enabled else None
+        self.language_service = LanguageService(
+            translation_cache,
+            translator=create_translator(settings),
+            degraded_fallback=settings.translator_degraded_fallback,
+            detector=loaded["language_detector"],
+            min_confidence=settings.language_detection_min_confidence
+        )
+        self.sentiment_preprocessor = SentimentPreprocessor()
+        self.spam_preprocessor = loaded["spacy"]
+        self.spam_model = loaded["spam_model"]
+        self.spacy_timings = ComponentTimings()
+        model_versions = f"{self.sentiment_model.version}:{self.spam_model.version}"
+        if settings.emotion_cascade_enabled:
+            self.emotion_cascade = EmotionCascade(
+                lstm_model, self.sentiment_model,
+                threshold=settings.emotion_cascade_threshold
+            )
+            model_versions += f":{self.emotion_cascade.version}"
+        if settings.spam_dedup_enabled:
+            self.spam_duplicates = SpamDuplicateIndex(
+                similarity=settings.spam_dedup_similarity,
+                confidence=settings.spam_dedup_confidence,
+                max_entries=settings.spam_dedup_max_entries,
+                ttl_seconds=settings.spam_dedup_ttl_seconds
+            )
+            model_versions += f":dedup@{settings.spam_dedup_similarity}"
+        if settings.prediction_cache_enabled:
+            # Les versions des modèles font partie de la clé : un nouveau
+            # modèle invalide naturellement les anciens résultats
+            self.prediction_cache = PredictionCache(
+                model_versions=model_versions,
+                max_entries=settings.prediction_cache_max_entries,
+                ttl_seconds=settings.prediction_cache_ttl_seconds
+            )
+        self.executors = STARTUP_PROFILE.phase("executors", lambda: InferenceExecutors(
+            io_workers=settings.executor_io_workers,
+            cpu_workers=settings.executor_cpu_workers,
+            cpu_mode=settings.executor_cpu_mode,
+            inference_workers=settings.executor_inference_workers,
+            sentiment_preprocessor=self.sentiment_preprocessor,
+            spam_preprocessor=self.spam_preprocessor
+        ))
+        if settings.emotion_batching_enabled:
+            self.emotion_batcher = EmotionBatcher(
+                self.sentiment_model,
+                max_batch_size=settings.emotion_batching_max_size,
+                max_wait_ms=settings.emotion_batching_max_wait_ms,
+                executor=self.executors.inference_pool
+            )
+        self.pipeline = self.build_pipeline(single=True)
+        self.batch_pipeline = self.build_pipeline(single=False)
+
+    async def analyze_emotions(self, text: str, cleaned_text: str) -> tuple[str, Dict[str, float]]:
+        """
+        Cascade si activée (LSTM sur le texte nettoyé par spaCy), puis RoBERTa
+        par les micro-lots si activés, sinon appel direct au modèle
+        """
+        if self.emotion_cascade is not None:
+            result, = await self.executors.run_inference(
+                self.emotion_cascade.triage, [cleaned_text])
+            if result is not None:
+                return result
+
+        start = time.perf_counter()
+        if self.emotion_batcher is not None:
+            result = await self.emotion_batcher.analyze(text)
+        else:
+            result = await self.executors.run_inference(
+                self.sentiment_model.analyze_emotions, text)
+        EMOTION_ROBERTA_DURATION.observe(time.perf_counter() - start)
+        return result
+
+    async def analyze_emotions_batch(self, texts: List[str], cleaned_texts: List[str],
+                                     batch_size: int) -> List[tuple[str, Dict[str, float]]]:
+        """Version par lots : seuls les textes escaladés passent par RoBERTa"""
+        results = [None] * len(texts)
+        if self.emotion_cascade is not None:
+            results = await self.executors.run_inference(
+                self.emotion_cascade.triage, cleaned_texts)
+
+        escalated = [i for i, result in enumerate(results) if result is None]
+        if escalated:
+            start = time.perf_counter()
+            roberta_results = await self.executors.run_inference(
+                self.sentiment_model.analyze_emotions_batch,
+                [texts[i] for i in escalated], batch_size=batch_size)
+            EMOTION_ROBERTA_DURATION.observe(time.perf_counter() - start)
+            for i, result in zip(escalated, roberta_results):
+                results[i] = result
+        return results
+
+    def build_pipeline(self, single: bool) -> StageGraph:
+        """
+        Pipeline en DAG sur une liste de textes :
+            language -> bert_cleaning -> emotion_inference
+                     -> spam_cleaning -> spam_inference
+        (la cascade des émotions dépend aussi du texte nettoyé par spaCy).
+        single : un seul texte, les émotions passent par les micro-lots.
+        """
+        settings = get_inference_settings()
+
+        # 1. Détection de langue et traductions (durées mesurées par le service)
+        async def language(texts):
+            if single:
+                languages = [await self.executors.run_io(
+                    self.language_service.process_text, texts[0])]
+            else:
+                # Un traducteur par langue
+                languages = await self.executors.run_io(
+                    self.language_service.process_texts, texts)
+            stage_event("Language processed", context={"batch_size": len(texts)})
+            return languages
+
+        # 2. Prétraitement pour les émotions (BERT)
+        async def bert_cleaning(language):
+            texts_for_emotion = await self.executors.run_cpu(
+                clean_for_bert, [result.text for result in language])
+            stage_event("Text preprocessed for emotions")
+            return texts_for_emotion
+
+        # 3. Prétraitement pour le spam : une ligne par texte, sauf pour les
+        # quasi-doublons d'un message au verdict connu (spaCy évité)
+        async def spam_cleaning(language):
+            translated_texts = [result.text for result in language]
+            signatures = [None] * len(translated_texts)
+            verdicts = [None] * len(translated_texts)
+            if self.spam_duplicates is not None:
+                signatures = await self.executors.run_cpu(
+                    spam_signatures, translated_texts, settings.spam_dedup_min_tokens)
+                verdicts = [self.spam_duplicates.lookup(signature) if signature is not None
+                            else None for signature in signatures]
+
+            # La cascade des émotions a besoin du texte nettoyé de tous les textes
+            pending = [i for i, verdict in enumerate(verdicts)
+                       if verdict is None or self.emotion_cascade is not None]
+            features, messages = {}, []
+            if pending:
+                features, messages, timings = await self.executors.run_cpu(
+                    prepare_spam, [translated_texts[i] for i in pending])
+                self.spacy_timings.add(timings, docs=len(pending))
+            stage_event("Text preprocessed for spam",
+                        context={"duplicates": len(verdicts) - verdicts.count(None)})
+            return features, messages, pending, signatures, verdicts
+
+        # 4. Analyse des émotions (cascade éventuelle, puis lots paddés)
+        async def emotion(bert_cleaning, spam_cleaning=None):
+            messages = spam_cleaning[1] if spam_cleaning is not None else bert_cleaning
+            if single:
+                emotions = [await self.analyze_emotions(bert_cleaning[0], messages[0])]
+            else:
+                emotions = await self.analyze_emotions_batch(
+                    bert_cleaning, messages, batch_size=settings.emotion_batch_size)
+            stage_event("Emotions analyzed", context={"batch_size": len(emotions)})
+            return emotions
+
+        # 5. Analyse du spam (scoreur compilé, sinon un seul predict_proba) des
+        # textes sans verdict repris ; les verdicts nets alimentent l'index
+        async def spam(spam_cleaning):
+            features, messages, pending, signatures, verdicts = spam_cleaning
+            rows = [row for row, i in enumerate(pending) if verdicts[i] is None]
+            if len(rows) < len(pending):
+                features = {name: [values[row] for row in rows] for name, values in features.items()}
+                messages = [messages[row] for row in rows]
+            spams = list(verdicts)
+            if rows:
+                scored = await self.executors.run_inference(
+                    self.spam_model.score_batch, features, messages)
+                for row, result in zip(rows, scored):
+                    i = pending[row]
+                    spams[i] = result
+                    if signatures[i] is not None:
+                        self.spam_duplicates.add(signatures[i], *result)
+            stage_event("Spam analyzed", context={"batch_size": len(spams)})
+            return spams
+
+        emotion_requires = ("bert_cleaning", "spam_cleaning") \
+            if self.emotion_cascade is not None else ("bert_cleaning",)
+        return StageGraph([
+            Stage("language", language, requires=("texts",)),
+            Stage("bert_cleaning", bert_cleaning, requires=("language",),
+                  duration=BERT_CLEANING_DURATION),
+            Stage("spam_cleaning", spam_cleaning, requires=("language",),
+                  duration=SPAM_CLEANING_DURATION),
+            Stage("emotion_inference", emotion, requires=emotion_requires,
+                  duration=EMOTION_INFERENCE_DURATION),
+            Stage("spam_inference", spam, requires=("spam_cleaning",),
+                  duration=SPAM_INFERENCE_DURATION),
+        ])
+
+    async def run_pipeline(self, texts: List[str], targets=PREDICTION_TARGETS,
+                           single: bool = False) -> List[dict]:
+        """
+        Exécute les branches demandées et retourne, par texte, les champs de
+        réponse correspondants
+        """
+        graph = self.pipeline if single else self.batch_pipeline
+        results = await graph.run({"texts": texts}, targets)
+
+        rows = [
+            {
+                "text": text,
+                "detected_language": language.language,
+                "language_confidence": language.confidence,
+                "translated_text": language.text if language.translated else None,
+            }
+            for text, language in zip(texts, results["language"])
+        ]
+        if "emotion_inference" in results:
+            for row, (emotion, emotion_scores) in zip(rows, results["emotion_inference"]):
+                row.update(emotion=emotion, emotion_scores=emotion_scores)
+        if "spam_inference" in results:
+            for row, (spam_score, is_spam) in zip(rows, results["spam_inference"]):
+                row.update(spam_score=spam_score, is_spam=is_spam)
+        return rows
+
+    def close(self):
+        """Libère les pools d'exécution, le traducteur et le cache des traductions"""
+        if self.executors is not None:
+            self.executors.shutdown()
+        if self.language_service is not None:
+            self.language_service.translator.close()
+            if self.language_service.translation_cache is not None:
+                self.language_service.translation_cache.close()
@@ -0,0 +1,172 @@
+import hashlib
+import heapq
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+
+# Signature MinHash : PERMUTATIONS valeurs, découpées en bandes de ROWS_PER_BAND
+PERMUTATIONS = 64
+ROWS_PER_BAND = 4
+# Au-delà, les mots suivants ne changent plus la signature (temps borné par texte)
+MAX_SIGNATURE_TOKENS = 512
+
+_WORDS = re.compile(r"\w+")
+# Permutations par hachage multiplicatif (a impair), graine fixe : les
+# signatures calculées dans les workers CPU sont comparables entre elles
+_rng = np.random.default_rng(822)
+_A = _rng.integers(1, 2 ** 63, size=PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2 ** 63, size=PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash(text: str, min_tokens: int = 8) -> np.ndarray | None:
+    """
+    Signature MinHash de l'ensemble des mots d'un texte prénettoyé ; None
+    s'il compte moins de min_tokens mots distincts, trop peu pour que la
+    similarité estimée soit fiable
+    """
+    tokens = set(_WORDS.findall(text)[:MAX_SIGNATURE_TOKENS])
+    if len(tokens) < min_tokens:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+         for token in tokens),
+        dtype=np.uint64, count=len(tokens))
+    # Dépassements modulo 2**64 voulus ; les 32 bits de poids fort sont gardés
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+@dataclass(slots=True)
+class _Cluster:
+    signature: np.ndarray
+    spam_score: float
+    is_spam: bool
+    created_at: float
+    hits: int = 0
+
+
+class SpamDuplicateIndex:
+    """
+    Index des messages récemment scorés avec un verdict net, par signature
+    MinHash : un message dont la similarité de Jaccard estimée avec un
+    groupe connu atteint similarity reprend son verdict sans passer par
+    spaCy ni par le modèle de spam.
+
+    Recherche en temps borné par LSH : seuls les groupes partageant au
+    moins une bande de ROWS_PER_BAND valeurs sont comparés. Mémoire bornée
+    (max_entries, les plus anciens sortent d'abord ; environ 3,5 Ko par
+    groupe) et expiration après ttl_seconds.
+    """
+
+    def __init__(self, similarity: float = 0.8, confidence: float = 0.9,
+                 max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.similarity = similarity
+        self.confidence = confidence
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._buckets: list[dict[bytes, list[int]]] = [
+            {} for _ in range(PERMUTATIONS // ROWS_PER_BAND)]
+        self._clusters: OrderedDict[int, _Cluster] = OrderedDict()
+        self._next_id = 0
+
+        # Statistiques
+        self.hits = 0
+        self.spam_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _bands(signature: np.ndarray):
+        return (signature[start:start + ROWS_PER_BAND].tobytes()
+                for start in range(0, PERMUTATIONS, ROWS_PER_BAND))
+
+    def _nearest(self, signature: np.ndarray) -> _Cluster | None:
+        candidates = set()
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        best, best_similarity = None, self.similarity
+        for cluster_id in candidates:
+            cluster = self._clusters[cluster_id]
+            similarity = np.count_nonzero(cluster.signature == signature) / PERMUTATIONS
+            if similarity >= best_similarity:
+                best, best_similarity = cluster, similarity
+        return best
+
+    def _remove(self, cluster_id: int):
+        cluster = self._clusters.pop(cluster_id)
+        for buckets, band in zip(self._buckets, self._bands(cluster.signature)):
+            bucket = buckets[band]
+            bucket.remove(cluster_id)
+            if not bucket:
+                del buckets[band]
+
+    def _expire(self):
+        # Ordre d'insertion = ordre d'expiration (TTL unique)
+        deadline = time.monotonic() - self.ttl_seconds
+        while self._clusters:
+            cluster_id, cluster = next(iter(self._clusters.items()))
+            if cluster.created_at > deadline:
+                break
+            self._remove(cluster_id)
+            self.evictions += 1
+
+    def lookup(self, signature: np.ndarray) -> tuple[float, bool] | None:
+        """Verdict (score de spam, est un spam) du groupe le plus proche, s'il y en a un"""
+        self._expire()
+        cluster = self._nearest(signature)
+        if cluster is None:
+            self.misses += 1
+            return None
+        cluster.hits += 1
+        self.hits += 1
+        self.spam_hits += cluster.is_spam
+        return cluster.spam_score, cluster.is_spam
+
+    def add(self, signature: np.ndarray, spam_score: float, is_spam: bool):
+        """Enregistre un verdict net, sauf si un groupe proche le porte déjà"""
+        if (1 - self.confidence) < spam_score < self.confidence:
+            return
+        self._expire()
+        if self._nearest(signature) is not None:
+            return
+        cluster_id = self._next_id
+        self._next_id += 1
+        self._clusters[cluster_id] = _Cluster(signature, spam_score, is_spam, time.monotonic())
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets.setdefault(band, []).append(cluster_id)
+        while len(self._clusters) > self.max_entries:
+            self._remove(next(iter(self._clusters)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._clusters),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity,
+            "confidence": self.confidence,
+            "hits": self.hits,
+            "spam_hits": self.spam_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self, top: int = 10) -> dict:
+        """stats() et les groupes les plus sollicités (pour /stats)"""
+        now = time.monotonic()
+        clusters = heapq.nlargest(top, self._clusters.values(), key=lambda cluster: cluster.hits)
+        return {
+            **self.stats(),
+            "top_clusters": [
+                {
+                    "is_spam": cluster.is_spam,
+                    "spam_score": cluster.spam_score,
+                    "hits": cluster.hits,
+                    "age_seconds": round(now - cluster.created_at, 1),
+                }
+                for cluster in clusters if cluster.hits
+            ],
+        }
@@ -1,26 +1,75 @@
-import joblib
 from fastapi import HTTPException
 from app.config.sentry import capture_exception, capture_message
+from app.model_fingerprint import model_fingerprint
+from app.spam_scorer import CompiledSpamScorer, UnsupportedPipeline, check_parity
 import numpy as np
 
+# je ne souhaite pas que les mails sur la médiane soient considérés comme spam
+SPAM_THRESHOLD = 0.75
 
 class SpamModel:
-    def __init__(self):
-        """Initialise le modèle de détection de spam"""
+    def __init__(self, compiled: bool = True):
+        """
+        Initialise le modèle de détection de spam
+        Args:
+            compiled: compile le pipeline en scoreur sans DataFrame (repli
+                sur predict_proba si le pipeline n'est pas supporté ou si
+                le contrôle de parité échoue)
+        """
         self.spam_model = None
+        self.version = None
+        self.scorer: CompiledSpamScorer | None = None
+        self.scorer_status: dict = {"enabled": compiled}
         self.load_model()
+        if compiled:
+            self.compile_scorer()
 
     def load_model(self):
         """Charge le modèle de spam"""
         try:
+            import joblib
             # contient le pipeline
             self.spam_model = joblib.load('models/spam.joblib')
+            self.version = model_fingerprint('models/spam.joblib')
             # capture_message("Modèle de spam chargé avec succès", level="info")
         except Exception as e:
             capture_exception(e)
             raise HTTPException(
                 status_code=500, detail="Erreur lors du chargement du modèle de spam")
 
+    def compile_scorer(self):
+        """Compile le pipeline chargé et vérifie la parité avec predict_proba"""
+        try:
+            scorer = CompiledSpamScorer(self.spam_model)
+            parity = check_parity(scorer, self._pipeline_proba)
+        except UnsupportedPipeline as e:
+            self.scorer_status.update(active=False, reason=str(e))
+            return
+        except Exception as e:
+            capture_exception(e, context={"phase": "spam_scorer_compilation"})
+            self.scorer_status.update(active=False, reason=str(e))
+            return
+
+        self.scorer_status.update(parity)
+        if parity["ok"]:
+            self.scorer = scorer
+            self.scorer_status["active"] = True
+        else:
+            self.scorer_status.update(active=False, reason="Contrôle de parité en échec")
+            capture_message("Scoreur spam compilé désactivé (parité)",
+                            level="warning", context=parity)
+
+    def _pipeline_proba(self, features: dict, messages: list[str]) -> np.ndarray:
+        return self.spam_model.predict_proba(self.build_frame(features, messages))[:, 1]
+
+    @staticmethod
+    def build_frame(features: dict, messages: list[str]):
+        """DataFrame d'entrée du pipeline : features additionnelles + texte nettoyé"""
+        import pandas as pd
+        df = pd.DataFrame(features)
+        df['message'] = messages
+        return df
+
     def analyze_spam(self, df) -> tuple[float, bool]:
         """
         Analyse si un texte est un spam
@@ -33,8 +82,7 @@ class SpamModel:
 
             # Prédiction
             spam_prob = self.spam_model.predict_proba(df)[0][1]
-            # je ne souhaite pas que les mails sur la médiane soient considérés comme spam
-            is_spam = spam_prob > 0.75
+            is_spam = spam_prob > SPAM_THRESHOLD
 
             return float(spam_prob), bool(is_spam)
 
@@ -43,3 +91,38 @@ class SpamModel:
                 e, context={"text_length": len(df['message'])})
             raise HTTPException(
                 status_code=500, detail="Erreur lors de l'analyse du spam")
+
+    def score_batch(self, features: dict, messages: list[str]) -> list[tuple[float, bool]]:
+        """
+        Analyse plusieurs textes à partir des features et des textes nettoyés :
+        scoreur compilé si actif, sinon pipeline sur un DataFrame
+        Returns:
+            list: (score de spam, est un spam) dans l'ordre des textes
+        """
+        if self.scorer is None:
+            return self.analyze_spam_batch(self.build_frame(features, messages))
+        try:
+            spam_probs = self.scorer.predict_proba(features, messages)
+            return [(float(prob), bool(prob > SPAM_THRESHOLD)) for prob in spam_probs]
+
+        except Exception as e:
+            capture_exception(e, context={"batch_size": len(messages)})
+            raise HTTPException(
+                status_code=500, detail="Erreur lors de l'analyse du spam")
+
+    def analyze_spam_batch(self, df) -> list[tuple[float, bool]]:
+        """
+        Analyse plusieurs textes en un seul appel à predict_proba
+        Args:
+            df: Dataframe avec une ligne par texte (texte nettoyé + features)
+        Returns:
+            list: (score de spam, est un spam) dans l'ordre des lignes
+        """
+        try:
+            spam_probs = self.spam_model.predict_proba(df)[:, 1]
+            return [(float(prob), bool(prob > SPAM_THRESHOLD)) for prob in spam_probs]
+
+        except Exception as e:
+            capture_exception(e, context={"batch_size": len(df)})
+            raise HTTPException(
+                status_code=500, detail="Erreur lors de l'analyse du spam")
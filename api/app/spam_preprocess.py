@@ -1,22 +1,64 @@
-import spacy
 import re
 import logging
-import pandas as pd
+import threading
+import time
+from app.config.inference import get_inference_settings
+from app.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
 
+class ComponentTimings:
+    """Cumul thread-safe du temps passé dans chaque composant spaCy"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: dict[str, list] = {}
+
+    def add(self, timings: dict[str, float], docs: int):
+        with self._lock:
+            for name, seconds in timings.items():
+                total = self._totals.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += docs
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "total_seconds": seconds,
+                    "docs": docs,
+                    "mean_ms_per_doc": seconds * 1000 / docs if docs else 0.0,
+                }
+                for name, (seconds, docs) in self._totals.items()
+            }
+
+
 class SpamPreprocessor:
     def __init__(self):
         """Initialise le préprocesseur avec le modèle spaCy"""
+        settings = get_inference_settings()
+        self.batch_size = settings.spacy_batch_size
+        self.n_process = settings.spacy_n_process
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("Modèle spaCy chargé avec succès")
+            # Seuls les lemmes, les attributs lexicaux et les entités sont
+            # utilisés : les composants inutiles (parser) ne sont pas chargés
+            import spacy
+            self.nlp = spacy.load(
+                "en_core_web_sm", exclude=settings.spacy_excluded_components)
+            logger.info(
+                f"Modèle spaCy chargé avec succès (composants: {', '.join(self.nlp.pipe_names)})")
         except Exception as e:
             logger.error(
                 f"Erreur lors du chargement du modèle spaCy: {str(e)}")
             raise
 
+        # Dictionnaires de mots-clés compilés une fois pour toutes
+        self.keyword_matcher = KeywordMatcher.from_file(
+            settings.spam_keywords_path)
+        logger.info(
+            f"Dictionnaires de mots-clés chargés (version {self.keyword_matcher.version})")
+
     def nettoyage_spacy(self, texte: str) -> str:
         """
         Nettoie un texte avec spaCy :
@@ -24,15 +66,46 @@ class SpamPreprocessor:
         - Lemmatise les mots
         - Supprime les stopwords et la ponctuation
         """
-        doc = self.nlp(texte)
-        cleaned_text = ' '.join([
+        return self._lemmes_filtres(self.nlp(texte))
+
+    def pipe(self, texts: list[str], batch_size: int | None = None,
+             n_process: int | None = None, timings: dict | None = None):
+        """
+        Passe un lot de textes dans spaCy via nlp.pipe.
+        Si timings est fourni (et n_process == 1), les composants sont exécutés
+        un par un et le temps de chacun (tokenizer compris) y est ajouté.
+        Returns:
+            list: Docs spaCy dans l'ordre des textes
+        """
+        batch_size = batch_size or self.batch_size
+        n_process = n_process or self.n_process
+
+        if timings is None or n_process != 1:
+            return list(self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process))
+
+        start = time.perf_counter()
+        docs = [self.nlp.make_doc(text) for text in texts]
+        timings["tokenizer"] = timings.get(
+            "tokenizer", 0.0) + time.perf_counter() - start
+        for name, proc in self.nlp.pipeline:
+            start = time.perf_counter()
+            if hasattr(proc, "pipe"):
+                docs = list(proc.pipe(docs, batch_size=batch_size))
+            else:
+                docs = [proc(doc) for doc in docs]
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return docs
+
+    @staticmethod
+    def _lemmes_filtres(doc) -> str:
+        """Garde les lemmes hors stopwords, ponctuation, mots courts et entités"""
+        return ' '.join([
             token.lemma_ for token in doc
             if not token.is_stop
             and not token.is_punct
             and len(token.text) > 1
             and not token.ent_type_
         ])
-        return cleaned_text
 
     def clean_text(self, text: str) -> str:
         """
@@ -41,6 +114,29 @@ class SpamPreprocessor:
         if not isinstance(text, str):
             return ""
 
+        # Appliquer le nettoyage spaCy
+        return self.nettoyage_spacy(self.pre_clean(text))
+
+    def clean_texts(self, texts: list[str], batch_size: int | None = None,
+                    n_process: int | None = None, timings: dict | None = None) -> list[str]:
+        """
+        Version par lots de clean_text, les textes passent dans nlp.pipe
+        Args:
+            texts: Textes à nettoyer
+            batch_size: Taille des lots spaCy (défaut : SPACY_BATCH_SIZE)
+            n_process: Processus spaCy (défaut : SPACY_N_PROCESS), pour les traitements hors ligne
+            timings: Dictionnaire complété avec le temps par composant
+        """
+        prepared = [self.pre_clean(text) if isinstance(text, str) else None
+                    for text in texts]
+        docs = iter(self.pipe([text for text in prepared if text is not None],
+                              batch_size=batch_size, n_process=n_process, timings=timings))
+        return [self._lemmes_filtres(next(docs)) if text is not None else ""
+                for text in prepared]
+
+    @staticmethod
+    def pre_clean(text: str) -> str:
+        """Étapes regex appliquées avant spaCy (minuscules, chiffres, URLs, mentions)"""
         # Convertir en minuscules
         text = text.lower()
 
@@ -53,115 +149,22 @@ class SpamPreprocessor:
         # Supprimer les mentions et hashtags
         text = re.sub(r'@\S+|#\S+', '', text)
 
-        # Appliquer le nettoyage spaCy
-        return self.nettoyage_spacy(text)
+        return text
 
     def get_other_features(self, text: str):
-        spam_keywords = [
-            # Arnaques financières et offres
-            'cash', 'free', 'prize', 'winning', 'congratulations', 'claim', 'bonus', 'money',
-            'offer', 'pay', 'investment', 'earnings', 'discount', 'credit card', 'no cost',
-            'payday loan', 'save money', 'get rich', 'lottery', 'winner', 'payment', 'guarantee',
-            'risk-free', 'bank account', 'deposit', 'withdraw', 'refund', 'fund transfer',
-            'deposit now', 'instant win', 'cash prize',
-
-            # Liens douteux / Mots relatifs à l'escroquerie
-            'click here', 'visit our website', 'you won’t believe', 'just for you', 'act now',
-            'now or never', 'limited time offer', 'call now', 'don\'t miss out', 'urgent',
-            'hurry', 'immediate action required', 'attention', 'final notice', 'unsolicited offer',
-            'no obligation',
-
-            # Produits illégaux et services douteux
-            'viagra', 'cialis', 'prescription drugs', 'weight loss', 'herbal pills', 'pharmacy',
-            'enhancement', 'medical treatment', 'fast results', 'fake watches', 'fake merchandise',
-            'counterfeit', 'replica', 'online pharmacy', 'bodybuilding', 'diet pills', 'natural remedies',
-
-            # Arnaques à l'investissement et à la crypto-monnaie
-            'bitcoin', 'cryptocurrency', 'ethereum', 'altcoin', 'ico', 'investment opportunity',
-            'trade now', 'financial freedom', 'secure your future', 'diversify your portfolio',
-            'multi-level marketing', 'pyramid scheme', 'ponzi scheme', 'passive income',
-
-            # Phishing (vol d'identité)
-            'account verification', 'login', 'reset password', 'suspicious activity', 'please verify',
-            'your account is suspended', 'account update', 'login immediately', 'confirm your details',
-            'immediate action required', 'verify now', 'suspended account',
-
-            # Phrases courantes de spam
-            'make money fast', 'earn money online', 'work from home', 'easy money', 'no strings attached',
-            'no hidden fees', 'you’ve been selected', 'don\'t miss out', 'act fast', 'call now for a free trial',
-            'free gift', 'unclaimed prize', 'you\'ve been approved', 'immediate response needed',
-
-            # Arnaques sur les dates et les voyages
-            'vacation', 'trip', 'free holiday', 'getaway', 'resort', 'free flight', 'discounted hotels',
-            'luxury vacation', 'trip of a lifetime', 'vacation package', 'last minute deal', 'travel offer',
-            'special offer',
-
-            # Autres mots-clés communs
-            'adult', 'porn', 'gambling', 'adult content', 'spam', 'fake', 'unsubscribe', 'malware',
-            'virus', 'download', 'trojan', 'phishing', 'risky download'
-        ]
-
-        promo_words = [
-            # Offres et promotions
-            'offer', 'discount', 'sale', 'deal', 'coupon', 'voucher', 'free', 'save',
-            'promo', 'limited time', 'special offer', 'clearance', 'exclusive', 'bargain',
-            'bundle', 'flash sale', 'buy one get one', 'free shipping', 'exclusive deal',
-            'unbeatable price', 'offer expires', 'today only', 'final sale', 'price drop',
-            'price cut', 'special discount', 'best deal', 'end of season sale', 'mega sale',
-            'big savings', 'limited time offer', 'save up to', 'super sale', 'hot deal',
-
-            # Produits et services en promotion
-            'free trial', 'buy now', 'get started', 'limited stock', 'hot item', 'best seller',
-            'new release', 'must-have', 'featured product', 'limited edition', 'exclusive product',
-            'top rated', 'limited quantity', 'best value', 'new arrival', 'just for you',
-            'special price', 'limited time deal', 'seasonal offer', 'hot pick', 'high demand',
-
-            # Termes associés aux avantages
-            'bonus', 'gift', 'reward', 'thank you gift', 'free gift', 'surprise gift',
-            'gift card', 'loyalty program', 'rewards', 'exclusive access', 'premium access',
-            'early bird', 'VIP', 'gold member', 'bronze member', 'platinum member', 'premium',
-            'complimentary', 'members only', 'priority access', 'personalized', 'extra benefits',
-
-            # Appels à l'action
-            'buy now', 'shop now', 'get yours', 'order now', 'claim your', 'sign up', 'subscribe now',
-            'join now', 'click here', 'act fast', 'get yours today', 'register now', 'grab it now',
-            'don’t miss out', 'get started', 'limited offer', 'click to claim', 'add to cart',
-            'hurry', 'now or never', 'act quickly', 'exclusive access', 'get your discount',
-
-            # Mots relatifs à l'urgence
-            'hurry', 'limited time', 'last chance', 'ending soon', 'only a few left', 'only today',
-            'expiring soon', 'ending today', 'time is running out', 'closing soon', 'don’t wait',
-            'act fast', 'rush', 'quick', 'now', 'only hours left', 'final hours', 'only minutes left',
-
-            # Réductions et offres spéciales
-            'clearance sale', 'blowout sale', 'half price', 'discounted', 'price drop', 'half off',
-            'flash sale', 'buy one get one free', 'limited time discount', 'save big', 'final markdown',
-            'hot deal', 'massive discount', 'special deal', 'unbeatable price', 'low price',
-            'huge savings', 'lowest price', 'cut prices', 'discounts available', 'bulk discount',
-            'price slash', 'mega savings', 'one-time offer', 'special savings', 'today’s deal',
-
-            # Livraison et services associés
-            'free shipping', 'free delivery', 'fast shipping', 'same day delivery', 'expedited shipping',
-            'next day delivery', 'international shipping', 'worldwide shipping', 'free return',
-            'satisfaction guaranteed', 'no hidden fees', 'easy returns', 'return policy', 'free return shipping',
-
-            # Mentions de période de promotion
-            'Black Friday', 'Cyber Monday', 'Christmas Sale', 'New Year Sale', 'Holiday Discount',
-            'Summer Sale', 'Spring Offer', 'Back to School Sale', 'End of Year Sale', 'Seasonal Sale',
-            'Big Sale', 'Weekend Special', 'Flash Discount', 'Holiday Shopping', 'Easter Sale',
-            'Fall Offer', 'Thanksgiving Deal', 'Boxing Day Sale', 'Valentine’s Day Sale'
-        ]
+        # Un seul passage de l'automate pour les deux dictionnaires
+        keyword_counts = self.keyword_matcher.count(text)
 
         word_count = len(text.split())
-        keyword_count = sum(
-            1 for word in spam_keywords if word in text.lower())
+        keyword_count = keyword_counts['spam_keywords']
         keyword_ratio = keyword_count / word_count if word_count > 0 else 0
 
-        promo_word_count = sum(
-            1 for word in spam_keywords if word in text.lower())
+        # Le modèle déployé a été servi avec les mots-clés spam pour ces deux
+        # features : on conserve ces valeurs à l'identique
+        promo_word_count = keyword_count
         promo_word_ratio = keyword_count / word_count if word_count > 0 else 0
 
-        uppercase_ratio = sum(1 for char in text if char.isupper()) / len(text)
+        uppercase_ratio = sum(1 for char in text if char.isupper()) / len(text) if text else 0
 
         # Retourner toutes les features dans un dictionnaire
         features = {
@@ -174,3 +177,14 @@ class SpamPreprocessor:
         }
 
         return features
+
+    def get_other_features_batch(self, texts: list[str]):
+        """
+        Version par lots de get_other_features : une liste par feature,
+        une ligne par texte
+        """
+        features = {}
+        for text in texts:
+            for name, values in self.get_other_features(text).items():
+                features.setdefault(name, []).extend(values)
+        return features
@@ -0,0 +1,260 @@
+import random
+from collections import Counter
+import numpy as np
+
+# Écart maximal toléré entre le score compilé et predict_proba du pipeline
+PARITY_TOLERANCE = 1e-12
+
+
+class UnsupportedPipeline(ValueError):
+    """Pipeline que le compilateur ne sait pas reproduire (repli sur predict_proba)"""
+
+
+def _columns(spec, feature_names: list[str] | None) -> tuple[list[str], bool]:
+    """
+    Colonnes d'entrée d'un transformateur du ColumnTransformer et si la
+    sélection est scalaire (une seule colonne passée en 1-D, cas du texte)
+    """
+    if isinstance(spec, str):
+        return [spec], True
+    if isinstance(spec, (int, np.integer)):
+        if feature_names is None:
+            raise UnsupportedPipeline("Colonnes par position sans noms de features")
+        return [feature_names[spec]], True
+    spec = list(spec)
+    if all(isinstance(column, str) for column in spec):
+        return spec, False
+    if feature_names is not None and all(isinstance(column, (int, np.integer)) and not isinstance(column, bool)
+                                         for column in spec):
+        return [feature_names[column] for column in spec], False
+    raise UnsupportedPipeline(f"Sélection de colonnes non supportée: {spec!r}")
+
+
+class _TextBlock:
+    """CountVectorizer / TfidfVectorizer (ou CountVectorizer + TfidfTransformer)"""
+
+    def __init__(self, column: str, vectorizer, tfidf=None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        if isinstance(vectorizer, TfidfVectorizer):
+            tfidf = vectorizer._tfidf
+        if np.dtype(getattr(vectorizer, "dtype", np.float64)) not in (np.int64, np.float64):
+            raise UnsupportedPipeline("Vectoriseur en précision réduite")
+
+        self.column = column
+        self.width = len(vectorizer.vocabulary_)
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.binary = vectorizer.binary
+        self.sublinear_tf = tfidf is not None and tfidf.sublinear_tf
+        self.idf = tfidf.idf_ if tfidf is not None and tfidf.use_idf else None
+        self.norm = tfidf.norm if tfidf is not None else None
+        if self.norm not in (None, "l1", "l2"):
+            raise UnsupportedPipeline(f"Normalisation non supportée: {self.norm}")
+
+    def transform(self, texts: list[str]):
+        """Matrice CSR (une ligne par texte, colonnes triées), comme transform()"""
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+
+        indptr, indices, values = [0], [], []
+        for text in texts:
+            counts = Counter()
+            for feature in self.analyzer(text):
+                index = self.vocabulary.get(feature)
+                if index is not None:
+                    counts[index] += 1
+            for index in sorted(counts):
+                indices.append(index)
+                values.append(counts[index])
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.array(values, dtype=np.float64), np.array(indices, dtype=np.int32),
+             np.array(indptr, dtype=np.int64)),
+            shape=(len(texts), self.width))
+
+        # Opérations de TfidfTransformer, sur toutes les valeurs non nulles du lot
+        if self.binary:
+            matrix.data.fill(1)
+        if self.sublinear_tf:
+            np.log(matrix.data, matrix.data)
+            matrix.data += 1
+        if self.idf is not None:
+            matrix.data *= self.idf[matrix.indices]
+        if self.norm is not None and texts:
+            normalize(matrix, norm=self.norm, copy=False)
+        return matrix
+
+
+class _NumericBlock:
+    """Colonnes numériques : passthrough, StandardScaler, MinMaxScaler, MaxAbsScaler"""
+
+    def __init__(self, columns: list[str], transformer):
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import (FunctionTransformer, MaxAbsScaler, MinMaxScaler,
+                                           StandardScaler)
+        self.columns = columns
+        self.width = len(columns)
+        steps = [step for _, step in transformer.steps] \
+            if isinstance(transformer, Pipeline) else [transformer]
+
+        self.operations = []
+        for step in steps:
+            if step == "passthrough" or step is None:
+                continue
+            # remainder="passthrough" des versions récentes de scikit-learn
+            if isinstance(step, FunctionTransformer) and step.func is None:
+                continue
+            if isinstance(step, StandardScaler):
+                if step.with_mean:
+                    self.operations.append(("sub", step.mean_))
+                if step.with_std:
+                    self.operations.append(("div", step.scale_))
+            elif isinstance(step, MinMaxScaler):
+                self.operations.append(("mul", step.scale_))
+                self.operations.append(("add", step.min_))
+                if step.clip:
+                    self.operations.append(("clip", step.feature_range))
+            elif isinstance(step, MaxAbsScaler):
+                self.operations.append(("div", step.scale_))
+            else:
+                raise UnsupportedPipeline(f"Transformateur numérique non supporté: {step!r}")
+
+    def transform(self, features: dict[str, list]) -> np.ndarray:
+        values = np.array([features[column] for column in self.columns], dtype=np.float64).T
+        for operation, operand in self.operations:
+            if operation == "sub":
+                values -= operand
+            elif operation == "div":
+                values /= operand
+            elif operation == "mul":
+                values *= operand
+            elif operation == "add":
+                values += operand
+            else:
+                np.clip(values, operand[0], operand[1], out=values)
+        return values
+
+
+class CompiledSpamScorer:
+    """
+    Scoreur du pipeline joblib sans DataFrame ni ColumnTransformer : le
+    vocabulaire, l'idf, les paramètres des scalers et les poids du
+    classifieur linéaire (ou naïf bayésien multinomial) sont extraits au
+    chargement. Le lot entier devient une seule matrice (CSR s'il y a du
+    texte, comme la sortie de ColumnTransformer) et le score est un unique
+    produit X @ poids + biais, le même que celui du classifieur.
+    """
+
+    def __init__(self, pipeline):
+        from sklearn.compose import ColumnTransformer
+        from sklearn.feature_extraction.text import (CountVectorizer, TfidfTransformer)
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise UnsupportedPipeline("Pipeline attendu : ColumnTransformer puis classifieur")
+        preprocessor, classifier = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise UnsupportedPipeline(f"Prétraitement non supporté: {preprocessor!r}")
+        if len(classifier.classes_) != 2:
+            raise UnsupportedPipeline("Classifieur non binaire")
+
+        feature_names = list(getattr(preprocessor, "feature_names_in_", [])) or None
+        self.blocks = []
+        for _, transformer, spec in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            columns, scalar = _columns(spec, feature_names)
+            if not columns:
+                continue
+            text_steps = [step for _, step in transformer.steps] \
+                if isinstance(transformer, Pipeline) else [transformer]
+            if isinstance(text_steps[0], CountVectorizer):
+                if not scalar or len(text_steps) > 2 or (
+                        len(text_steps) == 2 and not isinstance(text_steps[1], TfidfTransformer)):
+                    raise UnsupportedPipeline(f"Branche texte non supportée: {transformer!r}")
+                self.blocks.append(_TextBlock(
+                    columns[0], text_steps[0], text_steps[1] if len(text_steps) == 2 else None))
+            else:
+                self.blocks.append(_NumericBlock(columns, transformer))
+        self.width = sum(block.width for block in self.blocks)
+        # Sortie creuse du ColumnTransformer dès qu'il y a une branche texte
+        self.sparse = any(isinstance(block, _TextBlock) for block in self.blocks)
+
+        if isinstance(classifier, MultinomialNB):
+            self.kind = "multinomial_nb"
+            self.weights = np.ascontiguousarray(classifier.feature_log_prob_.T)
+            self.bias = classifier.class_log_prior_
+        elif isinstance(classifier, (LogisticRegression, SGDClassifier)):
+            if isinstance(classifier, SGDClassifier) and classifier.loss != "log_loss":
+                raise UnsupportedPipeline(f"SGDClassifier sans probabilités: {classifier.loss}")
+            if getattr(classifier, "multi_class", "auto") not in ("auto", "ovr", "warn", "deprecated"):
+                raise UnsupportedPipeline("LogisticRegression multinomiale")
+            self.kind = "logistic"
+            self.weights = np.ascontiguousarray(classifier.coef_.T)
+            self.bias = classifier.intercept_
+        else:
+            raise UnsupportedPipeline(f"Classifieur non supporté: {type(classifier).__name__}")
+        if self.weights.shape[0] != self.width:
+            raise UnsupportedPipeline("Dimensions incohérentes entre features et poids")
+
+    def matrix(self, features: dict[str, list], messages: list[str]):
+        """Matrice d'entrée du classifieur pour le lot (colonnes dans l'ordre des blocs)"""
+        from scipy import sparse
+        blocks = [block.transform(messages) if isinstance(block, _TextBlock)
+                  else block.transform(features) for block in self.blocks]
+        if self.sparse:
+            return sparse.hstack(blocks, format="csr")
+        return np.hstack(blocks)
+
+    def decision(self, features: dict[str, list], messages: list[str]) -> np.ndarray:
+        """X @ poids + biais, une colonne par sortie du classifieur"""
+        return self.matrix(features, messages) @ self.weights + self.bias
+
+    def predict_proba(self, features: dict[str, list], messages: list[str]) -> np.ndarray:
+        """Probabilité de la classe spam (colonne 1 de predict_proba), une par texte"""
+        from scipy.special import expit, logsumexp
+        scores = self.decision(features, messages)
+        if self.kind == "logistic":
+            return expit(scores[:, 0])
+        log_probs = scores - np.atleast_2d(logsumexp(scores, axis=1)).T
+        return np.exp(log_probs)[:, 1]
+
+
+def parity_probes(scorer: CompiledSpamScorer, size: int = 64,
+                  seed: int = 0) -> tuple[dict[str, list], list[str]]:
+    """
+    Entrées de contrôle déterministes : textes tirés du vocabulaire (avec des
+    mots inconnus et des textes vides) et features numériques plausibles
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted({term for block in scorer.blocks if isinstance(block, _TextBlock)
+                         for term in block.vocabulary})
+    messages = ["", "zzzunknownzzz"]
+    while len(messages) < size:
+        words = rng.sample(vocabulary, min(len(vocabulary), rng.randint(1, 30)))
+        messages.append(" ".join(words + ["zzzunknownzzz"] * rng.randint(0, 2)))
+
+    columns = [column for block in scorer.blocks if isinstance(block, _NumericBlock)
+               for column in block.columns]
+    features = {column: [rng.choice([0, 0.0, rng.randint(0, 20), rng.random()])
+                         for _ in messages] for column in columns}
+    return features, messages
+
+
+def check_parity(scorer: CompiledSpamScorer, reference, size: int = 64) -> dict:
+    """
+    Compare le scoreur compilé au pipeline (reference(features, messages)
+    -> probabilités spam) sur les entrées de contrôle
+    """
+    features, messages = parity_probes(scorer, size)
+    expected = reference(features, messages)
+    compiled = scorer.predict_proba(features, messages)
+    difference = float(np.abs(compiled - expected).max())
+    return {
+        "probes": len(messages),
+        "max_abs_diff": difference,
+        "bit_identical": float(np.mean(compiled == expected)),
+        "ok": difference <= PARITY_TOLERANCE,
+    }
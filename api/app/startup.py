@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Référence de temps : import du premier module de l'application
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfile:
+    """
+    Profil de démarrage : durée et décalage de chaque phase (imports,
+    synchronisation des modèles, chargements) et temps jusqu'à l'état prêt
+    """
+
+    def __init__(self, origin: float = PROCESS_START):
+        self.origin = origin
+        self.time_to_ready: float | None = None
+        self._phases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, end: float):
+        with self._lock:
+            self._phases[name] = {
+                "start_offset_seconds": round(start - self.origin, 4),
+                "duration_seconds": round(end - start, 4),
+                "thread": threading.current_thread().name,
+            }
+
+    def phase(self, name: str, fn: Callable[[], Any]) -> Any:
+        """Exécute fn en l'enregistrant comme phase du démarrage"""
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def load_parallel(self, loaders: dict[str, Callable[[], Any]],
+                      max_workers: int | None = None) -> dict[str, Any]:
+        """
+        Exécute les chargements indépendants en parallèle (les imports et la
+        désérialisation des modèles libèrent en grande partie le GIL) ;
+        la première erreur est relevée une fois tous les chargements terminés
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or len(loaders),
+                                thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(self.phase, name, loader)
+                       for name, loader in loaders.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def mark_ready(self) -> float:
+        self.time_to_ready = time.perf_counter() - self.origin
+        return self.time_to_ready
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            phases = dict(sorted(self._phases.items(),
+                                 key=lambda item: item[1]["start_offset_seconds"]))
+        return {"time_to_ready_seconds": self.time_to_ready, "phases": phases}
+
+
+STARTUP_PROFILE = StartupProfile()
@@ -0,0 +1,186 @@
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+import emoji
+
+# Même table que bs4 (EntitySubstitution.HTML_ENTITY_TO_CHARACTER)
+ENTITY_TO_CHARACTER = {name.rstrip(";"): character for name, character in html5.items()}
+
+# Balises dont BeautifulSoup.get_text() ignore le contenu (Script,
+# Stylesheet, TemplateString, RubyTextString, RubyParenthesisString)
+SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# Balises qui terminent une ligne de texte (extraction par blocs)
+BLOCK_TAGS = frozenset({
+    "address", "article", "br", "dd", "div", "dl", "dt", "footer", "h1", "h2", "h3",
+    "h4", "h5", "h6", "header", "hr", "li", "ol", "p", "pre", "section", "table",
+    "td", "th", "tr", "ul",
+})
+
+# Éléments vides (HTMLTreeBuilder.empty_element_tags) : fermés dès l'ouverture
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+_SYMBOLS = re.compile(r"[^\w\s.,!?']")
+# Premier caractère possible d'un emoji : sans aucun d'eux, demojize ne change rien
+_EMOJI_START = frozenset(sequence[0] for sequence in emoji.EMOJI_DATA)
+_REPEATS = re.compile(r"(.)\1{2,}")
+
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    Extraction du texte en un passage de html.parser, sans construire
+    d'arbre : même texte que BeautifulSoup(text, "html.parser").get_text()
+    (entités, références numériques, CDATA ; commentaires, déclarations et
+    contenu de script/style/template ignorés), aux blancs près : bs4 réduit
+    les chaînes faites uniquement d'espaces à un espace ou un saut de ligne.
+
+    Pour les corps d'emails :
+    - hidden_tags remplace la liste des balises au contenu ignoré ; si elle
+      contient head, un <head> jamais fermé l'est à <body> ou au premier bloc
+    - block_newlines ajoute un saut de ligne autour des blocs (BLOCK_TAGS)
+    - hidden(tag, attrs) peut être redéfinie pour ignorer d'autres éléments
+    """
+
+    def __init__(self, hidden_tags: frozenset = SKIPPED_TEXT_TAGS, block_newlines: bool = False):
+        super().__init__(convert_charrefs=False)
+        self.hidden_tags = hidden_tags
+        self.block_newlines = block_newlines
+        self._parts: list[str] = []
+        self._open: list[str] = []
+        # Pour chaque balise ouverte : son contenu est-il ignoré
+        self._hidden: list[bool] = []
+        self._already_closed: list[str] = []
+        self._skipping = 0
+
+    def extract(self, markup: str) -> str:
+        self._parts, self._open, self._hidden, self._already_closed = [], [], [], []
+        self._skipping = 0
+        self.reset()
+        self.feed(markup)
+        self.close()
+        return "".join(self._parts)
+
+    def hidden(self, tag: str, attrs) -> bool:
+        """Le contenu de cet élément est-il ignoré"""
+        return tag in self.hidden_tags
+
+    def _newline(self, tag: str):
+        if self.block_newlines and tag in BLOCK_TAGS and not self._skipping:
+            self._parts.append("\n")
+
+    # Ouvertures et fermetures suivent BeautifulSoupHTMLParser (bs4 4.12) :
+    # c'est la pile des balises ouvertes qui décide si le texte est ignoré
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        if (tag == "body" or tag in BLOCK_TAGS) and "head" in self.hidden_tags \
+                and "head" in self._open:
+            # <head> jamais fermé : le corps commence ici
+            self.handle_endtag("head", check_already_closed=False)
+        hidden = self.hidden(tag, attrs)
+        self._open.append(tag)
+        self._hidden.append(hidden)
+        if hidden:
+            self._skipping += 1
+        else:
+            self._newline(tag)
+        if tag in VOID_TAGS and handle_empty_element:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed:
+            # Fermeture redondante d'un élément vide déjà fermé
+            self._already_closed.remove(tag)
+            return
+        # Ferme jusqu'à la dernière balise de ce nom, ignorée sinon
+        if tag not in self._open:
+            return
+        while True:
+            closed = self._open.pop()
+            if self._hidden.pop():
+                self._skipping -= 1
+            elif closed not in VOID_TAGS:
+                self._newline(closed)
+            if closed == tag:
+                return
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._parts.append(data)
+
+    def handle_entityref(self, name):
+        character = ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else "&%s" % name)
+
+    def handle_charref(self, name):
+        # Même interprétation que bs4 (windows-1252 sous 256)
+        if name.startswith("x"):
+            code = int(name.lstrip("x"), 16)
+        elif name.startswith("X"):
+            code = int(name.lstrip("X"), 16)
+        else:
+            code = int(name)
+
+        data = None
+        if code < 256:
+            try:
+                data = bytearray([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def unknown_decl(self, data):
+        # Les sections CDATA restent du texte, même dans script/style/template
+        if data.upper().startswith("CDATA["):
+            self._parts.append(data[len("CDATA["):])
+
+
+class BertTextCleaner:
+    """
+    Nettoyage des textes pour BERT en un passage par étape, identique à
+    emotions/roberta/functions.nettoyer_avant_bert :
+    - sans '<' ni '&', le texte ne passe pas par l'extracteur HTML
+    - emoji.demojize n'est appelé que si un caractère peut commencer un emoji
+    - retours à la ligne et tabulations sont absorbés par la normalisation
+      des espaces finale
+    strip_symbols reproduit l'ancien nettoyage de l'API, qui supprimait les
+    caractères hors [\\w\\s.,!?'] (et donc les emojis) avant demojize.
+    """
+
+    def __init__(self, strip_symbols: bool = False):
+        self.strip_symbols = strip_symbols
+        self._extractor = HtmlTextExtractor()
+
+    def html_to_text(self, text: str) -> str:
+        if "<" not in text and "&" not in text:
+            return text
+        return self._extractor.extract(text)
+
+    def clean(self, text: str) -> str:
+        if not text.isascii():
+            # Supprime les surrogates isolés (non encodables en UTF-8)
+            text = text.encode("utf-8", "ignore").decode("utf-8")
+        text = self.html_to_text(text)
+        if self.strip_symbols:
+            text = _SYMBOLS.sub("", text)
+        if not text.isascii() and not _EMOJI_START.isdisjoint(text):
+            text = emoji.demojize(text)
+        text = _REPEATS.sub(r"\1\1", text)
+        return " ".join(text.split())
+
+    def clean_batch(self, texts: list[str]) -> list[str]:
+        """Version par lots (jeux d'entraînement) : un seul extracteur réutilisé"""
+        return [self.clean(text) for text in texts]
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TranslationCache:
+    """
+    Cache des traductions à deux niveaux, indexé par langue source et hash du
+    texte normalisé :
+    - mémoire : LRU bornée avec expiration (TTL)
+    - disque (optionnel) : base SQLite qui survit aux redémarrages
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400,
+                 disk_path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+        # Statistiques
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            # WAL : écritures sans fsync bloquant à chaque traduction
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "DELETE FROM translations WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def key(source_lang: str, text: str) -> str:
+        """Clé : langue source + sha256 du texte aux espaces normalisés"""
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{source_lang}:{digest}"
+
+    def get(self, source_lang: str, text: str) -> str | None:
+        key = self.key(source_lang, text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return translation
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translation, expires_at FROM translations WHERE key = ?",
+                    (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, source_lang: str, text: str, translation: str):
+        key = self.key(source_lang, text)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, translation, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, expires_at) "
+                    "VALUES (?, ?, ?)", (key, translation, expires_at))
+                self._db.commit()
+
+    def _remember(self, key: str, translation: str, expires_at: float):
+        """Ajoute en mémoire en évinçant l'entrée la moins récemment utilisée (verrou requis)"""
+        self._memory[key] = (translation, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_enabled": self._db is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
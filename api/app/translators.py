@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from importlib import metadata
+from app.config.sentry import capture_exception
+
+logger = logging.getLogger(__name__)
+
+# Version de deep_translator dont GoogleTranslatorBackend reproduit la requête
+# et l'extraction (voir requirements.txt)
+SUPPORTED_DEEP_TRANSLATOR = "1.11.4"
+
+
+class TranslationError(Exception):
+    """Traduction impossible (échec, délai dépassé ou circuit ouvert)"""
+
+
+class TranslationSaturated(TranslationError):
+    """Aucun thread du pool libéré à temps : l'appel n'a pas atteint le moteur"""
+
+
+class TranslatorBackend:
+    """Interface des moteurs de traduction vers l'anglais"""
+    name = "base"
+    # Nombre de textes envoyés en un seul appel au moteur
+    max_batch_size = 1
+
+    def translate(self, text: str, source_lang: str) -> str:
+        raise NotImplementedError
+
+    def translate_batch(self, texts: list[str], source_lang: str) -> list[str]:
+        return [self.translate(text, source_lang) for text in texts]
+
+    def close(self):
+        pass
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """
+    Google Translate via deep_translator (une requête HTTP par texte).
+    deep_translator appelle requests.get sans délai ni session : pour la
+    version épinglée (SUPPORTED_DEEP_TRANSLATOR), la même requête passe ici
+    par une session dont l'adaptateur impose timeout_seconds, pour que le
+    thread du pool soit libéré à l'échéance au lieu de rester bloqué. Avec
+    une autre version, GoogleTranslator.translate est appelé tel quel.
+    """
+    name = "google"
+
+    def __init__(self, timeout_seconds: float = 3.0, max_connections: int = 8):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        class TimeoutHTTPAdapter(HTTPAdapter):
+            def send(self, request, **kwargs):
+                if kwargs.get("timeout") is None:
+                    kwargs["timeout"] = timeout_seconds
+                return super().send(request, **kwargs)
+
+        self.timeout_seconds = timeout_seconds
+        self.session = requests.Session()
+        adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        installed = metadata.version("deep-translator")
+        self.pooled = installed == SUPPORTED_DEEP_TRANSLATOR
+        if not self.pooled:
+            logger.warning(
+                "deep-translator %s installé (%s attendu) : requêtes sans session ni délai HTTP",
+                installed, SUPPORTED_DEEP_TRANSLATOR)
+
+    def translate(self, text: str, source_lang: str) -> str:
+        from deep_translator import GoogleTranslator
+        from deep_translator.constants import BASE_URLS
+        from deep_translator.exceptions import RequestError, TooManyRequests
+        from deep_translator.validate import is_input_valid
+
+        translator = GoogleTranslator(source=source_lang, target='en')
+        if not self.pooled:
+            return translator.translate(text)
+
+        # Même requête que GoogleTranslator.translate, par la session
+        is_input_valid(text, max_chars=5000)
+        text = text.strip()
+        if not text or translator.source == translator.target:
+            return text
+        params = {"tl": translator.target, "sl": translator.source, "q": text}
+        response = self.session.get(BASE_URLS["GOOGLE_TRANSLATE"], params=params)
+        try:
+            if response.status_code == 429:
+                raise TooManyRequests()
+            if not 200 <= response.status_code < 300:
+                raise RequestError()
+            return self.extract_translation(response.text, text)
+        finally:
+            response.close()
+
+    @staticmethod
+    def extract_translation(html: str, text: str) -> str:
+        """Traduction contenue dans la page de résultat (extraction de deep_translator)"""
+        from bs4 import BeautifulSoup
+        from deep_translator.exceptions import TranslationNotFound
+
+        soup = BeautifulSoup(html, "html.parser")
+        element = soup.find("div", {"class": "t0"}) \
+            or soup.find("div", {"class": "result-container"})
+        if not element:
+            raise TranslationNotFound(text)
+        # Une traduction identique au texte est renvoyée telle quelle : la
+        # seconde requête de deep_translator dans ce cas ne part qu'avec un
+        # paramètre "hl", que GoogleTranslator ne définit jamais
+        return element.get_text(strip=True)
+
+    def close(self):
+        self.session.close()
+
+
+class LocalTranslatorBackend(TranslatorBackend):
+    """
+    Moteur local déterministe pour les benchmarks et les tests : renvoie le
+    texte inchangé après une latence simulée (log-normale) et échoue sur une
+    fraction des textes, le tout dérivé du hash du texte pour être reproductible.
+    """
+    name = "local"
+    max_batch_size = 64
+
+    def __init__(self, latency_ms: float = 50.0, latency_sigma: float = 0.5,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    def _rng(self, text: str, source_lang: str) -> random.Random:
+        digest = hashlib.sha256(
+            f"{self.seed}:{source_lang}:{text}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def translate(self, text: str, source_lang: str) -> str:
+        rng = self._rng(text, source_lang)
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000 *
+                       rng.lognormvariate(0, self.latency_sigma))
+        if rng.random() < self.failure_rate:
+            raise TranslationError(f"Échec simulé ({source_lang})")
+        return text
+
+    def translate_batch(self, texts: list[str], source_lang: str) -> list[str]:
+        # Un aller-retour pour le lot : la latence est celle du texte le plus lent
+        rngs = [self._rng(text, source_lang) for text in texts]
+        if self.latency_ms > 0 and rngs:
+            time.sleep(self.latency_ms / 1000 *
+                       max(rng.lognormvariate(0, self.latency_sigma) for rng in rngs))
+        if any(rng.random() < self.failure_rate for rng in rngs):
+            raise TranslationError(f"Échec simulé ({source_lang})")
+        return list(texts)
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit : après failure_threshold échecs consécutifs, les appels
+    échouent immédiatement pendant reset_seconds, puis un seul appel d'essai
+    (semi-ouvert) décide de la refermeture.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """Libère l'essai semi-ouvert sans verdict (appel jamais parti)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                # (Ré)ouverture, y compris après un essai semi-ouvert raté
+                self._opened_at = time.monotonic()
+
+
+class ResilientTranslator:
+    """
+    Enveloppe un TranslatorBackend avec :
+    - un pool borné de connexions concurrentes (threads)
+    - un délai maximum par appel au moteur, compté à partir du démarrage de
+      l'appel dans le pool, et un budget de tentatives
+    - une attente bornée (queue_timeout_seconds) d'un thread libre : un appel
+      resté en file lève TranslationSaturated, sans compter comme un échec
+      du moteur pour le coupe-circuit
+    - un coupe-circuit
+    - des lots découpés selon max_batch_size et envoyés en parallèle
+    """
+
+    def __init__(self, backend: TranslatorBackend, deadline_seconds: float = 3.0,
+                 max_concurrency: int = 8, retries: int = 1,
+                 circuit_breaker: CircuitBreaker | None = None,
+                 queue_timeout_seconds: float | None = None):
+        self.backend = backend
+        self.deadline_seconds = deadline_seconds
+        self.queue_timeout_seconds = deadline_seconds if queue_timeout_seconds is None \
+            else queue_timeout_seconds
+        self.retries = retries
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix=f"translator-{backend.name}")
+        # Répartition des morceaux d'un lot, partagée entre les appels
+        self._fan_out = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix=f"translator-{backend.name}-batch")
+
+        # Statistiques, mises à jour depuis les threads de _fan_out
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.saturated = 0
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _start(self, fn, *args):
+        """
+        Soumet l'appel au pool et attend qu'un thread le prenne en charge ;
+        renvoie le future et l'instant de démarrage (départ du délai)
+        """
+        started = threading.Event()
+        started_at: list[float] = []
+
+        def run():
+            started_at.append(time.monotonic())
+            started.set()
+            return fn(*args)
+
+        try:
+            future = self._pool.submit(run)
+        except RuntimeError as e:
+            # Pool arrêté (fermeture du service)
+            raise TranslationSaturated("Pool de traduction arrêté") from e
+        if not started.wait(self.queue_timeout_seconds) and future.cancel():
+            raise TranslationSaturated(
+                f"Aucun thread de traduction libre en {self.queue_timeout_seconds}s")
+        # Pris en charge entre l'échéance et l'annulation
+        started.wait()
+        return future, started_at[0]
+
+    def _call(self, fn, *args):
+        """Appel au moteur avec délai, tentatives et coupe-circuit"""
+        last_error: Exception | None = None
+        for _ in range(self.retries + 1):
+            if not self.circuit_breaker.allow():
+                self._count("rejected")
+                raise TranslationError("Circuit de traduction ouvert") from last_error
+
+            try:
+                future, started_at = self._start(fn, *args)
+            except TranslationSaturated:
+                # Saturation locale : ni échec du moteur ni tentative
+                self._count("saturated")
+                self.circuit_breaker.release()
+                raise
+
+            self._count("calls")
+            try:
+                result = future.result(
+                    timeout=max(0.0, started_at + self.deadline_seconds - time.monotonic()))
+                self.circuit_breaker.record_success()
+                return result
+            except FutureTimeoutError as e:
+                self._count("timeouts")
+                last_error = e
+                # Tentative encore en cours (le moteur n'a pas rendu la main à
+                # l'échéance) : pas de nouvel appel qui occuperait un autre thread
+                if not future.done():
+                    self._count("failures")
+                    self.circuit_breaker.record_failure()
+                    raise TranslationError(
+                        f"Délai de {self.deadline_seconds}s dépassé, appel toujours en cours") from e
+            except Exception as e:
+                last_error = e
+            self._count("failures")
+            self.circuit_breaker.record_failure()
+
+        raise TranslationError(
+            f"Traduction impossible après {self.retries + 1} tentative(s)") from last_error
+
+    def translate(self, text: str, source_lang: str) -> str:
+        return self._call(self.backend.translate, text, source_lang)
+
+    def translate_batch(self, texts: list[str], source_lang: str) -> list[str | None]:
+        """
+        Traduit un lot ; les textes dont le morceau a échoué valent None
+        (l'appelant décide du mode dégradé)
+        """
+        size = max(1, self.backend.max_batch_size)
+        chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+        # Les morceaux partent en parallèle, chacun avec son propre délai
+        futures = [self._fan_out.submit(self._call, self.backend.translate_batch, chunk, source_lang)
+                   for chunk in chunks]
+        results: list[str | None] = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except TranslationError as e:
+                capture_exception(e, context={"source_lang": source_lang,
+                                              "count": len(chunk)})
+                results.extend([None] * len(chunk))
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "circuit_state": self.circuit_breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+    def close(self):
+        self._fan_out.shutdown(wait=False, cancel_futures=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.backend.close()
+
+
+def create_translator(settings) -> ResilientTranslator:
+    """Construit le traducteur configuré (TRANSLATOR_BACKEND=google|local)"""
+    if settings.translator_backend == "google":
+        backend: TranslatorBackend = GoogleTranslatorBackend(
+            timeout_seconds=settings.translator_deadline_seconds,
+            max_connections=settings.translator_max_concurrency
+        )
+    elif settings.translator_backend == "local":
+        backend = LocalTranslatorBackend(
+            latency_ms=settings.local_translator_latency_ms,
+            failure_rate=settings.local_translator_failure_rate
+        )
+    else:
+        raise ValueError(
+            f"Moteur de traduction inconnu: {settings.translator_backend}")
+
+    return ResilientTranslator(
+        backend,
+        deadline_seconds=settings.translator_deadline_seconds,
+        max_concurrency=settings.translator_max_concurrency,
+        retries=settings.translator_retries,
+        queue_timeout_seconds=settings.translator_queue_timeout_seconds,
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=settings.translator_circuit_failure_threshold,
+            reset_seconds=settings.translator_circuit_reset_seconds
+        )
+    )
@@ -0,0 +1,67 @@
+import time
+from typing import Awaitable, Callable
+
+# Texte anglais représentatif (HTML, lien, ponctuation, emoji) : pas de
+# traduction, mais toutes les branches du nettoyage sont parcourues
+WARMUP_SENTENCE = ("Hello team, <b>thank you</b> for the quick reply! Please find the "
+                   "updated offer at https://example.com/offer and call me back today :) ")
+
+
+def synthetic_text(length: int) -> str:
+    """Texte synthétique d'environ length caractères, coupé sur un espace"""
+    repeats = length // len(WARMUP_SENTENCE) + 1
+    text = (WARMUP_SENTENCE * repeats)[:length]
+    cut = text.rfind(" ")
+    return text[:cut] if cut > 0 else text
+
+
+class Warmup:
+    """
+    Passe de préchauffage avant l'état prêt : des textes de longueurs
+    représentatives traversent toutes les étapes (traçage des graphes TF par
+    forme d'entrée, caches du tokenizer, initialisation paresseuse de spaCy,
+    démarrage des workers du pool CPU), à l'unité puis en lot.
+    """
+
+    def __init__(self, predict: Callable[[str], Awaitable],
+                 predict_batch: Callable[[list[str]], Awaitable],
+                 warm_cpu_workers: Callable[[str], Awaitable] | None = None,
+                 text_lengths: list[int] | None = None, rounds: int = 1):
+        self.predict = predict
+        self.predict_batch = predict_batch
+        self.warm_cpu_workers = warm_cpu_workers
+        self.text_lengths = text_lengths or [64, 256, 512, 1024, 4096]
+        self.rounds = max(1, rounds)
+        self.report: dict | None = None
+
+    async def run(self) -> dict:
+        start = time.perf_counter()
+        texts = [synthetic_text(length) for length in self.text_lengths]
+
+        if self.warm_cpu_workers is not None:
+            step = time.perf_counter()
+            await self.warm_cpu_workers(texts[0])
+            cpu_workers_ms = (time.perf_counter() - step) * 1000
+        else:
+            cpu_workers_ms = None
+
+        per_length_ms: dict[int, list[float]] = {length: [] for length in self.text_lengths}
+        for _ in range(self.rounds):
+            for length, text in zip(self.text_lengths, texts):
+                step = time.perf_counter()
+                await self.predict(text)
+                per_length_ms[length].append(round((time.perf_counter() - step) * 1000, 1))
+
+        step = time.perf_counter()
+        await self.predict_batch(texts)
+        batch_ms = (time.perf_counter() - step) * 1000
+
+        self.report = {
+            "duration_seconds": round(time.perf_counter() - start, 3),
+            "cpu_workers_ms": round(cpu_workers_ms, 1) if cpu_workers_ms is not None else None,
+            # Première passe (froide) puis suivantes : l'écart mesure le gain du préchauffage
+            "per_length_ms": per_length_ms,
+            "batch_ms": round(batch_ms, 1),
+        }
+        return self.report
+
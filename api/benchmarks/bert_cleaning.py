@@ -0,0 +1,105 @@
+"""
+Compare le nettoyage BERT fusionné (BertTextCleaner) aux nettoyages à base
+de BeautifulSoup : parité avec emotions/roberta/functions.nettoyer_avant_bert
+(nettoyage d'entraînement) et avec l'ancien nettoyage de l'API
+(strip_symbols=True), puis temps par texte.
+
+Les textes de more_emotions.csv sont complétés par des emails HTML
+(balises, entités, script/style, emojis) et par des fragments de balisage
+aléatoires pour couvrir les cas limites de html.parser.
+
+Usage (depuis api/) :
+    python -m benchmarks.bert_cleaning --limit 5000 --fuzz 20000
+"""
+import argparse
+import importlib.util
+import os
+import random
+import re
+import time
+import emoji
+import pandas as pd
+from bs4 import BeautifulSoup
+from app.text_cleaning import BertTextCleaner
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+DEFAULT_DATASET = os.path.join(ROOT, "emotions", "roberta", "source_data", "more_emotions.csv")
+TRAINING_FUNCTIONS = os.path.join(ROOT, "emotions", "roberta", "functions.py")
+
+HTML_TEMPLATE = ("<html><head><style>p {{ color: red; }}</style></head><body>"
+                 "<p>Hello <b>team</b>,</p><p>{text}</p><script>track('open');</script>"
+                 "<p>Thanks &amp; regards &#128522;<br>Support</p></body></html>")
+
+FRAGMENTS = [
+    "<b>", "</b>", "<p>", "</p>", "<br>", "<br/>", "</br>", "<script>var a = '<b>x</b>';</script>",
+    "<style>p {}</style>", "<template>", "</template>", "<rt>", "</rt>", "<rp>(</rp>",
+    "<!-- note -->", "<!DOCTYPE html>", "<![CDATA[data]]>", "&amp;", "&nbsp;", "&foo;", "AT&T",
+    "&#65;", "&#x1F600;", "&#150;", "&#129;", "&#9999999;", "a<3", "< b", "\n", "\t", "\r\n",
+    "   ", "hello", "soooo", "!!!!", "😊", "👍🏽", "🇫🇷", "©", "é", " ", "<img src=x>", "'",
+]
+
+
+def legacy_clean(text: str) -> str:
+    """Ancien nettoyage de l'API : caractères hors [\\w\\s.,!?'] supprimés avant demojize"""
+    text = text.encode('utf-8', 'ignore').decode('utf-8')
+    text = BeautifulSoup(text, "html.parser").get_text()
+    text = re.sub(r"[\n\t\r]", " ", text)
+    text = re.sub(r"[^\w\s.,!?']", "", text)
+    text = emoji.demojize(text)
+    text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+    return " ".join(text.split())
+
+
+def load_training_cleaner():
+    spec = importlib.util.spec_from_file_location("roberta_functions", TRAINING_FUNCTIONS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.nettoyer_avant_bert
+
+
+def fuzz_texts(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 25)))
+            for _ in range(count)]
+
+
+def compare(name: str, reference, cleaner: BertTextCleaner, texts: list[str]):
+    start = time.perf_counter()
+    expected = [reference(text) for text in texts]
+    reference_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    cleaned = cleaner.clean_batch(texts)
+    fused_seconds = time.perf_counter() - start
+
+    mismatches = [text for text, a, b in zip(texts, cleaned, expected) if a != b]
+    print(f"{name:<30} écarts: {len(mismatches)}/{len(texts)}  "
+          f"référence: {reference_seconds * 1e6 / len(texts):.1f} µs/texte  "
+          f"fusionné: {fused_seconds * 1e6 / len(texts):.1f} µs/texte  "
+          f"(x{reference_seconds / fused_seconds:.1f})")
+    for text in mismatches[:3]:
+        print(f"    {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.dataset, sep=";").dropna()["text"].astype(str).head(args.limit).tolist()
+    corpora = {
+        "texte brut": texts,
+        "emails HTML": [HTML_TEMPLATE.format(text=text) for text in texts],
+        "fragments aléatoires": fuzz_texts(args.fuzz),
+    }
+
+    training = load_training_cleaner()
+    for corpus, data in corpora.items():
+        print(f"--- {corpus}")
+        compare("nettoyer_avant_bert", training, BertTextCleaner(), data)
+        compare("ancien nettoyage API", legacy_clean, BertTextCleaner(strip_symbols=True), data)
+
+
+if __name__ == "__main__":
+    main()
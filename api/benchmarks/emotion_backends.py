@@ -0,0 +1,87 @@
+"""
+Compare les moteurs d'inférence des émotions (TensorFlow, ONNX, ONNX int8) :
+exactitude sur le jeu étiqueté, accord avec TensorFlow, latence par lot et
+temps CPU par message.
+
+Les étiquettes absentes des classes du modèle (love) sont ignorées pour
+l'exactitude.
+
+Usage (depuis api/) :
+    python -m benchmarks.emotion_backends --limit 2000 --batch-size 16 \
+        --onnx models/emotions.onnx models/emotions.int8.onnx
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from app.emotion_backends import OnnxEmotionBackend, TensorFlowEmotionBackend
+from app.sentiment_model import SentimentModel
+from app.sentiment_preprocess import SentimentPreprocessor
+
+DEFAULT_DATASET = os.path.join(
+    os.path.dirname(__file__), "..", "..", "emotions", "roberta", "source_data", "more_emotions.csv")
+
+
+def run(model: SentimentModel, texts: list[str], batch_size: int) -> tuple[np.ndarray, dict]:
+    # Un lot de chauffe : traçage des graphes et allocation des sessions
+    model._predict_probs(texts[:batch_size])
+
+    probs, latencies = [], []
+    cpu_start = time.process_time()
+    for start in range(0, len(texts), batch_size):
+        step = time.perf_counter()
+        probs.append(model._predict_probs(texts[start:start + batch_size]))
+        latencies.append(time.perf_counter() - step)
+    cpu_seconds = time.process_time() - cpu_start
+    latencies = np.array(latencies) * 1000
+    return np.concatenate(probs), {
+        "cpu_ms_per_message": cpu_seconds * 1000 / len(texts),
+        "batch_p50_ms": np.percentile(latencies, 50),
+        "batch_p99_ms": np.percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--saved-model", default="models/emotions")
+    parser.add_argument("--onnx", nargs="*", default=["models/emotions.onnx",
+                                                      "models/emotions.int8.onnx"])
+    parser.add_argument("--threads", type=int, default=None,
+                        help="intra_op_num_threads des sessions ONNX")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.dataset, sep=";").dropna().head(args.limit)
+    preprocessor = SentimentPreprocessor()
+    texts = preprocessor.clean_texts_for_bert(data["text"].astype(str).tolist())
+    labels = data["emotion"].tolist()
+
+    backends = [TensorFlowEmotionBackend(args.saved_model)] + [
+        OnnxEmotionBackend(path, intra_op_threads=args.threads)
+        for path in args.onnx if os.path.exists(path)]
+
+    reference_probs, reference_cpu = None, None
+    print(f"{len(texts)} textes, lots de {args.batch_size}")
+    for backend in backends:
+        model = SentimentModel(backend=backend)
+        probs, timings = run(model, texts, args.batch_size)
+        predicted = [model.emotions[i] for i in probs.argmax(axis=1)]
+        scored = [(p, l) for p, l in zip(predicted, labels) if l in model.emotions]
+        accuracy = np.mean([p == l for p, l in scored])
+
+        if reference_probs is None:
+            reference_probs, reference_cpu = probs, timings["cpu_ms_per_message"]
+        agreement = np.mean(probs.argmax(axis=1) == reference_probs.argmax(axis=1))
+        print(f"{backend.name:<10} {os.path.basename(backend.path):<22} "
+              f"exactitude: {accuracy:.4f}  accord TF: {agreement:.4f}  "
+              f"écart max: {np.abs(probs - reference_probs).max():.4f}  "
+              f"CPU: {timings['cpu_ms_per_message']:.2f} ms/message "
+              f"(x{reference_cpu / timings['cpu_ms_per_message']:.2f})  "
+              f"lot p50: {timings['batch_p50_ms']:.1f} ms  p99: {timings['batch_p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare la détection de langue historique (langdetect.detect sur le texte
+complet) au LanguageDetector : exactitude, latence et déterminisme.
+
+Le jeu more_emotions.csv est entièrement en anglais : l'exactitude est la
+part de textes détectés 'en'. --concat regroupe N textes consécutifs pour
+simuler des emails longs.
+
+Usage (depuis api/) :
+    python -m benchmarks.language_detection --limit 5000 --concat 1
+    python -m benchmarks.language_detection --limit 2000 --concat 20
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from langdetect import detect
+from app.language_detection import LanguageDetector
+
+DEFAULT_DATASET = os.path.join(
+    os.path.dirname(__file__), "..", "..", "emotions", "roberta", "source_data", "more_emotions.csv")
+
+
+def run(name: str, fn, texts: list[str]) -> list[str]:
+    predictions, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        try:
+            predictions.append(fn(text))
+        except Exception:
+            predictions.append("error")
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    accuracy = np.mean([lang == "en" for lang in predictions])
+    print(f"{name:<18} exactitude: {accuracy:.4f}  moyenne: {latencies.mean():.3f} ms  "
+          f"p50: {np.percentile(latencies, 50):.3f} ms  p99: {np.percentile(latencies, 99):.3f} ms")
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--concat", type=int, default=1)
+    parser.add_argument("--max-chars", type=int, default=1000)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.dataset, sep=";")["text"].dropna().astype(str).tolist()
+    texts = texts[:args.limit * args.concat]
+    texts = [" ".join(texts[i:i + args.concat]) for i in range(0, len(texts), args.concat)]
+    print(f"{len(texts)} textes, longueur moyenne {np.mean([len(t) for t in texts]):.0f} caractères")
+
+    detector = LanguageDetector(max_chars=args.max_chars)
+    legacy = run("langdetect.detect", detect, texts)
+    engine = run("LanguageDetector", lambda text: detector.detect(text)[0], texts)
+
+    # Déterminisme : deux passes identiques
+    legacy_again = [detect(text) for text in texts]
+    engine_again = [detector.detect(text)[0] for text in texts]
+    print(f"résultats différents entre deux passes - langdetect: "
+          f"{sum(a != b for a, b in zip(legacy, legacy_again))}  "
+          f"LanguageDetector: {sum(a != b for a, b in zip(engine, engine_again))}")
+
+
+if __name__ == "__main__":
+    main()
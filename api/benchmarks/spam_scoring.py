@@ -0,0 +1,65 @@
+"""
+Compare le scoreur spam compilé au pipeline joblib (DataFrame +
+predict_proba) sur spam.csv : parité des probabilités (écart maximal et part
+de valeurs identiques au bit près) et latence à l'unité et par lots.
+
+Usage (depuis api/) :
+    python -m benchmarks.spam_scoring --limit 2000 --batch-size 32
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from app.spam_model import SpamModel
+from app.spam_preprocess import SpamPreprocessor
+
+DEFAULT_DATASET = os.path.join(
+    os.path.dirname(__file__), "..", "..", "spam", "source_data", "spam.csv")
+
+
+def slices(features: dict, messages: list[str], size: int):
+    for start in range(0, len(messages), size):
+        yield ({name: values[start:start + size] for name, values in features.items()},
+               messages[start:start + size])
+
+
+def timed(name: str, fn, features: dict, messages: list[str], size: int) -> np.ndarray:
+    probs, latencies = [], []
+    for chunk_features, chunk_messages in slices(features, messages, size):
+        start = time.perf_counter()
+        probs.append(fn(chunk_features, chunk_messages))
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<10} lots de {size:<4} moyenne: {latencies.mean():.3f} ms  "
+          f"p50: {np.percentile(latencies, 50):.3f} ms  p99: {np.percentile(latencies, 99):.3f} ms")
+    return np.concatenate(probs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.dataset).dropna().head(args.limit)
+    texts = data["Message"].astype(str).tolist()
+    preprocessor = SpamPreprocessor()
+    features = preprocessor.get_other_features_batch(texts)
+    messages = preprocessor.clean_texts(texts)
+
+    model = SpamModel(compiled=True)
+    print(f"{len(texts)} textes, scoreur compilé: {model.scorer_status}")
+    if model.scorer is None:
+        return
+
+    for size in (1, args.batch_size):
+        expected = timed("pipeline", model._pipeline_proba, features, messages, size)
+        compiled = timed("compilé", model.scorer.predict_proba, features, messages, size)
+        print(f"           écart max: {np.abs(compiled - expected).max():.3g}  "
+              f"identiques: {np.mean(compiled == expected):.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Latence de traduction hors ligne avec le moteur local déterministe.
+
+Usage (depuis api/) :
+    python -m benchmarks.translation_latency --requests 2000 --concurrency 32 \
+        --latency-ms 80 --failure-rate 0.02 --deadline 0.5
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.language_service import LanguageService
+from app.translators import CircuitBreaker, LocalTranslatorBackend, ResilientTranslator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--deadline", type=float, default=3.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    translator = ResilientTranslator(
+        LocalTranslatorBackend(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                               failure_rate=args.failure_rate, seed=args.seed),
+        deadline_seconds=args.deadline,
+        max_concurrency=args.max_concurrency,
+        retries=args.retries,
+        circuit_breaker=CircuitBreaker(failure_threshold=10**9)
+    )
+    service = LanguageService(translator=translator, degraded_fallback=True)
+    texts = [f"message numéro {i}" for i in range(args.requests)]
+
+    def timed(text: str) -> float:
+        start = time.perf_counter()
+        service.translate_to_english(text, "fr")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(timed, texts))) * 1000
+    elapsed = time.perf_counter() - start
+    translator.close()
+
+    print(f"requêtes: {args.requests}  concurrence: {args.concurrency}  "
+          f"débit: {args.requests / elapsed:.1f} req/s")
+    for q in (50, 90, 95, 99):
+        print(f"p{q}: {np.percentile(latencies, q):.1f} ms")
+    print(f"max: {latencies.max():.1f} ms")
+    print(service.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les tests importent le paquet app depuis api/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
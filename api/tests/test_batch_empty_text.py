@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from app.executors import InferenceExecutors
+from app.keyword_matcher import DEFAULT_KEYWORDS_PATH, KeywordMatcher
+from app.language_service import LanguageResult
+from app.services import SPAM_TARGETS, ServicesContainer
+from app.spam_preprocess import ComponentTimings, SpamPreprocessor
+
+
+def spam_preprocessor() -> SpamPreprocessor:
+    """SpamPreprocessor sans spaCy : features réelles, nettoyage réduit aux regex"""
+    preprocessor = SpamPreprocessor.__new__(SpamPreprocessor)
+    preprocessor.keyword_matcher = KeywordMatcher.from_file(DEFAULT_KEYWORDS_PATH)
+    preprocessor.clean_texts = lambda texts, timings=None: [
+        SpamPreprocessor.pre_clean(text) for text in texts]
+    return preprocessor
+
+
+class EnglishOnly:
+    def process_texts(self, texts):
+        return [LanguageResult("en", 0.99, text, False) for text in texts]
+
+
+class LengthSpamModel:
+    def score_batch(self, features, messages):
+        assert len(features["uppercase_ratio"]) == len(messages)
+        return [(0.9 if ratio > 0.5 else 0.1, ratio > 0.5) for ratio in features["uppercase_ratio"]]
+
+
+@pytest.fixture
+def services():
+    container = ServicesContainer()
+    container.language_service = EnglishOnly()
+    container.spam_model = LengthSpamModel()
+    container.spacy_timings = ComponentTimings()
+    container.executors = InferenceExecutors(
+        cpu_mode="thread", spam_preprocessor=spam_preprocessor(), sentiment_preprocessor=None)
+    container.batch_pipeline = container.build_pipeline(single=False)
+    yield container
+    container.executors.shutdown()
+
+
+def test_features_of_empty_text():
+    features = spam_preprocessor().get_other_features_batch(["", "WIN NOW"])
+    assert features["uppercase_ratio"] == [0, 6 / 7]
+    assert features["keyword_ratio"][0] == 0
+
+
+def test_batch_with_empty_text(services):
+    texts = ["FREE PRIZE CALL NOW", "", "see you tomorrow"]
+    rows = asyncio.run(services.run_pipeline(texts, SPAM_TARGETS))
+    assert [row["text"] for row in rows] == texts
+    assert [row["is_spam"] for row in rows] == [True, False, False]
@@ -0,0 +1,57 @@
+import csv
+import pytest
+from tools.bulk_score import ResultWriter, _last_newlines, resume_offset
+
+
+def records(start: int, count: int) -> list[dict]:
+    return [{"offset": offset, "text": f"ligne {offset}\nsuite \\ fin\r\n",
+             "emotion": "joy", "emotion_scores": {"joy": 0.9, "sadness": 0.1},
+             "spam_score": 0.1, "is_spam": False}
+            for offset in range(start, start + count)]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_resume_after_last_complete_record(tmp_path, fmt):
+    path = str(tmp_path / f"scores.{fmt}")
+    assert resume_offset(path, fmt) is None
+
+    writer = ResultWriter(path, fmt, append=False)
+    writer.write(records(10, 3))
+    writer.close()
+    assert resume_offset(path, fmt) == 13
+
+    # Arrêt pendant l'écriture : la ligne tronquée est supprimée
+    with open(path, "ab") as output:
+        output.write(b'13,"ligne 13')
+    assert resume_offset(path, fmt) == 13
+    writer = ResultWriter(path, fmt, append=True)
+    writer.write(records(13, 2))
+    writer.close()
+    assert resume_offset(path, fmt) == 15
+
+
+def test_csv_records_are_single_lines(tmp_path):
+    path = str(tmp_path / "scores.csv")
+    writer = ResultWriter(path, "csv", append=False)
+    writer.write(records(0, 2))
+    writer.close()
+    with open(path, newline="", encoding="utf-8") as output:
+        lines = output.read().splitlines()
+    assert len(lines) == 3
+    rows = list(csv.DictReader(lines))
+    assert rows[0]["text"] == "ligne 0\\nsuite \\\\ fin\\r\\n"
+    assert rows[1]["emotion_sadness"] == "0.1"
+
+
+def test_header_only_csv(tmp_path):
+    path = tmp_path / "scores.csv"
+    path.write_text("offset,text\r\n")
+    assert resume_offset(str(path), "csv") is None
+
+
+def test_last_newlines_across_blocks(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"a" * 10 + b"\n" + b"b" * 25 + b"\n" + b"c" * 7)
+    with open(path, "rb") as file:
+        assert _last_newlines(file, 2, block_size=4) == [36, 10]
+        assert _last_newlines(file, 5, block_size=4) == [36, 10]
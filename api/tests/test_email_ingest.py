@@ -0,0 +1,67 @@
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+import pytest
+from app.email_ingest import EmailTextExtractor, HtmlBodyExtractor
+
+
+def parsed(message: EmailMessage):
+    return BytesParser(policy=policy.default).parsebytes(message.as_bytes())
+
+
+def html_email(html: str, plain: str | None = None) -> bytes:
+    message = EmailMessage()
+    message["Subject"] = "Offre"
+    if plain is not None:
+        message.set_content(plain)
+        message.add_alternative(html, subtype="html")
+    else:
+        message.set_content(html, subtype="html")
+    return message.as_bytes()
+
+
+@pytest.mark.parametrize("markup", [
+    "<html><head><title>Newsletter</title><style>p {}</style><body><p>Visible text</p>",
+    "<html><head><meta charset=utf-8><title>Newsletter</title><div>Visible text</div>",
+    "<head><title>Newsletter</title></head><p>Visible text</p>",
+])
+def test_unclosed_head(markup):
+    assert HtmlBodyExtractor().extract(markup).split() == ["Visible", "text"]
+
+
+def test_quoted_history_is_removed():
+    extractor = HtmlBodyExtractor()
+    text = extractor.extract('<p>Reply</p><div class="gmail_quote">On Monday, Bob wrote:'
+                             '<blockquote>Original</blockquote></div><p>Bye</p>')
+    assert text.split() == ["Reply", "Bye"]
+    assert extractor.quoted
+
+
+def test_blank_plain_part_falls_back_to_html():
+    email = EmailTextExtractor().extract(html_email("<p>Réel contenu</p>", plain="  \n"))
+    assert (email.text, email.body_type) == ("Réel contenu", "text/html")
+
+
+@pytest.mark.parametrize("cte", ["8bit", "base64", "quoted-printable", "7bit"])
+@pytest.mark.parametrize("charset", ["utf-8", "latin-1"])
+def test_payload_prefix_matches_full_decoding(cte, charset):
+    # Contenu non ASCII en 8bit : dépend de la représentation interne de
+    # Message (_payload), à revoir si la bibliothèque standard change
+    body = "Énorme promo à saisir : café, thé, crème brûlée ! " * 40
+    if cte == "7bit":
+        body = body.encode("ascii", "ignore").decode()
+    message = EmailMessage()
+    message.set_content(body, charset=charset, cte=cte)
+    part = parsed(message)
+    full = part.get_payload(decode=True)
+    for size in (0, 1, 3, 4, 76, 77, 500, len(full), len(full) + 10):
+        assert EmailTextExtractor.payload_prefix(part, size) == full[:size]
+
+
+def test_8bit_body_is_decoded():
+    message = EmailMessage()
+    message["Subject"] = "Été"
+    message.set_content("Bonjour, voici l'offre de l'été à 50 € !", cte="8bit")
+    email = EmailTextExtractor().extract(message.as_bytes())
+    assert email.text == "Bonjour, voici l'offre de l'été à 50 € !"
+    assert email.subject == "Été"
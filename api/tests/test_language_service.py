@@ -0,0 +1,60 @@
+from app.language_service import LanguageResult, LanguageService
+from app.translators import ResilientTranslator, TranslatorBackend
+
+
+class FixedDetector:
+    def __init__(self, detections: dict[str, tuple[str, float]]):
+        self.detections = detections
+
+    def detect(self, text: str) -> tuple[str, float]:
+        return self.detections[text]
+
+
+class UpperBackend(TranslatorBackend):
+    name = "upper"
+    max_batch_size = 8
+
+    def translate(self, text: str, source_lang: str) -> str:
+        if text == "échec":
+            raise RuntimeError("moteur indisponible")
+        return text.upper()
+
+
+DETECTIONS = {
+    "hello there": ("en", 0.99),
+    "bonjour": ("fr", 0.95),
+    "salut": ("fr", 0.4),
+    "échec": ("fr", 0.9),
+}
+
+
+def service(min_confidence: float = 0.0) -> LanguageService:
+    translator = ResilientTranslator(UpperBackend(), deadline_seconds=1.0, retries=0)
+    return LanguageService(translator=translator, detector=FixedDetector(DETECTIONS),
+                           min_confidence=min_confidence)
+
+
+def test_low_confidence_is_translated_by_default():
+    language = service()
+    assert language.process_text("salut") == LanguageResult("fr", 0.4, "SALUT", True)
+    assert language.process_texts(["hello there", "bonjour", "salut"]) == [
+        LanguageResult("en", 0.99, "hello there", False),
+        LanguageResult("fr", 0.95, "BONJOUR", True),
+        LanguageResult("fr", 0.4, "SALUT", True),
+    ]
+
+
+def test_below_threshold_is_not_reported_as_translated():
+    language = service(min_confidence=0.7)
+    assert language.process_text("salut") == LanguageResult("fr", 0.4, "salut", False)
+    assert language.process_texts(["bonjour", "salut"]) == [
+        LanguageResult("fr", 0.95, "BONJOUR", True),
+        LanguageResult("fr", 0.4, "salut", False),
+    ]
+
+
+def test_failed_translation_is_not_reported_as_translated():
+    language = service()
+    assert language.process_text("échec") == LanguageResult("fr", 0.9, "échec", False)
+    assert language.process_texts(["échec"]) == [LanguageResult("fr", 0.9, "échec", False)]
+    assert language.degraded == 2
@@ -0,0 +1,62 @@
+import pytest
+from app.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def samples(registry: MetricsRegistry) -> dict[str, str]:
+    return dict(line.rsplit(" ", 1) for line in registry.render().splitlines()
+                if not line.startswith("#"))
+
+
+def test_histogram_le_bucketing():
+    registry = MetricsRegistry()
+    histogram = Histogram("latency_seconds", "Latence", buckets=(0.5, 0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.1000001, 0.5, 1.0, 7.0):
+        histogram.observe(value)
+    values = samples(registry)
+    # Bornes triées ; une valeur égale à une borne compte dans son bucket (le = <=)
+    assert values['latency_seconds_bucket{le="0.1"}'] == "2"
+    assert values['latency_seconds_bucket{le="0.5"}'] == "4"
+    assert values['latency_seconds_bucket{le="1.0"}'] == "5"
+    assert values['latency_seconds_bucket{le="+Inf"}'] == "6"
+    assert values["latency_seconds_count"] == "6"
+    assert float(values["latency_seconds_sum"]) == pytest.approx(8.7500001)
+
+
+def test_labelled_series():
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requêtes", ("path", "status"), registry=registry)
+    requests.labels("/predict", "200").inc()
+    requests.labels("/predict", "200").inc(2)
+    requests.labels('/a"b\\c', "500").inc()
+    sizes = Histogram("batch_size", "Lots", ("kind",), buckets=(1, 8), registry=registry)
+    sizes.labels("predict").observe(8)
+    values = samples(registry)
+    assert values['requests_total{path="/predict",status="200"}'] == "3.0"
+    assert values['requests_total{path="/a\\"b\\\\c",status="500"}'] == "1.0"
+    assert values['batch_size_bucket{kind="predict",le="1.0"}'] == "0"
+    assert values['batch_size_bucket{kind="predict",le="8.0"}'] == "1"
+    with pytest.raises(ValueError):
+        requests.labels("/predict")
+
+
+def test_gauge_and_callback():
+    registry = MetricsRegistry()
+    in_flight = Gauge("in_flight", "En cours", registry=registry)
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    ratio = Gauge("hit_ratio", "Succès", ("cache",), registry=registry)
+    stats = {"hit_rate": 0.25}
+    ratio.labels("prediction").set_function(lambda: stats["hit_rate"])
+    stats["hit_rate"] = 0.75
+    values = samples(registry)
+    assert values["in_flight"] == "1.0"
+    assert values['hit_ratio{cache="prediction"}'] == "0.75"
+    assert "# TYPE in_flight gauge" in registry.render()
+
+
+def test_duplicate_registration():
+    registry = MetricsRegistry()
+    Counter("requests_total", "Requêtes", registry=registry)
+    with pytest.raises(ValueError):
+        Gauge("requests_total", "Doublon", registry=registry)
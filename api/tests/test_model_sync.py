@@ -0,0 +1,103 @@
+import os
+import pytest
+from app.model_sync import LocalContainerClient, ModelSync, _LocalDownload
+
+
+class CountingContainer(LocalContainerClient):
+    """Compte les téléchargements ; corrupted : contenu reçu différent du MD5 annoncé"""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.downloads: list[str] = []
+        self.corrupted = False
+
+    def get_blob_client(self, blob_name: str):
+        self.downloads.append(blob_name)
+        client = super().get_blob_client(blob_name)
+        if self.corrupted:
+            download = client.download_blob()
+            client.download_blob = lambda **kwargs: CorruptedDownload(download.path)
+        return client
+
+
+class CorruptedDownload(_LocalDownload):
+    def chunks(self):
+        yield b"corrupted"
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "container"
+    (root / "models" / "spam").mkdir(parents=True)
+    (root / "models" / "spam.joblib").write_bytes(b"spam v1")
+    (root / "models" / "spam" / "vocab.json").write_bytes(b'{"free": 1}')
+    return root
+
+
+def synced(tmp_path, container) -> tuple[ModelSync, str]:
+    local = tmp_path / "local"
+    return ModelSync(container, root=str(local)), str(local)
+
+
+def read(local: str, name: str) -> bytes:
+    with open(os.path.join(local, name), "rb") as f:
+        return f.read()
+
+
+def test_unchanged_blobs_are_skipped(tmp_path, source):
+    container = CountingContainer(str(source))
+    sync, local = synced(tmp_path, container)
+    first = sync.sync()
+    assert sorted(first.downloaded) == ["models/spam.joblib", "models/spam/vocab.json"]
+    assert read(local, "models/spam.joblib") == b"spam v1"
+
+    container.downloads.clear()
+    second = sync.sync()
+    assert (second.downloaded, container.downloads) == ([], [])
+    assert sorted(second.skipped) == sorted(first.downloaded)
+
+
+def test_changed_blob_is_downloaded_again(tmp_path, source):
+    container = CountingContainer(str(source))
+    sync, local = synced(tmp_path, container)
+    sync.sync()
+    (source / "models" / "spam.joblib").write_bytes(b"spam v2, retrained")
+    container.downloads.clear()
+    result = sync.sync()
+    assert result.downloaded == ["models/spam.joblib"] == container.downloads
+    assert read(local, "models/spam.joblib") == b"spam v2, retrained"
+
+
+def test_removed_blob_is_deleted(tmp_path, source):
+    sync, local = synced(tmp_path, CountingContainer(str(source)))
+    sync.sync()
+    (source / "models" / "spam" / "vocab.json").unlink()
+    result = sync.sync()
+    assert result.removed == ["models/spam/vocab.json"]
+    assert not os.path.exists(os.path.join(local, "models", "spam", "vocab.json"))
+    assert "models/spam/vocab.json" not in sync.load_manifest()
+
+
+def test_md5_mismatch_keeps_previous_file(tmp_path, source):
+    container = CountingContainer(str(source))
+    sync, local = synced(tmp_path, container)
+    sync.sync()
+    (source / "models" / "spam.joblib").write_bytes(b"spam v2")
+    container.corrupted = True
+    result = sync.sync()
+    assert list(result.failed) == ["models/spam.joblib"]
+    assert "MD5" in result.failed["models/spam.joblib"]
+    assert read(local, "models/spam.joblib") == b"spam v1"
+    # Ni fichier temporaire laissé, ni entrée de manifeste : nouvel essai au prochain démarrage
+    assert sorted(os.listdir(os.path.join(local, "models"))) == [".manifest.json", "spam", "spam.joblib"]
+    assert "models/spam.joblib" not in sync.load_manifest()
+
+    container.corrupted = False
+    assert sync.sync().downloaded == ["models/spam.joblib"]
+    assert read(local, "models/spam.joblib") == b"spam v2"
+
+
+def test_blob_outside_root_is_rejected(tmp_path):
+    sync = ModelSync(LocalContainerClient(str(tmp_path)), root=str(tmp_path / "local"))
+    with pytest.raises(ValueError):
+        sync._local_path("../escape.bin")
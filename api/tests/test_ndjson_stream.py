@@ -0,0 +1,53 @@
+import asyncio
+import json
+from fastapi import BackgroundTasks, FastAPI, Request
+from fastapi.testclient import TestClient
+from app.ndjson_stream import NdjsonScoringStream, NdjsonStreamingResponse
+
+
+def test_stream_runs_background_tasks():
+    app = FastAPI()
+    done = []
+
+    async def score(texts):
+        return [{"length": len(text)} for text in texts]
+
+    @app.post("/stream")
+    async def stream(request: Request, background_tasks: BackgroundTasks):
+        background_tasks.add_task(done.append, "background")
+        return NdjsonStreamingResponse(NdjsonScoringStream(request, score, batch_size=2))
+
+    body = "\n".join(json.dumps({"text": text, "id": i}) for i, text in enumerate(["a", "bb", "ccc"]))
+    response = TestClient(app).post("/stream", content=body)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["length"] for row in rows] == [1, 2, 3]
+    assert done == ["background"]
+
+
+def test_stream_ends_when_the_body_raises(monkeypatch):
+    errors = []
+    monkeypatch.setattr("app.ndjson_stream.capture_exception",
+                        lambda error, context=None: errors.append(error))
+    chunks = [b'{"text": "a"}\n{"text": "bb"}\n']
+
+    async def receive():
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(), "more_body": True}
+        raise RuntimeError("corps illisible")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def score(texts):
+        return [{"length": len(text)} for text in texts]
+
+    async def run():
+        scope = {"type": "http", "method": "POST", "path": "/stream", "headers": []}
+        stream = NdjsonScoringStream(Request(scope, receive), score)
+        await asyncio.wait_for(NdjsonStreamingResponse(stream)(scope, receive, send), timeout=5)
+
+    asyncio.run(run())
+    assert [str(error) for error in errors] == ["corps illisible"]
+    assert sent[0]["type"] == "http.response.start"
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from app.result_cache import CACHE_HIT, CACHE_MISS, CACHE_SHARED, PredictionCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.result_cache.time", clock)
+    return clock
+
+
+def test_lru_eviction(clock):
+    cache = PredictionCache("v1", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a devient la plus récente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(clock):
+    cache = PredictionCache("v1", ttl_seconds=10)
+    cache.set("a", 1)
+    clock.now += 9.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_key_depends_on_normalized_text_scope_and_versions():
+    cache = PredictionCache("v1")
+    assert cache.key("  Café ") == cache.key("Café")
+    assert cache.key("Café", scope="spam") != cache.key("Café")
+    assert PredictionCache("v2").key("Café") != cache.key("Café")
+
+
+def test_single_flight_shares_one_computation():
+    cache = PredictionCache("v1")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"is_spam": False}
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        return results, await cache.get_or_compute("k", compute)
+
+    results, after = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == [CACHE_MISS] + [CACHE_SHARED] * 4
+    assert all(value == {"is_spam": False} for value, _ in results)
+    assert after[1] == CACHE_HIT
+    assert cache.stats()["inflight"] == 0
+
+
+def test_single_flight_failure_is_shared_and_not_cached():
+    cache = PredictionCache("v1")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("modèle indisponible")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", fail) for _ in range(3)),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert [str(error) for error in errors] == ["modèle indisponible"] * 3
+    assert cache.get("k") is None
+    assert cache.stats()["inflight"] == 0
@@ -0,0 +1,85 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from app.spam_model import SpamModel
+from app.spam_scorer import (PARITY_TOLERANCE, CompiledSpamScorer, UnsupportedPipeline,
+                             check_parity, parity_probes)
+
+NUMERIC = ["keyword_count", "keyword_ratio", "uppercase_ratio"]
+SPAM_WORDS = "free win prize cash urgent claim offer click".split()
+HAM_WORDS = "meeting tomorrow lunch report thanks call later project".split()
+
+
+def training_frame(size: int = 200) -> tuple[pd.DataFrame, list[int]]:
+    rng = random.Random(0)
+    rows, labels = [], []
+    for _ in range(size):
+        spam = rng.random() < 0.4
+        words = rng.choices(SPAM_WORDS if spam else HAM_WORDS, k=rng.randint(3, 12)) \
+            + rng.choices(SPAM_WORDS + HAM_WORDS, k=rng.randint(0, 3))
+        rows.append({"keyword_count": sum(word in SPAM_WORDS for word in words),
+                     "keyword_ratio": rng.random(),
+                     "uppercase_ratio": rng.random() * (0.8 if spam else 0.2),
+                     "message": " ".join(words)})
+        labels.append(int(spam))
+    return pd.DataFrame(rows), labels
+
+
+PIPELINES = {
+    "tfidf_logistic": lambda: Pipeline([
+        ("preprocessor", ColumnTransformer([
+            ("text", TfidfVectorizer(), "message"),
+            ("num", StandardScaler(), NUMERIC)])),
+        ("classifier", LogisticRegression())]),
+    "count_tfidf_sgd": lambda: Pipeline([
+        ("preprocessor", ColumnTransformer([
+            ("text", Pipeline([("count", CountVectorizer(ngram_range=(1, 2))),
+                               ("tfidf", TfidfTransformer(sublinear_tf=True, norm="l1"))]),
+             "message")], remainder="passthrough")),
+        ("classifier", SGDClassifier(loss="log_loss", random_state=0))]),
+    "binary_count_nb": lambda: Pipeline([
+        ("preprocessor", ColumnTransformer([
+            ("text", CountVectorizer(binary=True), "message"),
+            ("num", MinMaxScaler(clip=True), NUMERIC)])),
+        ("classifier", MultinomialNB())]),
+    "dense_logistic": lambda: Pipeline([
+        ("preprocessor", ColumnTransformer([("num", StandardScaler(), NUMERIC)])),
+        ("classifier", LogisticRegression())]),
+}
+
+
+@pytest.mark.parametrize("name", PIPELINES)
+def test_compiled_scorer_matches_pipeline(name):
+    frame, labels = training_frame()
+    pipeline = PIPELINES[name]().fit(frame, labels)
+    scorer = CompiledSpamScorer(pipeline)
+
+    def reference(features, messages):
+        return pipeline.predict_proba(SpamModel.build_frame(features, messages))[:, 1]
+
+    features, messages = parity_probes(scorer, size=128, seed=1)
+    difference = np.abs(scorer.predict_proba(features, messages) - reference(features, messages))
+    assert difference.max() <= PARITY_TOLERANCE
+    assert check_parity(scorer, reference)["ok"]
+
+    # Lot d'un seul texte et lot vide
+    single = ({column: values[:1] for column, values in features.items()}, messages[:1])
+    assert np.abs(scorer.predict_proba(*single) - reference(*single)).max() <= PARITY_TOLERANCE
+    assert scorer.predict_proba({column: [] for column in features}, []).shape == (0,)
+
+
+def test_unsupported_classifier():
+    frame, labels = training_frame()
+    pipeline = Pipeline([
+        ("preprocessor", ColumnTransformer([("num", StandardScaler(), NUMERIC)])),
+        ("classifier", RandomForestClassifier(n_estimators=5, random_state=0))]).fit(frame, labels)
+    with pytest.raises(UnsupportedPipeline):
+        CompiledSpamScorer(pipeline)
@@ -0,0 +1,60 @@
+import re
+import emoji
+import pytest
+from bs4 import BeautifulSoup
+from app.text_cleaning import BertTextCleaner, HtmlTextExtractor
+
+
+def reference_clean(text: str, strip_symbols: bool) -> str:
+    """
+    emotions/roberta/functions.nettoyer_avant_bert ; avec strip_symbols,
+    l'ancien nettoyage de l'API (SentimentPreprocessor.clean_text_for_bert)
+    """
+    text = text.encode('utf-8', 'ignore').decode('utf-8')
+    text = BeautifulSoup(text, "html.parser").get_text()
+    text = re.sub(r"[\n\t\r]", " ", text)
+    if strip_symbols:
+        text = re.sub(r"[^\w\s.,!?']", "", text)
+    text = emoji.demojize(text)
+    text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+    return " ".join(text.split())
+
+
+TEXTS = {
+    "plain": "Just a plain sentence, nothing special.",
+    "entities": "Fish &amp; chips&nbsp;&eacute;t&eacute; &#233;&#xE9; &#150; &lt;b&gt; &unknown; AT&T",
+    "script_style": "<style>p { color: red }</style>Hi<script>var a = '<b>x</b>';</script> there"
+                    "<template><p>hidden</p></template>!",
+    "nested_blocks": "<div>One<div><p>Two<ul><li>Three</li><li>Four</div></p>Five</div>",
+    "void_and_unclosed": "Line<br>break<br/>again<img src=x>end<b>bold<i>both",
+    "comments_cdata": "Before<!-- comment --> after <![CDATA[raw <b>data</b>]]> <!DOCTYPE html>",
+    "emoji_repeats": "Sooooo happy 😊😊 !!!! <b>cooool</b> ❤️ #win @you 50$",
+    "whitespace": "\tTabs\nand\r\nnewlines   <p>\n  spaced  </p>\n",
+}
+
+
+@pytest.mark.parametrize("strip_symbols", [False, True])
+@pytest.mark.parametrize("name", TEXTS)
+def test_bert_cleaning_matches_reference(name, strip_symbols):
+    text = TEXTS[name]
+    assert BertTextCleaner(strip_symbols).clean(text) == reference_clean(text, strip_symbols)
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_extractor_matches_bs4_text(name):
+    text = TEXTS[name]
+    expected = BeautifulSoup(text, "html.parser").get_text()
+    # Aux blancs près (chaînes faites uniquement d'espaces)
+    assert HtmlTextExtractor().extract(text).split() == expected.split()
+
+
+def test_strip_symbols_removes_emojis_before_demojize():
+    text = "Great 😊 #deal, 100% off!!!"
+    assert BertTextCleaner().clean(text) == "Great :smiling_face_with_smiling_eyes: #deal, 100% off!!"
+    assert BertTextCleaner(strip_symbols=True).clean(text) == "Great deal, 100 off!!"
+
+
+def test_block_newlines_and_hidden_tags():
+    extractor = HtmlTextExtractor(hidden_tags=frozenset({"title", "script"}), block_newlines=True)
+    text = extractor.extract("<title>T</title><div>a</div><p>b<br>c</p><script>x</script>d")
+    assert text == "\na\n\nb\nc\nd"
@@ -0,0 +1,80 @@
+import pytest
+from app.translation_cache import TranslationCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("app.translation_cache.time", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TranslationCache(max_entries=2)
+    cache.set("fr", "un", "one")
+    cache.set("fr", "deux", "two")
+    assert cache.get("fr", "un") == "one"
+    cache.set("fr", "trois", "three")
+    assert cache.get("fr", "deux") is None
+    assert (cache.get("fr", "un"), cache.get("fr", "trois")) == ("one", "three")
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TranslationCache(ttl_seconds=60)
+    cache.set("fr", "bonjour", "hello")
+    clock.now += 59
+    assert cache.get("fr", "bonjour") == "hello"
+    clock.now += 2
+    assert cache.get("fr", "bonjour") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_key_normalizes_whitespace_and_language(clock):
+    cache = TranslationCache()
+    cache.set("fr", "  bonjour\n le   monde ", "hello world")
+    assert cache.get("fr", "bonjour le monde") == "hello world"
+    assert cache.get("es", "bonjour le monde") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_disk_tier_survives_restart(clock, tmp_path):
+    path = str(tmp_path / "cache" / "translations.db")
+    cache = TranslationCache(ttl_seconds=60, disk_path=path)
+    cache.set("fr", "bonjour", "hello")
+    cache.set("fr", "salut", "hi")
+    cache.close()
+
+    clock.now += 30
+    restarted = TranslationCache(ttl_seconds=60, disk_path=path)
+    assert restarted.get("fr", "bonjour") == "hello"
+    # Remontée en mémoire : la seconde lecture ne touche plus le disque
+    assert restarted.get("fr", "bonjour") == "hello"
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["disk_enabled"]) == (1, 1, True)
+
+    clock.now += 31
+    assert restarted.get("fr", "salut") is None
+    restarted.close()
+
+
+def test_expired_disk_rows_are_purged_on_open(clock, tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = TranslationCache(ttl_seconds=10, disk_path=path)
+    cache.set("fr", "bonjour", "hello")
+    cache.close()
+
+    clock.now += 11
+    restarted = TranslationCache(ttl_seconds=10, disk_path=path)
+    assert restarted._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] == 0
+    assert restarted.get("fr", "bonjour") is None
+    restarted.close()
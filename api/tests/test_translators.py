@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.translators import (CircuitBreaker, GoogleTranslatorBackend, ResilientTranslator,
+                             TranslationSaturated, TranslatorBackend)
+
+
+class SleepingBackend(TranslatorBackend):
+    name = "sleeping"
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source_lang: str) -> str:
+        with self._lock:
+            self.started += 1
+        time.sleep(self.seconds)
+        return text.upper()
+
+
+def test_deadline_starts_when_the_call_runs():
+    # 4 appels de 0,15 s sur un seul thread : les derniers attendent plus que
+    # le délai en file, sans le dépasser une fois démarrés
+    backend = SleepingBackend(0.15)
+    translator = ResilientTranslator(
+        backend, deadline_seconds=0.3, max_concurrency=1, retries=0,
+        queue_timeout_seconds=2.0, circuit_breaker=CircuitBreaker(failure_threshold=1))
+    with ThreadPoolExecutor(4) as callers:
+        results = list(callers.map(lambda text: translator.translate(text, "fr"), "abcd"))
+    assert results == ["A", "B", "C", "D"]
+    assert translator.stats()["timeouts"] == 0
+    assert translator.circuit_breaker.state == "closed"
+    translator.close()
+
+
+def test_saturation_does_not_open_the_circuit():
+    backend = SleepingBackend(0.3)
+    translator = ResilientTranslator(
+        backend, deadline_seconds=1.0, max_concurrency=1, retries=2,
+        queue_timeout_seconds=0.05, circuit_breaker=CircuitBreaker(failure_threshold=1))
+    with ThreadPoolExecutor(2) as callers:
+        running = callers.submit(translator.translate, "occupé", "fr")
+        time.sleep(0.05)
+        with pytest.raises(TranslationSaturated):
+            translator.translate("en file", "fr")
+        assert running.result() == "OCCUPÉ"
+    stats = translator.stats()
+    assert (stats["saturated"], stats["calls"], stats["failures"]) == (1, 1, 0)
+    assert backend.started == 1
+    assert translator.circuit_breaker.state == "closed"
+    translator.close()
+
+
+def test_google_extraction():
+    pytest.importorskip("deep_translator")
+    from deep_translator.exceptions import TranslationNotFound
+
+    extract = GoogleTranslatorBackend.extract_translation
+    assert extract('<div class="t0"> Hello </div>', "Bonjour") == "Hello"
+    assert extract('<div class="result-container">Good <b>night</b></div>', "Bonne nuit") \
+        == "Goodnight"
+    with pytest.raises(TranslationNotFound):
+        extract("<html><body>Erreur</body></html>", "Salut")
@@ -0,0 +1,276 @@
+"""
+Score hors ligne d'un fichier de textes (CSV, JSONL ou Parquet) avec les
+mêmes modèles et le même pipeline que l'API (ServicesContainer), sans
+serveur ni base de données.
+
+L'entrée est lue par blocs de --chunk-size lignes ; chaque bloc est scoré
+par un processus de travail qui charge les modèles une seule fois
+(initializer), et les résultats sont écrits dans l'ordre de l'entrée, bloc
+par bloc, avec la position de chaque ligne (offset). Au plus 2 blocs par
+processus sont en vol : la mémoire reste bornée quelle que soit la taille
+du fichier. --resume reprend après le dernier résultat écrit (lu à la fin
+de la sortie).
+
+Les modèles doivent être présents dans models/ (synchronisés par l'API ou
+copiés à la main). Parquet nécessite pyarrow.
+
+Usage (depuis api/) :
+    python -m tools.bulk_score emails.csv scores.jsonl --workers 4
+    python -m tools.bulk_score emails.jsonl scores.csv --id-column message_id --resume
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Réglages imposés aux processus de travail, avant la lecture des settings :
+# le parallélisme vient du pool de processus, pas des pools internes
+WORKER_OVERRIDES = {
+    "EXECUTOR_CPU_MODE": "thread",
+    "EXECUTOR_CPU_WORKERS": "1",
+    "EXECUTOR_INFERENCE_WORKERS": "1",
+    "EMOTION_BATCHING_ENABLED": "false",
+    "PREDICTION_CACHE_ENABLED": "false",
+    "STARTUP_PARALLEL_LOADING": "false",
+}
+# Variables lues par TensorFlow, onnxruntime et BLAS pour leurs propres threads
+THREAD_VARIABLES = ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS",
+                    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                    "EMOTION_ONNX_THREADS")
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+_services = None
+
+
+def _init_worker(overrides: dict):
+    global _services
+    os.environ.update(overrides)
+    from app.services import ServicesContainer
+    _services = ServicesContainer()
+    _services.initialize()
+
+
+def _score_chunk(texts: list[str]) -> list[dict]:
+    return asyncio.run(_services.run_pipeline(texts))
+
+
+def file_format(path: str, forced: str | None) -> str:
+    if forced:
+        return forced
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise SystemExit(f"Format inconnu pour {path} (--input-format / --output-format)")
+    return FORMATS[extension]
+
+
+def read_chunks(path: str, fmt: str, columns: list[str], chunk_size: int, skip: int):
+    """Blocs de lignes {colonne: valeur}, à partir de la ligne skip"""
+    if fmt == "csv":
+        import pandas as pd
+        reader = pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size, skiprows=range(1, skip + 1))
+        for frame in reader:
+            yield frame.to_dict("records")
+
+    elif fmt == "jsonl":
+        chunk = []
+        with open(path, encoding="utf-8") as source:
+            for index, line in enumerate(source):
+                if index < skip:
+                    continue
+                record = json.loads(line) if line.strip() else {}
+                chunk.append({column: record.get(column) for column in columns})
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("La lecture Parquet nécessite pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            if skip:
+                batch, skip = batch.slice(skip), 0
+            yield batch.to_pylist()
+
+
+def _last_newlines(file, count: int, block_size: int = 65536) -> list[int]:
+    """Positions des count derniers sauts de ligne, lues par blocs depuis la fin"""
+    positions: list[int] = []
+    end = file.seek(0, os.SEEK_END)
+    while end > 0 and len(positions) < count:
+        start = max(0, end - block_size)
+        file.seek(start)
+        block = file.read(end - start)
+        index = len(block)
+        while len(positions) < count and (index := block.rfind(b"\n", 0, index)) >= 0:
+            positions.append(start + index)
+        end = start
+    return positions
+
+
+def resume_offset(path: str, fmt: str) -> int | None:
+    """
+    Position dans l'entrée de la ligne qui suit le dernier résultat complet,
+    lu à la fin de la sortie sans la charger ; une dernière ligne tronquée
+    (arrêt pendant l'écriture) est supprimée. None sans résultat écrit.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb+") as output:
+        newlines = _last_newlines(output, 2)
+        complete = newlines[0] + 1 if newlines else 0
+        if complete < output.seek(0, os.SEEK_END):
+            output.truncate(complete)
+        if not newlines:
+            return None
+        start = newlines[1] + 1 if len(newlines) > 1 else 0
+        output.seek(start)
+        line = output.read(complete - start).decode("utf-8")
+    if fmt == "jsonl":
+        return json.loads(line)["offset"] + 1
+    if start == 0:
+        # En-tête seul
+        return None
+    # Un résultat par ligne physique (ResultWriter.escape), offset en premier
+    return int(next(csv.reader([line]))[0]) + 1
+
+
+class ResultWriter:
+    """
+    Écriture incrémentale JSONL ou CSV. En CSV, les scores d'émotions sont
+    mis à plat et les sauts de ligne des valeurs échappés (\\n, \\r, \\\\) :
+    chaque résultat tient sur une ligne physique, ce qui permet la reprise
+    """
+
+    def __init__(self, path: str, fmt: str, append: bool):
+        self.fmt = fmt
+        self.file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self.csv_writer = None
+        self.write_header = not append or self.file.tell() == 0
+
+    def write(self, records: list[dict]):
+        if self.fmt == "jsonl":
+            self.file.writelines(json.dumps(record, ensure_ascii=False) + "\n"
+                                 for record in records)
+        else:
+            rows = [{key: self.escape(value) for key, value in self.flatten(record).items()}
+                    for record in records]
+            if self.csv_writer is None and rows:
+                self.csv_writer = csv.DictWriter(self.file, fieldnames=list(rows[0]))
+                if self.write_header:
+                    self.csv_writer.writeheader()
+            self.csv_writer.writerows(rows)
+        self.file.flush()
+
+    @staticmethod
+    def flatten(record: dict) -> dict:
+        row = {key: value for key, value in record.items() if key != "emotion_scores"}
+        for emotion, score in (record.get("emotion_scores") or {}).items():
+            row[f"emotion_{emotion}"] = score
+        return row
+
+    @staticmethod
+    def escape(value):
+        if isinstance(value, str):
+            return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+        return value
+
+    def close(self):
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", help="Colonne recopiée telle quelle dans la sortie")
+    parser.add_argument("--input-format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--output-format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=1,
+                        help="Threads TensorFlow / onnxruntime / BLAS par processus")
+    parser.add_argument("--include-text", action="store_true",
+                        help="Recopie le texte d'origine dans la sortie")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprend après les lignes déjà présentes dans la sortie")
+    parser.add_argument("--start-offset", type=int, default=0,
+                        help="Ignore les N premières lignes de l'entrée")
+    args = parser.parse_args()
+
+    input_format = file_format(args.input, args.input_format)
+    output_format = file_format(args.output, args.output_format)
+    if output_format == "parquet":
+        raise SystemExit("Sortie attendue en CSV ou JSONL")
+
+    offset = args.start_offset
+    if args.resume:
+        offset = resume_offset(args.output, output_format) or offset
+    columns = [args.text_column] + ([args.id_column] if args.id_column else [])
+
+    overrides = dict(WORKER_OVERRIDES)
+    overrides.update({name: str(args.threads_per_worker) for name in THREAD_VARIABLES})
+    # spawn : TensorFlow ne supporte pas fork après son initialisation
+    pool = ProcessPoolExecutor(max_workers=args.workers,
+                               mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(overrides,))
+    writer = ResultWriter(args.output, output_format, append=args.resume)
+    chunks = read_chunks(args.input, input_format, columns, args.chunk_size, offset)
+    in_flight = deque()
+    max_in_flight = 2 * args.workers
+    scored, started = 0, time.perf_counter()
+    print(f"Reprise à la ligne {offset}" if offset else "Début du score", file=sys.stderr)
+
+    def submit() -> bool:
+        nonlocal offset
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        texts = ["" if row[args.text_column] is None else str(row[args.text_column])
+                 for row in chunk]
+        in_flight.append((offset, chunk, pool.submit(_score_chunk, texts)))
+        offset += len(chunk)
+        return True
+
+    try:
+        while len(in_flight) < max_in_flight and submit():
+            pass
+        while in_flight:
+            start, chunk, future = in_flight.popleft()
+            records = []
+            for position, (row, result) in enumerate(zip(chunk, future.result())):
+                record = {"offset": start + position}
+                if args.id_column:
+                    record[args.id_column] = row[args.id_column]
+                if not args.include_text:
+                    del result["text"]
+                records.append({**record, **result})
+            writer.write(records)
+            submit()
+
+            scored += len(records)
+            elapsed = time.perf_counter() - started
+            print(f"{start + len(records)} lignes ({scored / elapsed:.1f} textes/s)",
+                  file=sys.stderr)
+    finally:
+        writer.close()
+        pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Exporte le saved model d'émotions (models/emotions) en ONNX, avec
+quantification dynamique int8 optionnelle des poids, puis vérifie l'écart
+des probabilités avec le modèle TensorFlow sur quelques phrases.
+
+Nécessite tf2onnx en plus des dépendances de l'API (pip install tf2onnx).
+
+Usage (depuis api/) :
+    python -m tools.export_emotion_onnx --output models/emotions.onnx --quantize
+puis EMOTION_BACKEND=onnx et EMOTION_ONNX_PATH=models/emotions.int8.onnx
+"""
+import argparse
+import os
+import subprocess
+import sys
+import numpy as np
+from app.emotion_backends import OnnxEmotionBackend, TensorFlowEmotionBackend
+from app.sentiment_model import SentimentModel
+
+CHECK_SENTENCES = [
+    "i feel so happy today, everything went great",
+    "i am really scared of what might happen tomorrow",
+    "this is outrageous, i am furious with the support team",
+    "we received your message and will answer shortly",
+    "i can't believe it, what a surprise!",
+    "i miss her so much, the house feels empty",
+]
+
+
+def export(saved_model: str, output: str, opset: int):
+    subprocess.run([
+        sys.executable, "-m", "tf2onnx.convert",
+        "--saved-model", saved_model,
+        "--signature_def", "serving_default",
+        "--opset", str(opset),
+        "--output", output,
+    ], check=True)
+
+
+def quantize(model_path: str, output: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(model_path, output, weight_type=QuantType.QInt8)
+
+
+def check(saved_model: str, onnx_paths: list[str]):
+    """Écart maximal des probabilités et accord des émotions prédites"""
+    reference = SentimentModel(backend=TensorFlowEmotionBackend(saved_model))
+    expected = reference._predict_probs(CHECK_SENTENCES)
+    for path in onnx_paths:
+        model = SentimentModel(backend=OnnxEmotionBackend(path))
+        probs = model._predict_probs(CHECK_SENTENCES)
+        agreement = np.mean(probs.argmax(axis=1) == expected.argmax(axis=1))
+        print(f"{path}: écart max {np.abs(probs - expected).max():.4f}  "
+              f"accord {agreement:.2%}  taille {os.path.getsize(path) / 1e6:.0f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--saved-model", default="models/emotions")
+    parser.add_argument("--output", default="models/emotions.onnx")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--quantize", action="store_true",
+                        help="écrit aussi <output>.int8.onnx (poids int8, activations float)")
+    parser.add_argument("--skip-check", action="store_true")
+    args = parser.parse_args()
+
+    export(args.saved_model, args.output, args.opset)
+    outputs = [args.output]
+    if args.quantize:
+        quantized = os.path.splitext(args.output)[0] + ".int8.onnx"
+        quantize(args.output, quantized)
+        outputs.append(quantized)
+
+    if not args.skip_check:
+        check(args.saved_model, outputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -58,3 +58,12 @@ def nettoyer_texte(df, col_name):
     return df   
 
 
+
+
+def sauvegarder_tokenizer(tokenizer, chemin="models/emotions_lstm_tokenizer.json"):
+    """
+    Sauvegarde le Tokenizer Keras en JSON, chargé par l'API avec le modèle
+    (.keras) pour la cascade des émotions (EMOTION_CASCADE_ENABLED)
+    """
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write(tokenizer.to_json())
@@ -1,15 +1,55 @@
-import spacy
+import json
+import numpy as np
 import pandas as pd
 import re
 from tqdm import tqdm
-from spacy.cli import download
-# Charger le modèle spaCy pour l'anglais
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Le modèle 'en_core_web_sm' n'est pas installé. Téléchargement en cours...")
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+# Dictionnaires de mots-clés et automate partagés avec l'API (le dossier api/
+# doit être dans le PYTHONPATH, voir le README)
+from app.keyword_matcher import DEFAULT_KEYWORDS_PATH, KeywordMatcher
+
+_nlp = None
+
+
+def get_nlp():
+    """Modèle spaCy anglais, chargé au premier nettoyage (téléchargé s'il manque)"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+        from spacy.cli import download
+        try:
+            _nlp = spacy.load("en_core_web_sm")
+        except OSError:
+            print("Le modèle 'en_core_web_sm' n'est pas installé. Téléchargement en cours...")
+            download("en_core_web_sm")
+            _nlp = spacy.load("en_core_web_sm")
+    return _nlp
+
+PRONOUNS = [
+    # Pronoms personnels sujets
+    'I', 'you', 'he', 'she', 'it', 'we', 'they',  # Singulier et pluriel
+
+    # Pronoms personnels objets
+    'me', 'you', 'him', 'her', 'it', 'us', 'them',
+
+    # Pronoms possessifs
+    'my', 'your', 'his', 'her', 'its', 'our', 'their',
+
+    # Pronoms réfléchis
+    'myself', 'yourself', 'himself', 'herself', 'itself', 'ourselves', 'yourselves', 'themselves',
+
+    # Pronoms démonstratifs
+    'this', 'that', 'these', 'those',
+
+    # Pronoms indéfinis
+    'everyone', 'someone', 'anyone', 'no one', 'nothing', 'everything', 'anything', 'everybody', 'somebody', 'anybody', 'nobody',
+
+    # Pronoms interrogatifs
+    'who', 'whom', 'whose', 'which', 'what',
+
+    # Pronoms relatifs
+    'who', 'whom', 'whose', 'which', 'that'
+]
+
 
 # Traitement spaCy du texte
 
@@ -20,7 +60,7 @@ def nettoyage_spacy(texte):
     :param texte: Texte à nettoyer
     :return: Texte nettoyé
     """
-    doc = nlp(texte)
+    doc = get_nlp()(texte)
 
     cleaned_text = ' '.join([token.lemma_ for token in doc  # Lemmatisation
                             if not token.is_stop  # Pas un stopword
@@ -68,8 +108,8 @@ def nettoyer_texte(df, col_name):
     return df
 
 
-# ajouter des features
-def add_features(df):
+# ajouter des features (implémentation de référence, une lambda par feature)
+def add_features_reference(df):
     # Supprimer les NaN dans la colonne 'message'
     df = df.dropna(subset=['message']).reset_index(drop=True)
 
@@ -186,35 +226,61 @@ def add_features(df):
     df['promo_word_ratio'] = df['promo_word_count'] / df['word_count']
     df['letter_digit_ratio'] = df['message'].apply(lambda x: len([c for c in x if c.isalpha(
     )]) / len([c for c in x if c.isdigit()]) if len([c for c in x if c.isdigit()]) > 0 else 0)
-    pronouns = [
-        # Pronoms personnels sujets
-        'I', 'you', 'he', 'she', 'it', 'we', 'they',  # Singulier et pluriel
-
-        # Pronoms personnels objets
-        'me', 'you', 'him', 'her', 'it', 'us', 'them',
-
-        # Pronoms possessifs
-        'my', 'your', 'his', 'her', 'its', 'our', 'their',
+    df['pronoun_count'] = df['message'].apply(
+        lambda x: sum(1 for word in PRONOUNS if word in x.lower()))
+    df['uppercase_ratio'] = df['message'].apply(
+        lambda x: sum(1 for char in x if char.isupper()) / len(x) if x else 0)
+    return df
 
-        # Pronoms réfléchis
-        'myself', 'yourself', 'himself', 'herself', 'itself', 'ourselves', 'yourselves', 'themselves',
 
-        # Pronoms démonstratifs
-        'this', 'that', 'these', 'those',
+def _keyword_dictionaries():
+    """Dictionnaires du fichier versionné de l'API + pronoms"""
+    with open(DEFAULT_KEYWORDS_PATH, encoding='utf-8') as f:
+        data = json.load(f)
+    dictionaries = {name: [word for words in data[name].values() for word in words]
+                    for name in ('spam_keywords', 'promo_words')}
+    dictionaries['pronouns'] = PRONOUNS
+    return dictionaries
 
-        # Pronoms indéfinis
-        'everyone', 'someone', 'anyone', 'no one', 'nothing', 'everything', 'anything', 'everybody', 'somebody', 'anybody', 'nobody',
 
-        # Pronoms interrogatifs
-        'who', 'whom', 'whose', 'which', 'what',
+def add_features(df):
+    """
+    Calcule les mêmes features que add_features_reference en un seul passage
+    par message : un automate d'Aho-Corasick compte les trois dictionnaires
+    à la fois, les comptages de caractères passent par les méthodes str en C,
+    et les ratios sont calculés en NumPy sur des colonnes entières.
+    """
+    # Supprimer les NaN dans la colonne 'message'
+    df = df.dropna(subset=['message']).reset_index(drop=True)
 
-        # Pronoms relatifs
-        'who', 'whom', 'whose', 'which', 'that'
-    ]
-    df['pronoun_count'] = df['message'].apply(
-        lambda x: sum(1 for word in pronouns if word in x.lower()))
-    df['uppercase_ratio'] = df['message'].apply(
-        lambda x: sum(1 for char in x if char.isupper()) / len(x))
+    # Convertir toutes les valeurs en chaînes
+    df['message'] = df['message'].astype(str)
+    messages = df['message']
+
+    matcher = KeywordMatcher(_keyword_dictionaries())
+    counts = [matcher.count(x) for x in messages]
+    letters = np.fromiter((sum(map(str.isalpha, x)) for x in messages),
+                          dtype=np.int64, count=len(messages))
+    digits = np.fromiter((sum(map(str.isdigit, x)) for x in messages),
+                         dtype=np.int64, count=len(messages))
+    uppercase = np.fromiter((sum(map(str.isupper, x)) for x in messages),
+                            dtype=np.int64, count=len(messages))
+
+    df['message_length'] = messages.str.len()  # longueur du message
+    df['word_count'] = messages.str.split().str.len()
+    df['special_char_count'] = messages.str.count(r'[@#$%&*]')
+    df['keyword_count'] = [c['spam_keywords'] for c in counts]
+    df['keyword_ratio'] = df['keyword_count'] / df['word_count']
+    df['url_count'] = messages.str.count(r'http[s]?://')
+    df['promo_word_count'] = [c['promo_words'] for c in counts]
+    df['promo_word_ratio'] = df['promo_word_count'] / df['word_count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['letter_digit_ratio'] = np.where(
+            digits > 0, letters / np.maximum(digits, 1), 0)
+    df['pronoun_count'] = [c['pronouns'] for c in counts]
+    df['uppercase_ratio'] = np.divide(
+        uppercase, df['message_length'], out=np.zeros(len(df)),
+        where=df['message_length'].to_numpy() > 0)
     return df
 
 
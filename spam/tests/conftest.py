@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Les tests importent functions depuis spam/ et le paquet app depuis api/
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "spam"))
+sys.path.insert(0, os.path.join(ROOT, "api"))
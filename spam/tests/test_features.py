@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from functions import add_features, add_features_reference
+
+MESSAGES = {
+    "empty": "",
+    "no_keywords": "See you at the meeting tomorrow, bring the slides.",
+    "overlapping": "Claim your free gift: free shipping, free gift card and a cash prize!",
+    "repeated": "free free FREE free",
+    "uppercase": "URGENT!!! You are the WINNER of our LOTTERY, call NOW",
+    "accented": "Énorme offre exclusive : café gratuit à Noël, don’t miss out ÇA VA",
+    "mixed_case_entry": "black friday deals, Black Friday only",
+    "digits_and_urls": "Win 1000$ at http://spam.example and https://x.y #promo @you 50% off",
+    "whitespace": "   \n\t  ",
+}
+
+
+@pytest.mark.parametrize("name", MESSAGES)
+def test_add_features_matches_reference(name):
+    df = pd.DataFrame({"message": [MESSAGES[name]]})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = add_features_reference(df.copy())
+        actual = add_features(df.copy())
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_add_features_matches_reference_on_a_frame():
+    df = pd.DataFrame({"message": list(MESSAGES.values()) + [None, 42],
+                       "label": range(len(MESSAGES) + 2)})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = add_features_reference(df.copy())
+        actual = add_features(df.copy())
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    assert len(actual) == len(MESSAGES) + 1
+
+
+def test_empty_message_features():
+    row = add_features(pd.DataFrame({"message": [""]})).iloc[0]
+    assert row["message_length"] == 0
+    assert row["keyword_count"] == 0
+    assert row["uppercase_ratio"] == 0